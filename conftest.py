@@ -75,6 +75,7 @@ class ResourceData:
     created_at: str
     updated_at: str
     connector_config: int
+    cache_ttl: Optional[int] = None
 
 
 @dataclass
@@ -348,3 +349,32 @@ def accept_error(request):
 )
 def accept_download(request):
     return request.param
+
+
+@pytest.fixture
+def sqlite_resource(tmp_path, db):
+    """Resource of a sqlite table that does not require any external database."""
+    from connectors import dispose_engine, purge_model_cache
+    from gaodcore.resource_stats import discard_resource_sizes
+    from gaodcore_manager.models import ConnectorConfig, ResourceConfig
+
+    uri = f"sqlite:///{tmp_path / 'resource.sqlite3'}"
+    engine = create_engine(uri)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE cars (id INTEGER PRIMARY KEY, name TEXT, weight NUMERIC, purchase DATE)"))
+        conn.execute(
+            text(
+                "INSERT INTO cars VALUES (1, 'Fiat', 60.0, '2020-01-01'), (2, 'Seat, \"Ibiza\"', 45.5, NULL), "
+                "(3, 'Ford', 70, '2021-05-03')"
+            )
+        )
+    engine.dispose()
+
+    connector = ConnectorConfig.objects.create(name="sqlite", uri=uri, enabled=True)
+    resource = ResourceConfig.objects.create(
+        name="cars", connector_config=connector, enabled=True, object_location="cars"
+    )
+    yield resource
+    discard_resource_sizes()
+    purge_model_cache(uri)
+    dispose_engine(uri)
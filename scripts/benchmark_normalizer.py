@@ -0,0 +1,89 @@
+"""Compare the per-value normalization loop used before normalizers.py with the column-type-driven normalizer.
+
+Usage: python scripts/benchmark_normalizer.py [rows]
+"""
+
+import decimal
+import math
+import os
+import sys
+import time
+import uuid
+from datetime import date, datetime
+
+from django.utils.functional import Promise
+from sqlalchemy import Column, Date, DateTime, Float, Integer, Numeric, Text, Uuid
+from sqlalchemy.types import Numeric as NumericType
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from normalizers import get_row_normalizer, sanitize_control_charcters  # noqa: E402
+
+COLUMNS = [
+    Column("id", Integer),
+    Column("name", Text),
+    Column("description", Text),
+    Column("weight", Numeric),
+    Column("max_acceleration", Float),
+    Column("purchase_date", Date),
+    Column("updated_at", DateTime),
+    Column("uuid", Uuid),
+]
+
+
+def legacy_normalize_row(item: tuple) -> tuple:
+    row = []
+    for column in item:
+        if isinstance(column, uuid.UUID):
+            row.append(str(column))
+        elif isinstance(column, (decimal.Decimal, Promise)) or isinstance(column, float) or isinstance(
+            column, NumericType
+        ):
+            parte_decimal, _ = math.modf(column)
+            if parte_decimal == 0.0:
+                row.append(int(column))
+            else:
+                row.append(sanitize_control_charcters(column))
+        else:
+            row.append(sanitize_control_charcters(column))
+    return tuple(row)
+
+
+def get_rows(count: int):
+    return [
+        (
+            i,
+            f"RX-78-{i} Gundam ",
+            None if i % 3 else "Mobile suit\nwith\x00control characters",
+            decimal.Decimal(i % 100) / 4,
+            i * 0.5,
+            date(2020, 1, 1),
+            datetime(2020, 1, 1, 12, 30),
+            uuid.UUID(int=i),
+        )
+        for i in range(count)
+    ]
+
+
+def measure(name: str, normalize, rows) -> float:
+    start = time.perf_counter()
+    for row in rows:
+        normalize(row)
+    elapsed = time.perf_counter() - start
+    print(f"{name}: {elapsed:.2f}s ({len(rows) / elapsed:,.0f} rows/s)")
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rows = get_rows(count)
+    normalize = get_row_normalizer(COLUMNS)
+    assert [legacy_normalize_row(row) for row in rows[:1000]] == [normalize(row) for row in rows[:1000]]
+
+    legacy = measure("per-value loop", legacy_normalize_row, rows)
+    typed = measure("column normalizer", normalize, rows)
+    print(f"speedup: {legacy / typed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""In-process caches shared by all requests of a worker."""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from django.core.cache import cache as django_cache
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+_EPOCH_CHECK_INTERVAL = 10
+_UNSET = object()
+
+
+class SharedEpoch:
+    """Epoch stored in Django cache, so any worker (or a management command run in another process) can tell all
+    workers that what they hold is stale. Workers read it at most once every _EPOCH_CHECK_INTERVAL seconds."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self._epoch = _UNSET
+        self._checked_at = 0.0
+
+    def changed(self) -> bool:
+        """Epoch has been changed since the previous check of this worker. The first check is never a change."""
+        now = time.monotonic()
+        if now - self._checked_at < _EPOCH_CHECK_INTERVAL:
+            return False
+        self._checked_at = now
+        try:
+            epoch = django_cache.get(self.key)
+        except DatabaseError as err:
+            logger.warning("Cache epoch %s could not be read: %s", self.key, err)
+            return False
+        changed = self._epoch is not _UNSET and epoch != self._epoch
+        self._epoch = epoch
+        return changed
+
+    def change(self) -> None:
+        """Change the epoch, so other workers find it changed in their next check."""
+        epoch = time.time()
+        try:
+            django_cache.set(self.key, epoch, None)
+        except DatabaseError as err:
+            logger.warning("Cache epoch %s could not be updated: %s", self.key, err)
+            return
+        self._epoch = epoch
+
+
+class TTLCache:
+    """Thread safe cache with time to live and LRU eviction.
+
+    Entries only live in the memory of the current worker. If shared_key is provided, invalidate() also changes an
+    epoch stored in Django cache, so any worker (or a management command run in another process) can ask all workers
+    to drop their entries. Workers check that epoch at most once every _EPOCH_CHECK_INTERVAL seconds.
+
+    If on_evict is provided, it is called with key and value of every entry that leaves the cache (expired, evicted,
+    purged or replaced by another value), so resources held by values can be released.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: int,
+        shared_key: Optional[str] = None,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared_key = shared_key
+        self.on_evict = on_evict
+        # If max_bytes is provided, least recently used entries are evicted until sizes of entries, measured with
+        # sizeof, do not exceed it.
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: 0)
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._shared_epoch = SharedEpoch(shared_key) if shared_key else None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        self._check_epoch()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expires_at, value, _ = item
+            if expires_at < time.monotonic():
+                self._pop(key)
+                self.misses += 1
+                expired = True
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+                expired = False
+        if expired:
+            self._evicted([(key, value)])
+            return default
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[int] = None) -> None:
+        size = self.sizeof(value)
+        if self.max_size <= 0 or (self.max_bytes is not None and size > self.max_bytes):
+            self._evicted([(key, value)])
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        evicted = []
+        with self._lock:
+            if key in self._data:
+                previous = self._pop(key)
+                if previous is not value:
+                    evicted.append((key, previous))
+            self._data[key] = (expires_at, value, size)
+            self._bytes += size
+            while len(self._data) > self.max_size or (self.max_bytes is not None and self._bytes > self.max_bytes):
+                evicted_key = next(iter(self._data))
+                evicted.append((evicted_key, self._pop(evicted_key)))
+        self._evicted(evicted)
+
+    def purge(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """Remove entries whose key matches predicate, or all entries if there is no predicate. Return number of
+        removed entries."""
+        with self._lock:
+            keys = [key for key in self._data if predicate is None or predicate(key)]
+            evicted = [(key, self._pop(key)) for key in keys]
+        self._evicted(evicted)
+        return len(keys)
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """Like purge, but also ask other workers to drop all their entries. Return number of removed entries of this
+        worker."""
+        removed = self.purge(predicate)
+        if self._shared_epoch is not None:
+            self._shared_epoch.change()
+        return removed
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        """Counters of this worker: hits and misses since start, current entries and bytes."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._data), "bytes": self._bytes}
+
+    def _pop(self, key: Hashable) -> Any:
+        _, value, size = self._data.pop(key)
+        self._bytes -= size
+        return value
+
+    def _evicted(self, items: List[Tuple[Hashable, Any]]) -> None:
+        if self.on_evict is None:
+            return
+        for key, value in items:
+            try:
+                self.on_evict(key, value)
+            except Exception as err:  # pylint: disable=broad-except
+                logger.warning("Cache entry %s could not be released: %s", key, err)
+
+    def _check_epoch(self) -> None:
+        if self._shared_epoch is not None and self._shared_epoch.changed():
+            self.purge()
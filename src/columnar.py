@@ -0,0 +1,128 @@
+"""Columnar export of resources: Parquet and Arrow IPC files.
+
+Arrow types are mapped once per query from the reflected column types, so numbers, booleans and dates keep their types
+instead of being written as text. Rows are converted to Arrow arrays in batches of streaming.row_group_size rows, each
+of them a row group of the Parquet file or a record batch of the Arrow file, so memory does not depend on the number
+of rows.
+"""
+
+import decimal
+from typing import IO, Any, Callable, Iterable, Iterator, List, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Column
+from sqlalchemy.sql import sqltypes
+
+from normalizers import normalize_value, sanitize_text
+
+# Greatest precision of pa.decimal128.
+_MAX_DECIMAL_PRECISION = 38
+
+PARQUET_CONTENT_TYPE = "application/vnd.apache.parquet"
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.file"
+
+
+def _to_text(value: Any) -> str:
+    if type(value) is str:
+        return sanitize_text(value)
+    return str(normalize_value(value))
+
+
+def _to_decimal(value: Any) -> decimal.Decimal:
+    if type(value) is decimal.Decimal:
+        return value
+    return decimal.Decimal(str(value))
+
+
+def _to_wkb(value: Any) -> bytes:
+    # Geometries are read as WKBElement; their data is WKB bytes or its hexadecimal representation.
+    data = getattr(value, "data", value)
+    if isinstance(data, str):
+        return bytes.fromhex(data)
+    return bytes(data)
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _get_arrow_type(column: Column) -> Tuple[pa.DataType, Callable[[Any], Any]]:
+    """Arrow type of a column and converter of its values, except None."""
+    column_type = column.type
+    column_type_name = str(column_type)
+    if column_type_name.startswith("geometry") or column_type_name.startswith("geography"):
+        return pa.binary(), _to_wkb
+    if isinstance(column_type, sqltypes.Boolean):
+        return pa.bool_(), bool
+    if isinstance(column_type, sqltypes.Integer):
+        return pa.int64(), int
+    if isinstance(column_type, sqltypes.Float):
+        return pa.float64(), float
+    if isinstance(column_type, sqltypes.Numeric):
+        precision, scale = column_type.precision, column_type.scale
+        if precision and precision <= _MAX_DECIMAL_PRECISION and scale is not None and 0 <= scale <= precision:
+            return pa.decimal128(precision, scale), _to_decimal
+        # Unconstrained numbers, e.g. NUMERIC of PostgreSQL or NUMBER of Oracle, do not have a fixed scale.
+        return pa.float64(), float
+    if isinstance(column_type, sqltypes.DateTime):
+        return pa.timestamp("us", tz="UTC" if column_type.timezone else None), _identity
+    if isinstance(column_type, sqltypes.Date):
+        return pa.date32(), _identity
+    if isinstance(column_type, sqltypes.Time):
+        return pa.time64("us"), _identity
+    if isinstance(column_type, sqltypes.Interval):
+        return pa.duration("us"), _identity
+    if isinstance(column_type, sqltypes._Binary):
+        return pa.binary(), bytes
+    return pa.string(), _to_text
+
+
+def get_arrow_schema(columns: Iterable[Column], names: List[str]) -> pa.Schema:
+    """Arrow schema of columns, with fields named as names."""
+    return pa.schema([pa.field(name, _get_arrow_type(column)[0]) for name, column in zip(names, columns)])
+
+
+def iter_record_batches(
+    rows: Iterable[tuple], columns: List[Column], names: List[str], batch_rows: int
+) -> Iterator[pa.RecordBatch]:
+    """Convert rows with values of columns to record batches of up to batch_rows rows."""
+    schema = get_arrow_schema(columns, names)
+    converters = [_get_arrow_type(column)[1] for column in columns]
+
+    def to_batch(values: List[List[Any]]) -> pa.RecordBatch:
+        arrays = [pa.array(column_values, type=field.type) for column_values, field in zip(values, schema)]
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    values: List[List[Any]] = [[] for _ in columns]
+    size = 0
+    for row in rows:
+        for column_values, convert, value in zip(values, converters, row):
+            column_values.append(None if value is None else convert(value))
+        size += 1
+        if size >= batch_rows:
+            yield to_batch(values)
+            values = [[] for _ in columns]
+            size = 0
+    if size:
+        yield to_batch(values)
+
+
+def write_parquet(batches: Iterable[pa.RecordBatch], schema: pa.Schema, output: IO[bytes]) -> None:
+    """Write each record batch as a row group of a Parquet file."""
+    with pq.ParquetWriter(output, schema, compression="zstd") as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+
+
+def write_arrow(batches: Iterable[pa.RecordBatch], schema: pa.Schema, output: IO[bytes]) -> None:
+    """Write record batches to an Arrow IPC file."""
+    with pa.ipc.new_file(output, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+
+
+COLUMNAR_WRITERS = {
+    "parquet": (write_parquet, PARQUET_CONTENT_TYPE),
+    "arrow": (write_arrow, ARROW_CONTENT_TYPE),
+}
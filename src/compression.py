@@ -0,0 +1,185 @@
+"""Negotiated compression of responses.
+
+Data responses (json, csv, xml...) are compressed with the best encoding accepted by the client: zstd and brotli when
+their packages are installed, and gzip. HTML pages are not compressed, see _COMPRESSIBLE_CONTENT_TYPES. Streaming
+responses are compressed chunk by chunk and the compressor is flushed after each chunk, so streamed downloads are still
+sent while rows are read and memory does not depend on their size.
+"""
+
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from gaodcore_project.settings import CONFIG
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Content types of data that are compressed. HTML pages (admin, login, browsable API) are never compressed: they carry
+# CSRF tokens next to reflected request data, and compressing them would expose the tokens to BREACH attacks.
+_COMPRESSIBLE_CONTENT_TYPES = {
+    "application/json",
+    "application/geo+json",
+    "application/x-ndjson",
+    "application/xml",
+    "text/xml",
+    "application/yaml",
+    "text/yaml",
+    "text/csv",
+    "application/vnd.apache.arrow.file",
+    "application/vnd.mapbox-vector-tile",
+}
+
+
+class _GzipCompressor:
+    def __init__(self):
+        # wbits 31: deflate with gzip header and trailer.
+        self._compressor = zlib.compressobj(CONFIG.common_config.compression.gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=CONFIG.common_config.compression.brotli_quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=CONFIG.common_config.compression.zstd_level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+# Available encodings in order of preference of the server.
+_COMPRESSORS: Dict[str, Callable] = {
+    **({"zstd": _ZstdCompressor} if zstandard is not None else {}),
+    **({"br": _BrotliCompressor} if brotli is not None else {}),
+    "gzip": _GzipCompressor,
+}
+
+
+def _get_accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Encodings of an Accept-Encoding header and their quality values."""
+    encodings = {}
+    for item in accept_encoding.split(","):
+        name, *params = item.split(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        encodings[name] = quality
+    return encodings
+
+
+def select_encoding(request: HttpRequest, encodings: Optional[Iterable[str]] = None) -> Optional[str]:
+    """Best encoding accepted by the client among encodings, by default all available encodings, or None if the
+    response must not be compressed. Ties are resolved by the preference of the server."""
+    accepted = _get_accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    best, best_quality = None, 0.0
+    for encoding in encodings or _COMPRESSORS:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    """Content type is data that is not already compressed, e.g. not xlsx, parquet nor an HTML page."""
+    return content_type.partition(";")[0].strip().lower() in _COMPRESSIBLE_CONTENT_TYPES
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    compressor = _COMPRESSORS[encoding]()
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """Compress chunks of a stream. Each compressed chunk can be decompressed as soon as it is received."""
+    compressor = _COMPRESSORS[encoding]()
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def set_content_encoding(response: HttpResponse, encoding: str) -> None:
+    """Add headers of a response whose content is compressed with encoding."""
+    response["Content-Encoding"] = encoding
+    # Compressed and uncompressed representations are not byte to byte equal.
+    etag = response.get("ETag")
+    if etag and etag.startswith('"'):
+        response["ETag"] = "W/" + etag
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress responses with the encoding negotiated with Accept-Encoding. Unlike GZipMiddleware of Django, it
+    supports brotli and zstd and streaming responses are compressed incrementally."""
+
+    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        config = CONFIG.common_config.compression
+        if not config.enabled or response.has_header("Content-Encoding"):
+            return response
+        if not is_compressible(response.get("Content-Type", "")):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = select_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                return response
+            response.streaming_content = compress_stream(response.streaming_content, encoding)
+            del response["Content-Length"]
+        else:
+            if not response.content or len(response.content) < config.min_size:
+                return response
+            content = compress(response.content, encoding)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response["Content-Length"] = str(len(content))
+        set_content_encoding(response, encoding)
+        return response
@@ -1,31 +1,39 @@
 """Module that deal with external resources."""
 
+import atexit
+import base64
+import binascii
 import csv
 import decimal
+import hashlib
 import json
 import logging
-import math
-import re
+import os
 import socket
+import tempfile
+import threading
 import urllib.request
 import uuid
+import weakref
 from collections import OrderedDict
+from contextlib import contextmanager, suppress
 from dataclasses import dataclass
-from datetime import date, datetime, time, timedelta
+from datetime import date, datetime, time
 from enum import Enum
 from http import HTTPStatus
 from io import StringIO
 from sqlite3 import Date
-from typing import Optional, Dict, List, Any, Iterable, Union, Tuple
+from time import monotonic
+from typing import Optional, Dict, List, Any, Iterable, Iterator, Union, Tuple
 from urllib.error import HTTPError, URLError
 from urllib.parse import urlparse
 
 import sqlalchemy.exc
-from django.utils.duration import duration_iso_string
-from django.utils.functional import Promise
+from geoalchemy2 import Geography, Geometry
 from geoalchemy2 import functions as GeoFunc
 from rest_framework.exceptions import ValidationError
 
+from caches import SharedEpoch, TTLCache
 from exceptions import ServiceUnavailable, ErrorCodes
 from sqlalchemy import (
     create_engine,
@@ -40,15 +48,26 @@ from sqlalchemy import (
     REAL,
     text,
     quoted_name,
+    func,
+    literal,
+    literal_column,
+    and_,
+    or_,
+    cast,
+    case,
+    false,
 )
 import warnings
 from sqlalchemy.engine import Engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session, Query
 from sqlalchemy.types import Numeric
 
 from gaodcore.operators import is_datetime
-from gaodcore.operators import process_filters_args
-from gaodcore_manager.models import ResourceSizeConfig, ResourceConfig
+from gaodcore.operators import process_filters_args, process_like_args
+from gaodcore_manager.models import ConnectorConfig
+from gaodcore_project.settings import CONFIG
+from normalizers import get_feature_normalizer, get_row_normalizer, normalize_value
+from timing import timed
 
 logger = logging.getLogger(__name__)
 
@@ -123,6 +142,18 @@ class MimeTypeError(Exception):
     """Type of document is not csv or excel."""
 
 
+class CursorError(Exception):
+    """Cursor of a keyset pagination is not valid or cannot be used with the resource."""
+
+
+class AggregateError(Exception):
+    """Aggregation of a resource is not valid."""
+
+
+class GeometryError(Exception):
+    """Geometry parameters are not valid for the resource, e.g. a bounding box of a resource without geometry."""
+
+
 @dataclass
 class OrderBy:
     """Defines field and is ascending sort. This is used to generate SQL queries."""
@@ -131,6 +162,59 @@ class OrderBy:
     ascending: bool
 
 
+@dataclass
+class Aggregate:
+    """Defines aggregate function and field. Field is None to count rows. This is used to generate SQL queries."""
+
+    function: str
+    field: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        """Name of the aggregate in the result, e.g. count or sum_population."""
+        return self.function if self.field is None else f"{self.function}_{self.field}"
+
+
+@dataclass
+class ResourceQueryPlan:
+    """Everything needed to query a resource: engine, reflected model and SQL clauses. It is built once per request,
+    so all stages of a download reuse the same reflection, filters and sorting."""
+
+    uri: str
+    scheme: str
+    engine: Engine
+    model: Table
+    columns: List[Column]
+    geometry_column: Optional[Column]
+    filters: Dict[str, Any]
+    filter_clauses: list
+    sort_clauses: list
+    limit: Optional[int] = None
+    offset: int = 0
+    # Columns and ascending flags of the keyset pagination. Empty if the plan is paginated with offset.
+    keyset: Tuple[Tuple[Column, bool], ...] = ()
+    # Clause that selects rows after the cursor. It is not a filter: counts of the result do not apply it.
+    keyset_clause: Any = None
+    # Cursor of the page after this one. It is set when the rows of a keyset paginated plan are queried.
+    next_cursor: Optional[str] = None
+    # Maximum number of decimal digits of GeoJSON coordinates. None is the default of ST_AsGeoJSON.
+    geometry_precision: Optional[int] = None
+    # Tolerance of ST_SimplifyPreserveTopology applied to GeoJSON geometries. None does not simplify.
+    geometry_simplify: Optional[float] = None
+
+    @property
+    def row_clauses(self) -> list:
+        """Filters and keyset clause of the rows of the page."""
+        if self.keyset_clause is None:
+            return self.filter_clauses
+        return [*self.filter_clauses, self.keyset_clause]
+
+    @property
+    def is_geojson(self) -> bool:
+        """Resource has a geometry or geography column."""
+        return self.geometry_column is not None
+
+
 def _create_table_from_information_schema(
     engine: Engine,
     object_location: str,
@@ -635,6 +719,74 @@ def _get_model(
             raise DriverConnectionError("Connection not available.") from err
 
 
+_MODEL_CACHE = TTLCache(
+    max_size=CONFIG.common_config.model_cache.max_size,
+    ttl=CONFIG.common_config.model_cache.ttl_seconds,
+    shared_key="gaodcore:model_cache_epoch",
+)
+
+
+def _get_cached_model(
+    *, uri: str, engine: Engine, object_location: str, object_location_schema: str
+) -> Table:
+    """
+    Get SQLAlchemy model from the reflected metadata cache. If it is not cached, it is reflected with _get_model.
+
+    Tables of APIs are not kept in this cache. Their data is kept by the API cache in a SQLite file per URL, which is
+    revalidated with the server and replaced, with the columns of the new data, when it changes or when the connector is
+    saved. Their table is reflected from the current file, which is local and cheap, so it always matches that file.
+
+    @param uri: URI of the connector. Used as part of the cache key.
+    @param engine: SQLAlchemy Engine instance to connect to the database.
+    @param object_location: The name of the table or object location.
+    @param object_location_schema: The schema of the object location.
+
+    @return: SQLAlchemy Table object representing the specified table.
+    """
+    if urlparse(uri).scheme in _HTTP_SCHEMAS:
+        with timed("reflection"):
+            return _get_model(
+                engine=engine,
+                object_location=object_location,
+                object_location_schema=object_location_schema,
+            )
+
+    key = (_normalize_uri(uri), object_location_schema, object_location)
+    model = _MODEL_CACHE.get(key)
+    if model is None:
+        with timed("reflection"):
+            model = _get_model(
+                engine=engine,
+                object_location=object_location,
+                object_location_schema=object_location_schema,
+            )
+        _MODEL_CACHE.set(key, model)
+    return model
+
+
+def purge_model_cache(
+    uri: Optional[str] = None,
+    object_location: Optional[str] = None,
+    object_location_schema: Optional[str] = None,
+) -> int:
+    """Remove reflected models from the cache. Without arguments all models are removed. Other workers drop all their
+    models the next time that they check the cache epoch. Return number of removed models of this worker."""
+    if uri is None:
+        return _MODEL_CACHE.invalidate()
+
+    normalized_uri = _normalize_uri(uri)
+    return _MODEL_CACHE.invalidate(
+        lambda key: key[0] == normalized_uri
+        and (object_location is None or key[2] == object_location)
+        and (object_location_schema is None or key[1] == object_location_schema)
+    )
+
+
+def get_model_cache_stats() -> Dict[str, int]:
+    """Hits, misses, entries and bytes of the reflected model cache of this worker."""
+    return _MODEL_CACHE.stats()
+
+
 def get_resource_columns(
     uri: str, object_location: Optional[str], object_location_schema: Optional[str]
 ) -> Iterable[Dict[str, str]]:
@@ -644,14 +796,12 @@ def get_resource_columns(
     @return: list of dictionaries with column name and data type
     """
     engine = _get_engine(uri)
-    try:
-        model = _get_model(
-            engine=engine,
-            object_location=object_location,
-            object_location_schema=object_location_schema,
-        )
-    finally:
-        engine.dispose()
+    model = _get_cached_model(
+        uri=uri,
+        engine=engine,
+        object_location=object_location,
+        object_location_schema=object_location_schema,
+    )
 
     # Convert Oracle column names to lowercase for consistency
     from urllib.parse import urlparse
@@ -711,7 +861,8 @@ def validate_resource_mssql(
     engine = _get_engine(uri)
     session_maker = sessionmaker(bind=engine)
 
-    model = _get_model(
+    model = _get_cached_model(
+        uri=uri,
         engine=engine,
         object_location=object_location,
         object_location_schema=object_location_schema,
@@ -729,7 +880,6 @@ def validate_resource_mssql(
     )
 
     session.close()
-    engine.dispose()
 
     return (dict(zip([column.key for column in columns], row)) for row in data)
 
@@ -747,18 +897,18 @@ def validator_max_excel_allowed(
 ):
     """Validate if resource  have less rows than allowed."""
 
-    data = get_session_data(
-        uri,
-        object_location,
-        object_location_schema,
-        filters,
-        like,
-        fields,
-        sort,
-        limit,
-        offset,
+    plan = get_resource_query_plan(
+        uri=uri,
+        object_location=object_location,
+        object_location_schema=object_location_schema,
+        filters=filters,
+        like=like,
+        fields=fields,
+        sort=sort,
+        limit=limit,
+        offset=offset,
     )
-    return len(data) <= _RESOURCE_MAX_ROWS_EXCEL
+    return count_plan_rows(plan, max_rows=_RESOURCE_MAX_ROWS_EXCEL) <= _RESOURCE_MAX_ROWS_EXCEL
 
 
 def _validate_max_rows_allowed(
@@ -771,7 +921,8 @@ def _validate_max_rows_allowed(
     engine = _get_engine(uri, timeout=timeout)
     session_maker = sessionmaker(bind=engine)
 
-    model = _get_model(
+    model = _get_cached_model(
+        uri=uri,
         engine=engine,
         object_location=object_location,
         object_location_schema=object_location_schema,
@@ -785,22 +936,13 @@ def _validate_max_rows_allowed(
     except sqlalchemy.exc.ProgrammingError as err:
         logging.exception("Object not available.")
         raise NoObjectError("Object not available.") from err
+    finally:
+        session.close()
 
-    session.close()
-    engine.dispose()
 
-
-# Add feature to sanitize text include control characters
-def sanitize_control_charcters(text):
-    if re.search(r"[\x00-\x08\x0B\x0C\x0E-\x1F\x7F\n]", str(text)):
-        text = re.sub(r"[\x00-\x08\x0B\x0C\x0E-\x1F\x7F\n]", "", text)
-    try:
-        text = text.decode("utf-8")
-    except Exception:
-        pass
-    if isinstance(text, str):
-        text = text.strip()
-    return text
+def _is_geometry_column(column: Column) -> bool:
+    column_type = str(column.type)
+    return column_type.startswith("geometry") or column_type.startswith("geography")
 
 
 def get_GeoJson_resource(
@@ -812,159 +954,699 @@ def get_GeoJson_resource(
     @return: True or False GeoJosn Resource
     """
     engine = _get_engine(uri)
-    model = _get_model(
+    model = _get_cached_model(
+        uri=uri,
         engine=engine,
         object_location=object_location,
         object_location_schema=object_location_schema,
     )
-    geoJson = False
-
-    for column in model.columns:
-        if str(column.type).startswith("geometry") or str(column.type).startswith(
-            "geography"
-        ):
-            geoJson = True
+    return any(_is_geometry_column(column) for column in model.columns)
 
-    engine.dispose()
-    return geoJson
 
-
-def get_resource_data_feature(
+def get_resource_query_plan(
+    *,
     uri: str,
     object_location: Optional[str],
     object_location_schema: Optional[str],
-    filters: Dict[str, str],
+    filters: Dict[str, Union[str, dict]],
     like: str,
     fields: List[str],
     sort: List[OrderBy],
     limit: Optional[int] = None,
     offset: int = 0,
-):
-    """data like GeoJSON .Encoding data a variety of geographic data structures."""
-    """Data like Feature_Collection_"""
-
-    """Not posible to implement GeoFunc.ST_AsGeoJSON(rows) with model, postgis version  is < 3.0 """
+    timeout: Optional[int] = None,
+    cursor: Optional[str] = None,
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    bbox_srid: int = 4326,
+    precision: Optional[int] = None,
+    simplify: Optional[float] = None,
+) -> ResourceQueryPlan:
+    """
+    Build the query plan of a resource. The resource is reflected and fields, filters, like filters and sorting are
+    resolved against the reflected columns.
 
-    engine = _get_engine(uri)
-    session_maker = sessionmaker(bind=engine)
+    @param uri: The URI of the resource.
+    @param object_location: The name of the table or object location.
+    @param object_location_schema: The schema of the object location.
+    @param filters: A dictionary of filters to apply to the query. Each key is a field name, and the value can be
+                   a string or a dictionary specifying an operator and value.
+    @param like: LIKE-based filters: a dictionary or its JSON. See process_like_args.
+    @param fields: A list of field names to include in the result.
+    @param sort: A list of OrderBy objects to sort the result.
+    @param limit: An optional limit on the number of rows to return.
+    @param offset: The number of rows to skip before starting to return rows.
+    @param cursor: If provided, rows are paginated by keyset instead of offset: sorted by the sort fields followed by
+                   the primary key and, if it is not empty, after the row encoded in cursor. See _get_keyset_page.
+    @param bbox: If provided, only rows whose geometry intersects the box (minx, miny, maxx, maxy) are returned.
+    @param bbox_srid: SRID of the coordinates of bbox.
+    @param precision: Maximum number of decimal digits of the coordinates of GeoJSON geometries.
+    @param simplify: Tolerance, in units of the geometry column, to simplify GeoJSON geometries.
+
+    @return: Query plan that can be consumed by get_plan_session_data, get_plan_resource_data and
+             get_plan_resource_data_feature.
+
+    @raises FieldNoExistsError: If a field does not exist.
+    @raises ValidationError: If a sort field, a filter or a like filter is not valid.
+    @raises CursorError: If cursor is not valid or the resource cannot be paginated by keyset.
+    @raises GeometryError: If bbox, precision or simplify are provided and the resource does not have geometry.
+    """
+    engine = _get_engine(uri, timeout=timeout)
+    parsed = urlparse(uri)
 
-    model = _get_model(
+    model = _get_cached_model(
+        uri=uri,
         engine=engine,
         object_location=object_location,
         object_location_schema=object_location_schema,
     )
+
     column_dict = {column.key: column for column in model.columns}
-    # columns = _get_columns(column_dict, fields)
-    filters_args = _process_like_filter(like, model)
-    session = session_maker()
+    columns = list(_get_columns(column_dict, fields))
+    geometry_column = None
+    for column in model.columns:
+        if _is_geometry_column(column):
+            geometry_column = column
 
-    parsed = urlparse(uri)
+    filters_args = []
+    like_filters = _process_like_filter(like, column_dict)
+    filters, filters_args = _get_filter_operators(dict(filters), filters_args)
+    if "oracle" in parsed.scheme:
+        filters = _process_filters_oracle_dates(filters)
+    filters_args = process_filters_args(filters_args, parsed.scheme, column_dict)
+    filters_args.extend(like_filters)
+    if bbox is not None or precision is not None or simplify is not None:
+        if geometry_column is None:
+            raise GeometryError("Resource does not have a geometry field.")
+        if bbox is not None:
+            filters_args.append(_get_bbox_clause(geometry_column, bbox, bbox_srid))
 
-    # Get Column Geom - other fields in Properties
+    # sqlalchemy.exc.CompileError: MSSQL requires an order_by when using an OFFSET or a non-simple LIMIT clause
+    # (pyodbc.ProgrammingError) ('42000', '[42000] [FreeTDS][SQL Server]The text, ntext, and image data types
+    # cannot be compared or sorted, except when using IS NULL or LIKE operator. (306) (SQLExecDirectW)')
+    # mssql no order no limit no offset
+    if parsed.scheme in ["mssql+pyodbc"]:
+        sort_clauses = []
+    else:
+        try:
+            sort_clauses = _get_sort_methods(column_dict, sort)
+        except SortFieldNoExistsError as err:
+            logger.warning("Sort Field No Exists Error. - %s ", err)
+            raise ValidationError(err.message) from err
+
+    keyset = ()
+    keyset_clause = None
+    if cursor is not None:
+        keyset = _get_keyset(model, column_dict, sort, parsed.scheme)
+        sort_clauses = _get_keyset_sort_clauses(keyset)
+        if cursor:
+            keyset_clause = _get_keyset_clause(keyset, _decode_cursor(cursor))
+        offset = 0
+
+    return ResourceQueryPlan(
+        uri=uri,
+        scheme=parsed.scheme,
+        engine=engine,
+        model=model,
+        columns=columns,
+        geometry_column=geometry_column,
+        filters=filters,
+        filter_clauses=filters_args,
+        sort_clauses=sort_clauses,
+        limit=limit,
+        offset=offset,
+        keyset=keyset,
+        keyset_clause=keyset_clause,
+        geometry_precision=precision,
+        geometry_simplify=simplify,
+    )
 
-    propertiesCol = []
-    propertiesField = []
 
-    for i, col in enumerate(model.columns):
-        if str(col.type).startswith("geography") or str(col.type).startswith(
-            "geometry"
-        ):
-            Geom = model.c[col.name].label(col.name)
-        else:
-            propertiesField.append(col.name)
-            propertiesCol.append(model.c[col.name].label(col.name))
-
-    # Get A JSon Properties ( not possible json_build_object PostgreSQL 9.2.24 on x86_64-unknown-linux-gnu,
-    # compiled by gcc (GCC) 4.8.5 20150623 (Red Hat 4.8.5-16), 64-bit
-    # version of Postgress not allowed _ Postgres and A GeoJson  only _
-    # https://www.postgresql.org/docs/9.2/functions-json.html"
-    # https://www.postgresql.org/docs/current/functions-json.html -> to convert columns to a json in a query
+def _is_geography_column(column: Column) -> bool:
+    return str(column.type).startswith("geography")
+
+
+def _get_bbox_clause(geometry_column: Column, bbox: Tuple[float, float, float, float], srid: int):
+    """Clause that selects rows whose geometry intersects bbox. ST_Intersects uses the spatial index of the column
+    (it includes a && comparison of bounding boxes), so the envelope is transformed to the SRID of the column instead of
+    transforming the geometry of each row."""
+    envelope = GeoFunc.ST_MakeEnvelope(*bbox, srid)
+    if _is_geography_column(geometry_column):
+        if srid != 4326:
+            envelope = GeoFunc.ST_Transform(envelope, 4326)
+        envelope = cast(envelope, Geography(geometry_type=None))
+    else:
+        column_srid = getattr(geometry_column.type, "srid", -1)
+        # SRID is unknown (-1) or 0 if the column is not constrained; coordinates are expected in its SRID.
+        if column_srid > 0 and column_srid != srid:
+            envelope = GeoFunc.ST_Transform(envelope, column_srid)
+    return GeoFunc.ST_Intersects(geometry_column, envelope)
+
+
+def _get_geojson_geometry(plan: ResourceQueryPlan):
+    """ST_AsGeoJSON of the geometry column of plan, simplified and with the precision of the plan."""
+    geometry = plan.geometry_column.label(plan.geometry_column.name)
+    if plan.geometry_simplify is not None:
+        if _is_geography_column(plan.geometry_column):
+            geometry = cast(plan.geometry_column, Geometry(geometry_type=None))
+        geometry = GeoFunc.ST_SimplifyPreserveTopology(geometry, plan.geometry_simplify)
+    if plan.geometry_precision is None:
+        return GeoFunc.ST_AsGeoJSON(geometry)
+    return GeoFunc.ST_AsGeoJSON(geometry, plan.geometry_precision)
+
+
+def _get_keyset(
+    model: Table, column_dict: Dict[str, Column], sort: List[OrderBy], scheme: str
+) -> Tuple[Tuple[Column, bool], ...]:
+    """Columns of a keyset pagination: sort fields followed by the primary key columns that are not sorted."""
+    if scheme in ["mssql+pyodbc"]:
+        raise CursorError("Cursor pagination is not available for this resource.")
+    keyset = [(column_dict[item.field], item.ascending) for item in sort]
+    sorted_keys = {column.key for column, _ in keyset}
+    keyset.extend((column, True) for column in model.primary_key.columns if column.key not in sorted_keys)
+    if not keyset:
+        raise CursorError("Cursor pagination requires sort fields in resources without primary key.")
+    return tuple(keyset)
+
+
+def _get_keyset_sort_clauses(keyset: Tuple[Tuple[Column, bool], ...]) -> list:
+    """ORDER BY of a keyset. Databases do not agree on the position of nulls and NULLS LAST is not available in all of
+    them, so nulls of nullable columns are sorted last in both directions by a flag sorted before the column."""
+    clauses = []
+    for column, ascending in keyset:
+        if column.nullable:
+            clauses.append(case((column.is_(None), 1), else_=0))
+        clauses.append(column if ascending else column.desc())
+    return clauses
+
+
+def _get_keyset_clause(keyset: Tuple[Tuple[Column, bool], ...], values: list):
+    """WHERE clause of the rows after values in the order of keyset. Row value comparisons are not available in all
+    databases and do not allow mixing directions, so it is expanded as (k1 > v1) OR (k1 = v1 AND k2 > v2) ...
+
+    Nulls are sorted last (see _get_keyset_sort_clauses): nulls are after any value and nothing is after a null."""
+    if len(values) != len(keyset):
+        raise CursorError("Cursor does not match sort fields.")
+    clauses = []
+    previous = []
+    for (column, ascending), value in zip(keyset, values):
+        if value is None:
+            previous.append(column.is_(None))
+            continue
+        after = column > value if ascending else column < value
+        if column.nullable:
+            after = or_(after, column.is_(None))
+        clauses.append(and_(*previous, after))
+        previous.append(column == value)
+    if not clauses:
+        return false()
+    return or_(*clauses)
+
+
+_CURSOR_TYPES = {
+    "int": int,
+    "float": float,
+    "Decimal": decimal.Decimal,
+    "str": str,
+    "date": date.fromisoformat,
+    "datetime": datetime.fromisoformat,
+    "time": time.fromisoformat,
+    "UUID": uuid.UUID,
+}
+
+
+def _encode_cursor(values: Iterable[Any]) -> str:
+    """Opaque cursor of the values of a row: type names and values as text, in URL safe base64."""
+    items = []
+    for value in values:
+        if value is None:
+            items.append(None)
+            continue
+        type_name = type(value).__name__
+        if type_name not in _CURSOR_TYPES:
+            raise CursorError(f"Cursor pagination is not available for sort fields of type {type_name}.")
+        items.append([type_name, value.isoformat() if isinstance(value, (date, time)) else str(value)])
+    return base64.urlsafe_b64encode(json.dumps(items, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> list:
     try:
-        if parsed.scheme in ["mssql+pyodbc"]:
-            data = (
-                session.query(
-                    *propertiesCol, (GeoFunc.ST_AsGeoJSON(Geom)).label("geometry")
-                )
-                .filter_by(**filters)
-                .filter(*filters_args)
-                .all()
-            )
-        else:
-            data = (
-                session.query(
-                    *propertiesCol, (GeoFunc.ST_AsGeoJSON(Geom)).label("geometry")
-                )
-                .filter_by(**filters)
-                .filter(*filters_args)
-                .order_by(*_get_sort_methods(column_dict, sort))
-                .offset(offset)
-                .limit(limit)
-                .all()
-            )
+        items = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return [None if item is None else _CURSOR_TYPES[item[0]](item[1]) for item in items]
+    except (
+        binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError, IndexError, decimal.InvalidOperation
+    ) as err:
+        raise CursorError("Cursor is not valid.") from err
+
+
+def _get_plan_query(plan: ResourceQueryPlan, session: Session, entities: list) -> Query:
+    """Create the SQLAlchemy query of a plan that selects entities."""
+    query = (
+        session.query(plan.model)
+        .filter_by(**plan.filters)
+        .filter(*plan.row_clauses)
+        .order_by(*plan.sort_clauses)
+        .with_entities(*entities)
+    )
+    if plan.scheme in ["mssql+pyodbc"]:
+        return query
+    return query.offset(plan.offset).limit(plan.limit)
+
+
+def _get_keyset_page(plan: ResourceQueryPlan, session: Session, entities: list) -> List[tuple]:
+    """
+    Read the rows of a page of a keyset paginated plan and set plan.next_cursor. The row after the page and the keyset
+    columns are read in the same query, so the cursor is known before the first row is written without another query.
+    Pages are bounded by the limit of the plan, so they are read at once.
+
+    @param plan: Query plan built with a cursor and a limit.
+    @param session: Session of the query.
+    @param entities: Selected expressions.
+
+    @return: Rows of the page with the selected expressions.
+    """
+    keyset = [column.label(f"keyset_{index}") for index, (column, _) in enumerate(plan.keyset)]
+    rows = _get_plan_query(plan, session, [*entities, *keyset]).limit(plan.limit + 1).all()
+    plan.next_cursor = None
+    if len(rows) > plan.limit:
+        plan.next_cursor = _encode_cursor(rows[plan.limit - 1][len(entities):])
+    return [tuple(row[:len(entities)]) for row in rows[:plan.limit]]
+
+
+def count_plan_rows(plan: ResourceQueryPlan, max_rows: Optional[int] = None) -> int:
+    """
+    Count rows returned by a query plan with a SELECT COUNT(*) pushed down to the database. Rows are not fetched.
+
+    @param plan: Query plan of the resource.
+    @param max_rows: If provided, database stops counting after max_rows + 1 rows, so callers can know if the
+                     result has more than max_rows rows without scanning the whole resource.
+
+    @return: Number of rows. If max_rows is provided it is at most max_rows + 1.
+    """
+    session = sessionmaker(bind=plan.engine)()
+    limit = plan.limit
+    if max_rows is not None:
+        limit = max_rows + 1 if limit is None else min(limit, max_rows + 1)
+
+    query = (
+        session.query(literal(1).label("row"))
+        .select_from(plan.model)
+        .filter_by(**plan.filters)
+        .filter(*plan.row_clauses)
+    )
+    if plan.scheme in ["mssql+pyodbc"]:
+        # MSSQL does not allow OFFSET without ORDER BY, so only a TOP is applied, like in the data query.
+        query = query.limit(limit)
+    else:
+        query = query.offset(plan.offset).limit(limit)
+
+    try:
+        return session.query(func.count()).select_from(query.subquery()).scalar()
     except sqlalchemy.exc.ProgrammingError as err:
         raise NoObjectError("Object not available.") from err
-    columnsProperties = _get_columns(column_dict, propertiesField)
-
-    # Serializar Feature Collection
-    featuresTot = []
-    for item in data:
-        item = list(item)
-        geometry = item.pop()
-        for i, column in enumerate(item):
-            if isinstance(column, (decimal.Decimal, uuid.UUID, Promise)):
-                parte_decimal, parte_entera = math.modf(column)
-                if (parte_decimal) == 0.0:
-                    item[i] = int(column)
-                else:
-                    item[i] = str(column)
-            elif isinstance(column, float):
-                parte_decimal, parte_entera = math.modf(column)
-                if (parte_decimal) == 0.0:
-                    item[i] = int(column)
-                else:
-                    item[i] = str(column)
-            elif isinstance(column, Numeric):
-                parte_decimal, parte_entera = math.modf(column)
-                if (parte_decimal) == 0.0:
-                    item[i] = int(column)
-                else:
-                    item[i] = str(column)
-            elif isinstance(column, datetime):
-                r = column.isoformat()
-                if column.microsecond:
-                    r = r[:23] + r[26:]
-                if r.endswith("+00:00"):
-                    r = r[:-6] + "Z"
-                item[i] = r
-            elif isinstance(column, date):
-                item[i] = column.isoformat()
-            elif isinstance(column, time):
-                r = column.isoformat()
-                if column.microsecond:
-                    r = r[:12]
-                item[i] = r
-            elif isinstance(column, timedelta):
-                item[i] = duration_iso_string(column)
+    except sqlalchemy.exc.SQLAlchemyError as err:
+        logger.warning("Problem in resource count query: %s", err)
+        raise ServiceUnavailable(
+            "Query error", code=ErrorCodes.QUERY_ERROR
+        ) from err
+    finally:
+        session.close()
+
+
+def count_plan_total_rows(plan: ResourceQueryPlan, estimate: bool = False) -> Tuple[int, bool]:
+    """
+    Count rows of the result of a query plan regardless of limit, offset and cursor.
+
+    @param plan: Query plan of the resource.
+    @param estimate: If the plan does not have filters, the number of rows of the table is read from the statistics of
+                     the database, when they are available, instead of counting them.
+
+    @return: Number of rows and True if it is an estimation.
+    """
+    if estimate and not plan.filters and not plan.filter_clauses:
+        rows = _estimate_table_rows(plan)
+        if rows is not None:
+            return rows, True
+
+    session = sessionmaker(bind=plan.engine)()
+    query = (
+        session.query(func.count())
+        .select_from(plan.model)
+        .filter_by(**plan.filters)
+        .filter(*plan.filter_clauses)
+    )
+    try:
+        with _plan_query_errors(plan):
+            return query.scalar(), False
+    finally:
+        session.close()
 
-            else:
-                item[i] = sanitize_control_charcters(column)
 
-        properties = dict(zip([column.name for column in columnsProperties], item))
+_AGGREGATE_FUNCTIONS = {"count": func.count, "sum": func.sum, "avg": func.avg, "min": func.min, "max": func.max}
+# Aggregate functions that only accept numeric columns.
+_NUMERIC_AGGREGATES = {"sum", "avg"}
 
-        # create feature
-        featureType = {
-            "type": "Feature",
-            "geometry": json.loads(geometry),
-            "properties": properties,
+
+def get_plan_aggregate_data(
+    plan: ResourceQueryPlan, group_by: List[str], aggregates: List[Aggregate], sort: List[OrderBy]
+) -> List[Dict[str, Any]]:
+    """
+    Group rows of a query plan and aggregate them with a GROUP BY executed in the database. Filters of the plan select
+    the rows; its limit and offset are applied to the groups.
+
+    @param plan: Query plan of the resource.
+    @param group_by: Fields that define the groups. If it is empty the result has a single group.
+    @param aggregates: Aggregate functions computed in each group.
+    @param sort: Sorting of groups by group fields or aggregate labels.
+
+    @return: A dictionary with group fields and aggregate labels for each group.
+
+    @raises FieldNoExistsError: If a group or aggregate field does not exist.
+    @raises SortFieldNoExistsError: If a sort field is not a group field nor an aggregate label.
+    @raises AggregateError: If aggregation is not valid.
+    """
+    if not group_by and not aggregates:
+        raise AggregateError("It is required to specify group_by or aggregates.")
+    column_dict = {column.key: column for column in plan.model.columns}
+    try:
+        group_columns = [column_dict[field] for field in group_by]
+        aggregate_columns = [_get_aggregate_column(aggregate, column_dict) for aggregate in aggregates]
+    except KeyError as err:
+        raise FieldNoExistsError(f"Field: {err.args[0]} not exists.") from err
+    entities = [column.label(column.key) for column in group_columns] + aggregate_columns
+    labels = {entity.name: entity for entity in entities}
+    if len(labels) != len(entities):
+        raise AggregateError("Group fields and aggregates must have different names.")
+
+    sort_clauses = []
+    if plan.scheme not in ["mssql+pyodbc"]:
+        for item in sort:
+            if item.field not in labels:
+                raise SortFieldNoExistsError(message=f"Sort field: {item.field} is not a group field nor an aggregate.")
+            sort_clauses.append(labels[item.field] if item.ascending else labels[item.field].desc())
+
+    session = sessionmaker(bind=plan.engine)()
+    query = (
+        session.query(*entities)
+        .select_from(plan.model)
+        .filter_by(**plan.filters)
+        .filter(*plan.row_clauses)
+        .group_by(*group_columns)
+        .order_by(*sort_clauses)
+    )
+    if plan.scheme in ["mssql+pyodbc"]:
+        query = query.limit(plan.limit)
+    else:
+        query = query.offset(plan.offset).limit(plan.limit)
+    try:
+        with _plan_query_errors(plan):
+            rows = query.all()
+    finally:
+        session.close()
+
+    normalize_group = get_row_normalizer(group_columns)
+    group_size = len(group_columns)
+    keys = list(labels)
+    return [
+        dict(zip(keys, (*normalize_group(row[:group_size]), *map(normalize_value, row[group_size:]))))
+        for row in rows
+    ]
+
+
+def _get_aggregate_column(aggregate: Aggregate, column_dict: Dict[str, Column]):
+    function = _AGGREGATE_FUNCTIONS.get(aggregate.function)
+    if function is None:
+        raise AggregateError(f"Aggregate function {aggregate.function} not implemented.")
+    if aggregate.field is None:
+        if aggregate.function != "count":
+            raise AggregateError(f"Aggregate function {aggregate.function} requires a field.")
+        return func.count().label(aggregate.label)
+    column = column_dict[aggregate.field]
+    if aggregate.function in _NUMERIC_AGGREGATES and not isinstance(column.type, (Numeric, Integer)):
+        raise AggregateError(f"Aggregate function {aggregate.function} requires a numeric field: {aggregate.field}.")
+    return function(column).label(aggregate.label)
+
+
+# Half of the side of the square of Web Mercator (EPSG:3857) projection, in meters.
+_WEB_MERCATOR_HALF_SIZE = 20037508.342789244
+
+
+def get_tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """Bounds of the tile z/x/y of the XYZ scheme in Web Mercator (EPSG:3857): minx, miny, maxx, maxy."""
+    size = 2 * _WEB_MERCATOR_HALF_SIZE / 2 ** z
+    minx = -_WEB_MERCATOR_HALF_SIZE + x * size
+    maxy = _WEB_MERCATOR_HALF_SIZE - y * size
+    return minx, maxy - size, minx + size, maxy
+
+
+def get_plan_resource_tile(
+    plan: ResourceQueryPlan, z: int, x: int, y: int, layer: str, extent: int = 4096, buffer: int = 256
+) -> bytes:
+    """
+    Render the features of a query plan in a tile as a Mapbox Vector Tile with ST_AsMVT. Geometries are selected with
+    the spatial index of the geometry column and clipped and quantized by ST_AsMVTGeom in the database, so only the
+    tile is transferred. Fields of the plan are the properties of the features; limit, offset and sort are not applied.
+
+    @param plan: Query plan of a PostGIS resource with a geometry column.
+    @param z: Zoom level of the tile.
+    @param x: Column of the tile.
+    @param y: Row of the tile, from the north.
+    @param layer: Name of the layer of the tile.
+    @param extent: Size of the tile in its own coordinates.
+    @param buffer: Size of the area around the tile, in tile coordinates, where geometries are not clipped.
+
+    @return: Tile encoded as protocol buffer. It is empty if the tile does not have features.
+
+    @raises GeometryError: If the resource does not have geometry or it is not a PostGIS resource.
+    """
+    if not plan.is_geojson:
+        raise GeometryError("Resource does not have a geometry field.")
+    if not plan.scheme.startswith("postgresql"):
+        raise GeometryError("Vector tiles are only available for PostGIS resources.")
+
+    session = sessionmaker(bind=plan.engine)()
+    query = _get_tile_query(plan, session, z, x, y, layer, extent, buffer)
+    try:
+        with _plan_query_errors(plan):
+            tile = query.scalar()
+    finally:
+        session.close()
+    return bytes(tile or b"")
+
+
+def _get_tile_query(
+    plan: ResourceQueryPlan, session: Session, z: int, x: int, y: int, layer: str, extent: int, buffer: int
+) -> Query:
+    bounds = get_tile_bounds(z, x, y)
+    margin = (bounds[2] - bounds[0]) * buffer / extent
+    # Buffer is clipped to the projected world, since envelopes outside it cannot be transformed.
+    buffered_bounds = tuple(
+        max(-_WEB_MERCATOR_HALF_SIZE, min(_WEB_MERCATOR_HALF_SIZE, value))
+        for value in (bounds[0] - margin, bounds[1] - margin, bounds[2] + margin, bounds[3] + margin)
+    )
+
+    geometry = plan.geometry_column
+    if _is_geography_column(geometry):
+        geometry = cast(geometry, Geometry(geometry_type=None))
+    if getattr(plan.geometry_column.type, "srid", -1) != 3857:
+        geometry = GeoFunc.ST_Transform(geometry, 3857)
+    geometry_name = plan.geometry_column.name
+    tile_geometry = GeoFunc.ST_AsMVTGeom(geometry, GeoFunc.ST_MakeEnvelope(*bounds, 3857), extent, buffer, True)
+    properties = [column.label(column.name) for column in plan.columns if not _is_geometry_column(column)]
+
+    features = (
+        session.query(*properties, tile_geometry.label(geometry_name))
+        .select_from(plan.model)
+        .filter_by(**plan.filters)
+        .filter(*plan.filter_clauses, _get_bbox_clause(plan.geometry_column, buffered_bounds, 3857))
+        .subquery("tile")
+    )
+    return session.query(
+        func.ST_AsMVT(literal_column(features.name), layer, extent, geometry_name)
+    ).select_from(features)
+
+
+def _estimate_table_rows(plan: ResourceQueryPlan) -> Optional[int]:
+    """Number of rows of the table of a plan according to the statistics of the database. None if they are not
+    available: other databases, views or tables that have not been analyzed."""
+    dialect = plan.engine.dialect
+    if dialect.name == "postgresql":
+        query = text(
+            "SELECT c.reltuples FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE c.relname = :name AND n.nspname = coalesce(:schema, current_schema()) AND c.relkind IN ('r', 'm')"
+        )
+        params = {"name": plan.model.name, "schema": plan.model.schema}
+    elif dialect.name == "oracle":
+        query = text(
+            "SELECT num_rows FROM all_tables "
+            "WHERE table_name = :name AND owner = coalesce(:schema, sys_context('USERENV', 'CURRENT_SCHEMA'))"
+        )
+        params = {
+            "name": dialect.denormalize_name(plan.model.name),
+            "schema": plan.model.schema and dialect.denormalize_name(plan.model.schema),
         }
-        featuresTot.append(featureType)
+    else:
+        return None
 
-    wrapped = {"type": "FeatureCollection", "features": featuresTot}
+    try:
+        with plan.engine.connect() as connection:
+            rows = connection.execute(query, params).scalar()
+    except sqlalchemy.exc.SQLAlchemyError as err:
+        logger.info("Statistics of %s are not available: %s", plan.model.name, err)
+        return None
+    # Tables that have not been analyzed have 0 or -1 rows; empty tables are counted quickly anyway.
+    if rows is None or rows <= 0:
+        return None
+    return int(rows)
+
+
+@contextmanager
+def _plan_query_errors(plan: ResourceQueryPlan):
+    """Translate SQLAlchemy errors raised while querying a plan into public errors."""
+    try:
+        yield
+    except CursorError:
+        raise
+    except sqlalchemy.exc.ProgrammingError as err:
+        if plan.scheme in ["mssql+pyodbc"]:
+            raise NoObjectError("Object not available.") from err
+        logger.warning("Object not available. - %s ", err)
+        raise ServiceUnavailable(
+            "Object not available.", code=ErrorCodes.OBJECT_UNAVAILABLE
+        ) from err
+    except sqlalchemy.exc.InvalidRequestError as err:
+        logger.warning("Invalid Request Error. - %s ", err)
+        raise ServiceUnavailable(
+            "Invalid Request Error.", code=ErrorCodes.QUERY_ERROR
+        ) from err
+    except Exception as err:
+        logger.warning("Problem in resource query: %s", err)
+        raise ServiceUnavailable(
+            "Query error", code=ErrorCodes.QUERY_ERROR
+        ) from err
+
+
+def get_plan_session_data(plan: ResourceQueryPlan):
+    """
+    Retrieve data of a query plan.
 
-    session.close()
-    engine.dispose()
+    @param plan: Query plan of the resource.
+
+    @return: An iterable of tuples containing the data of the resource.
+    """
+    session = sessionmaker(bind=plan.engine)()
+    entities = [plan.model.c[col.key].label(col.key) for col in plan.columns]
+    try:
+        with _plan_query_errors(plan), timed("query"):
+            if plan.keyset and plan.limit:
+                return _get_keyset_page(plan, session, entities)
+            return _get_plan_query(plan, session, entities).all()
+    finally:
+        session.close()
+
+
+def iter_plan_session_data(
+    plan: ResourceQueryPlan, batch_size: int, entities: Optional[list] = None
+) -> Iterator[tuple]:
+    """
+    Retrieve data of a query plan with a server side cursor. Rows are fetched from database in batches of batch_size
+    rows while the iterator is consumed, so memory does not depend on the size of the result.
+
+    The query is executed before returning, so query errors are raised by this function and not while iterating.
+    The session is closed when the iterator is exhausted or closed. Pages of keyset paginated plans are read at once,
+    see _get_keyset_page.
+
+    @param plan: Query plan of the resource.
+    @param batch_size: Number of rows fetched in each round trip.
+    @param entities: Selected expressions. Default: columns of the plan.
+
+    @return: An iterator of tuples containing the data of the resource.
+    """
+    session = sessionmaker(bind=plan.engine)()
+    if entities is None:
+        entities = [plan.model.c[col.key].label(col.key) for col in plan.columns]
+    try:
+        with _plan_query_errors(plan), timed("query"):
+            if plan.keyset and plan.limit:
+                rows = iter(_get_keyset_page(plan, session, entities))
+            else:
+                rows = iter(_get_plan_query(plan, session, entities).yield_per(batch_size))
+    except Exception:
+        session.close()
+        raise
+    return _iter_and_close(rows, session)
+
+
+def _iter_and_close(rows: Iterator[tuple], session: Session) -> Iterator[tuple]:
+    try:
+        yield from rows
+    finally:
+        session.close()
+
+
+def stream_plan_resource_data_feature(
+    plan: ResourceQueryPlan, batch_size: int
+) -> Iterator[Tuple[Dict[str, Any], Optional[str]]]:
+    """
+    Retrieve features of a query plan with a server side cursor, like stream_plan_resource_data. Each feature is a
+    dictionary with the normalized properties and the geometry as GeoJSON text produced by the database, that is not
+    parsed so it can be written as is.
 
-    return wrapped
+    All columns that are not the geometry are properties ("fields" are not applied).
+
+    @param plan: Query plan of a resource with a geometry column.
+    @param batch_size: Number of rows fetched in each round trip.
+
+    @return: An iterator of properties and GeoJSON geometry, or None if the feature does not have geometry.
+    """
+    # ST_AsGeoJSON of each geometry is used instead of building the whole collection in the database because
+    # json_build_object is not available in old PostgreSQL versions (9.2) and ST_AsGeoJSON(record) needs PostGIS 3.
+    properties_columns = [col for col in plan.model.columns if not _is_geometry_column(col)]
+    properties_fields = [col.name for col in properties_columns]
+    entities = [*(col.label(col.name) for col in properties_columns), _get_geojson_geometry(plan).label("geometry")]
+
+    normalize = get_feature_normalizer(properties_columns)
+    return (
+        (dict(zip(properties_fields, normalize(row[:-1]))), row[-1])
+        for row in iter_plan_session_data(plan, batch_size, entities)
+    )
+
+
+def get_plan_resource_data_feature(plan: ResourceQueryPlan) -> Dict[str, Any]:
+    """Features of a query plan as a GeoJSON FeatureCollection dictionary. See stream_plan_resource_data_feature."""
+    features = stream_plan_resource_data_feature(plan, CONFIG.common_config.streaming.batch_size)
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "geometry": geometry and json.loads(geometry), "properties": properties}
+            for properties, geometry in features
+        ],
+    }
+
+
+def get_resource_data_feature(
+    uri: str,
+    object_location: Optional[str],
+    object_location_schema: Optional[str],
+    filters: Dict[str, str],
+    like: str,
+    fields: List[str],
+    sort: List[OrderBy],
+    limit: Optional[int] = None,
+    offset: int = 0,
+):
+    """data like GeoJSON .Encoding data a variety of geographic data structures."""
+    plan = get_resource_query_plan(
+        uri=uri,
+        object_location=object_location,
+        object_location_schema=object_location_schema,
+        filters=filters,
+        like=like,
+        fields=fields,
+        sort=sort,
+        limit=limit,
+        offset=offset,
+    )
+    return get_plan_resource_data_feature(plan)
 
 
 def get_session_data(
@@ -980,116 +1662,32 @@ def get_session_data(
     timeout: Optional[int] = None,
 ):
     """
-    Retrieve data from a resource based on the provided parameters.
-
-    This function connects to a database or API specified by the URI and retrieves data from the specified
-    table or object location. It applies filters, LIKE-based filtering, field selection, sorting, and pagination
-    to the query.
-
-    @param uri: The URI of the resource.
-    @param object_location: The name of the table or object location.
-    @param object_location_schema: The schema of the object location.
-    @param filters: A dictionary of filters to apply to the query. Each key is a field name, and the value can be
-                   a string or a dictionary specifying an operator and value.
-    @param like: A string for LIKE-based filtering.
-    @param fields: A list of field names to include in the result.
-    @param sort: A list of OrderBy objects to sort the result.
-    @param limit: An optional limit on the number of rows to return.
-    @param offset: The number of rows to skip before starting to return rows.
+    Retrieve data from a resource based on the provided parameters. See get_resource_query_plan.
 
     @return: An iterable of tuples containing the data of the resource.
-
-    @raises sqlalchemy.exc.CompileError: If the query compilation fails.
-    @raises sqlalchemy.exc.ProgrammingError: If there is a programming error in the query.
     """
-    # sqlalchemy.exc.CompileError: MSSQL requires an order_by when using an OFFSET or a non-simple LIMIT clause
-    # (pyodbc.ProgrammingError) ('42000', '[42000] [FreeTDS][SQL Server]The text, ntext, and image data types
-    # cannot be compared or sorted, except when using IS NULL or LIKE operator. (306) (SQLExecDirectW)')
-    # mssql no order no limit no offset
-
-    engine = _get_engine(uri, timeout=timeout)
-    session_maker = sessionmaker(bind=engine)
-    parsed = urlparse(uri)
-
-    model = _get_model(
-        engine=engine,
+    plan = get_resource_query_plan(
+        uri=uri,
         object_location=object_location,
         object_location_schema=object_location_schema,
+        filters=filters,
+        like=like,
+        fields=fields,
+        sort=sort,
+        limit=limit,
+        offset=offset,
+        timeout=timeout,
     )
-
-    column_dict = {column.key: column for column in model.columns}
-    columns = _get_columns(column_dict, fields)
-    filters_args = []
-    like_filters = _process_like_filter(like, model)
-    filters, filters_args = _get_filter_operators(filters, filters_args)
-    if "oracle" in parsed.scheme:
-        filters = _process_filters_oracle_dates(filters)
-    filters_args = process_filters_args(filters_args, parsed.scheme)
-    filters_args.extend(like_filters)
-
-    session = session_maker()
-
-    if parsed.scheme in ["mssql+pyodbc"]:
-        try:
-            data = (
-                session.query(model)
-                .filter_by(**filters)
-                .filter(*filters_args)
-                .with_entities(*[model.c[col.key].label(col.key) for col in columns])
-                .all()
-            )
-        except sqlalchemy.exc.ProgrammingError as err:
-            raise NoObjectError("Object not available.") from err
-        finally:
-            session.close()
-            engine.dispose()
-    else:
-        try:
-            data = (
-                session.query(model)
-                .filter_by(**filters)
-                .filter(*filters_args)
-                .order_by(*_get_sort_methods(column_dict, sort))
-                .with_entities(*[model.c[col.key].label(col.key) for col in columns])
-                .offset(offset)
-                .limit(limit)
-                .all()
-            )
-        except sqlalchemy.exc.ProgrammingError as err:
-            logger.warning("Object not available. - %s ", err)
-            raise ServiceUnavailable(
-                "Object not available.", code=ErrorCodes.OBJECT_UNAVAILABLE
-            ) from err
-        except sqlalchemy.exc.InvalidRequestError as err:
-            logger.warning("Invalid Request Error. - %s ", err)
-            raise ServiceUnavailable(
-                "Invalid Request Error.", code=ErrorCodes.QUERY_ERROR
-            ) from err
-        except SortFieldNoExistsError as err:
-            logger.warning("Sort Field No Exists Error. - %s ", err)
-            raise ValidationError(err.message) from err
-        except Exception as err:
-            logger.warning("Problem in resource query: %s", err)
-            raise ServiceUnavailable(
-                "Query error", code=ErrorCodes.QUERY_ERROR
-            ) from err
-        finally:
-            session.close()
-            engine.dispose()
-
-    return data
+    return get_plan_session_data(plan)
 
 
 def _process_filters_oracle_dates(filters):
-    """Oracle usually expects dates in the format 'dd-Mon-YYYY HH24:MI:SS'. This function processes the filters to
-    convert the dates to this format."""
+    """Oracle does not compare dates with text, so ISO dates of the filters are bound as datetime."""
     logger.info("Process filters for oracle dates")
 
     for key in filters:
         if is_datetime(filters[key]):
-            the_date = datetime.fromisoformat(filters[key])
-            filters[key] = f"{the_date.strftime('%d-%b-%Y %H:%M:%S')}"
-            # filters[key] = f"TO_DATE('{the_date.isoformat()}', 'YYYY-MM-DD\"T\"HH24:MI:SS')"
+            filters[key] = datetime.fromisoformat(filters[key])
     return filters
 
 
@@ -1108,33 +1706,10 @@ def _get_filter_operators(
     return filters, filters_args
 
 
-def get_resource_data(
-    *,
-    uri: str,
-    object_location: Optional[str],
-    object_location_schema: Optional[str],
-    filters: Dict[str, Union[str, dict]],
-    like: str,
-    fields: List[str],
-    sort: List[OrderBy],
-    limit: Optional[int] = None,
-    offset: int = 0,
-    timeout: Optional[int] = None,
-) -> Iterable[Dict[str, Any]]:
-    """Return a iterable of dictionaries with data of resource."""
+def get_plan_resource_data(plan: ResourceQueryPlan) -> Iterable[Dict[str, Any]]:
+    """Return a iterable of dictionaries with data of a query plan."""
 
-    data = get_session_data(
-        uri,
-        object_location,
-        object_location_schema,
-        filters,
-        like,
-        fields,
-        sort,
-        limit,
-        offset,
-        timeout,
-    )
+    data = get_plan_session_data(plan)
 
     """ When no typing objects are present, as when executing plain SQL strings, adefault "outputtypehandler" is
     present which will generally return numeric values which specify precision and scale as Python ``Decimal`` objects
@@ -1147,63 +1722,49 @@ def get_resource_data(
     .. versionchanged:: 1.2  The numeric handling system for Oracle has been reworked to take advantage of newer
     oracledb features as well as better integration of outputtypehandlers. """
 
-    dataTemp = []
-    dataTempTuplas = []
-
-    for item in data:
-        for column in item:
-            if isinstance(column, uuid.UUID):
-                # Handle UUID objects by converting to string
-                dataTempTuplas.append(str(column))
-            elif (
-                (isinstance(column, (decimal.Decimal, Promise)))
-                or (isinstance(column, float))
-                or (isinstance(column, Numeric))
-            ):
-                parte_decimal, _ = math.modf(column)
-                if (parte_decimal) == 0.0:
-                    dataTempTuplas.append(int(column))
-                else:
-                    dataTempTuplas.append(sanitize_control_charcters(column))
+    normalize = get_row_normalizer(plan.columns)
+    with timed("normalization"):
+        data = [normalize(item) for item in data]
 
-            else:
-                dataTempTuplas.append(sanitize_control_charcters(column))
+    return (dict(zip([column.key for column in plan.columns], row)) for row in data)
 
-        dataTemp.append(tuple(dataTempTuplas))
-        dataTempTuplas.clear()
-    data = dataTemp
 
-    # FIXME:
-    #  check https://docs.sqlalchemy.org/en/13/orm/query.html#sqlalchemy.orm.query.Query.yield_per
+def stream_plan_resource_data(plan: ResourceQueryPlan, batch_size: int) -> Iterator[Dict[str, Any]]:
+    """Like get_plan_resource_data, but rows are fetched with a server side cursor in batches of batch_size rows and
+    normalized one by one while they are consumed. See iter_plan_session_data."""
+    keys = [column.key for column in plan.columns]
+    normalize = get_row_normalizer(plan.columns)
+    return (dict(zip(keys, normalize(row))) for row in iter_plan_session_data(plan, batch_size))
 
-    engine = _get_engine(uri)
-    session_maker = sessionmaker(bind=engine)
-    model = _get_model(
-        engine=engine,
+
+def get_resource_data(
+    *,
+    uri: str,
+    object_location: Optional[str],
+    object_location_schema: Optional[str],
+    filters: Dict[str, Union[str, dict]],
+    like: str,
+    fields: List[str],
+    sort: List[OrderBy],
+    limit: Optional[int] = None,
+    offset: int = 0,
+    timeout: Optional[int] = None,
+) -> Iterable[Dict[str, Any]]:
+    """Return a iterable of dictionaries with data of resource."""
+
+    plan = get_resource_query_plan(
+        uri=uri,
         object_location=object_location,
         object_location_schema=object_location_schema,
+        filters=filters,
+        like=like,
+        fields=fields,
+        sort=sort,
+        limit=limit,
+        offset=offset,
+        timeout=timeout,
     )
-
-    column_dict = {column.key: column for column in model.columns}
-    columns = _get_columns(column_dict, fields)
-    session = session_maker()
-    session.close()
-    engine.dispose()
-
-    return (dict(zip([column.key for column in columns], row)) for row in data)
-
-
-def update_resource_size(resource_id, registries, size):
-    try:
-        resource = ResourceConfig.objects.select_related().get(
-            id=resource_id, enabled=True, connector_config__enabled=True
-        )
-    except ResourceConfig.DoesNotExist as err:
-        raise ValidationError("Resource not exists or is not available", 400) from err
-
-    rsc = ResourceSizeConfig(registries=registries, size=size)
-    rsc.resource_id = resource
-    rsc.save()
+    return get_plan_resource_data(plan)
 
 
 def _get_columns(
@@ -1237,22 +1798,19 @@ def _get_sort_methods(column_dict: Dict[str, Column], sort: List[OrderBy]):
     return sort_methods
 
 
-def _process_like_filter(args: str, model: Table) -> list:
-    """Create constructor of filter like"""
-    filters = []
-    if args and len(args) != 2:
+def _process_like_filter(like: Union[str, Dict[str, Any], None], column_dict: Dict[str, Column]) -> list:
+    """Create clauses of like filters. Like filters can be a dictionary or its JSON, as received in the query string.
+    See process_like_args."""
+    if isinstance(like, str):
         try:
-            list_args = args.split(",")
-            for value in list_args:
-                if re.search(r"[{/}]", (value)):
-                    value = re.sub(r"[{/}]", " ", (value))
-                if re.search(r"[:]", (value)):
-                    value = re.sub(r"[:]", ",", (value))
-                key = eval(value)[0]
-                filters.append(model.columns[key].ilike(f"%{eval(value)[1]}%"))
-        except KeyError as err:
-            raise FieldNoExistsError(f"Field: {err.args[0]} not exists.") from err
-    return filters
+            like = json.loads(like) if like.strip() else {}
+        except json.JSONDecodeError as err:
+            raise ValidationError("Invalid JSON.", 400) from err
+    if not like:
+        return []
+    if not isinstance(like, dict):
+        raise ValidationError("Invalid format: eg. {“key1”: “a”, “key2”: “b”}", 400)
+    return process_like_args(like, column_dict)
 
 
 class NetworkConnectionError(Exception):
@@ -1350,6 +1908,8 @@ def validate_uri(uri: str, timeout: Optional[int] = None) -> None:
         logger.warning(
             "Connection not available for URI: %s... - %s", uri[:50], str(err)
         )
+        # Do not keep in the registry engines of URIs that are not reachable.
+        dispose_engine(uri)
         raise DriverConnectionError("Connection not available.") from err
 
 
@@ -1372,7 +1932,7 @@ def _csv_to_dict(data: bytes, charset: str) -> List[Dict[str, Any]]:
 
 
 def _get_table_from_dict(
-    data: List[Dict[str, Any]], engine: Engine, meta_data: MetaData
+    data: List[Dict[str, Any]], engine: Engine, meta_data: MetaData, prefixes: Optional[List[str]] = None
 ) -> Table:
     fields_to_check = list(data[0].keys())
     fields_checked = []
@@ -1395,15 +1955,26 @@ def _get_table_from_dict(
             break
 
     table = Table(
-        _TEMPORAL_TABLE_NAME, meta_data, *field_types.values(), prefixes=["TEMPORARY"]
+        _TEMPORAL_TABLE_NAME,
+        meta_data,
+        *field_types.values(),
+        prefixes=["TEMPORARY"] if prefixes is None else prefixes,
     )
     meta_data.create_all(engine)
     return table
 
 
-def _get_engine_from_api(uri: str, timeout: Optional[int] = None) -> Engine:
+def _download_api_data(
+    uri: str, timeout: Optional[int] = None, headers: Optional[Dict[str, str]] = None
+) -> Tuple[Optional[List[Dict[str, Any]]], Dict[str, str]]:
+    """Download and parse a CSV or JSON API resource.
+
+    @param headers: Headers of the request, e.g. conditional request headers.
+    @return: Parsed data and response headers. Data is None if server answers 304 Not Modified.
+    """
+    request = urllib.request.Request(uri, headers=headers or {})
     try:
-        with urllib.request.urlopen(uri, timeout=timeout) as response:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
             if response.getcode() == HTTPStatus.OK:
                 split_content_type = response.info()["Content-Type"].split(";")
                 mime_type = split_content_type[0]
@@ -1420,7 +1991,12 @@ def _get_engine_from_api(uri: str, timeout: Optional[int] = None) -> Engine:
                     raise MimeTypeError()
             else:
                 raise DriverConnectionError("The url could not be reached.")
-    except (HTTPError, URLError) as err:
+            response_headers = dict(response.info().items())
+    except HTTPError as err:
+        if err.code == HTTPStatus.NOT_MODIFIED:
+            return None, dict(err.headers.items())
+        raise DriverConnectionError("The url could not be reached.") from err
+    except URLError as err:
         raise DriverConnectionError("The url could not be reached.") from err
     if data:
         max_key = max(data, key=len).keys()
@@ -1428,16 +2004,27 @@ def _get_engine_from_api(uri: str, timeout: Optional[int] = None) -> Engine:
             if len(max_key) > len(item.keys()):
                 for k in max_key:
                     item.setdefault(k, None)
-    engine = create_engine("sqlite:///:memory:", echo=False, future=True)
+    return data, response_headers
+
+
+def _materialize_api_data(data: List[Dict[str, Any]], path: Optional[str] = None) -> Engine:
+    """Create a SQLite database with data of an API resource. If path is None, database is a temporary table in
+    memory that is only visible by the connection that creates it."""
+    if path is None:
+        engine = create_engine("sqlite:///:memory:", echo=False, future=True)
+        prefixes = ["TEMPORARY"]
+    else:
+        engine = create_engine(f"sqlite:///{path}", echo=False, future=True)
+        prefixes = []
     metadata = MetaData()
     if data:
-        table = _get_table_from_dict(data, engine, metadata)
+        table = _get_table_from_dict(data, engine, metadata, prefixes=prefixes)
     else:
         table = Table(
             _TEMPORAL_TABLE_NAME,
             metadata,
             Column("id", Integer, primary_key=True),
-            prefixes=["TEMPORARY"],
+            prefixes=prefixes,
         )
         metadata.create_all(engine)
     if data:
@@ -1446,57 +2033,274 @@ def _get_engine_from_api(uri: str, timeout: Optional[int] = None) -> Engine:
         session.execute(table.insert(), data)
         session.commit()
         session.close()
+    if path is not None:
+        # Read only: if the file is removed, a new connection fails instead of creating an empty database.
+        engine.dispose()
+        engine = create_engine(f"sqlite:///file:{path}?mode=ro&uri=true", echo=False, future=True)
     return engine
 
 
+@dataclass
+class _ApiMaterialization:
+    """SQLite file with the data of an API resource and validators of the response used to build it."""
+
+    engine: Engine
+    path: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresh_until: float
+
+
+def _release_api_materialization(_uri: str, materialization: _ApiMaterialization) -> None:
+    # Plans of requests that are still running keep the engine, so the file is only removed by _remove_api_file.
+    materialization.engine.dispose()
+
+
+def _remove_api_file(path: str) -> None:
+    """Remove the SQLite file of an API resource once its engine is not referenced by the cache, plans or sessions."""
+    # Connections that are still reading the file keep it open until they are closed.
+    with suppress(FileNotFoundError):
+        os.remove(path)
+
+
+# Downloading and parsing an API resource is expensive, so each worker keeps it in a SQLite file per URL. During
+# ttl_seconds it is used without asking the server; then it is revalidated with a conditional GET and kept while the
+# server answers 304 Not Modified. Unused files are removed after max_stale_seconds.
+_API_CACHE = TTLCache(
+    max_size=CONFIG.common_config.api_cache.max_size,
+    ttl=CONFIG.common_config.api_cache.max_stale_seconds,
+    shared_key="gaodcore:api_cache_epoch",
+    on_evict=_release_api_materialization,
+)
+atexit.register(_API_CACHE.purge)
+_API_CACHE_LOCKS: Dict[str, threading.Lock] = {}
+_API_CACHE_LOCKS_LOCK = threading.Lock()
+
+
+def _get_api_cache_lock(uri: str) -> threading.Lock:
+    with _API_CACHE_LOCKS_LOCK:
+        return _API_CACHE_LOCKS.setdefault(uri, threading.Lock())
+
+
+def _get_engine_from_api(uri: str, timeout: Optional[int] = None) -> Engine:
+    config = CONFIG.common_config.api_cache
+    if config.max_size <= 0:
+        data, _ = _download_api_data(uri, timeout=timeout)
+        return _materialize_api_data(data)
+
+    # Concurrent requests of the same URL wait for a single download.
+    with _get_api_cache_lock(uri):
+        materialization = _API_CACHE.get(uri)
+        if materialization is not None and materialization.fresh_until > monotonic():
+            return materialization.engine
+
+        headers = {}
+        if materialization is not None:
+            if materialization.etag:
+                headers["If-None-Match"] = materialization.etag
+            if materialization.last_modified:
+                headers["If-Modified-Since"] = materialization.last_modified
+        data, response_headers = _download_api_data(uri, timeout=timeout, headers=headers)
+
+        if data is None:
+            logger.debug("API resource not modified: %s", uri)
+            materialization.fresh_until = monotonic() + config.ttl_seconds
+            _API_CACHE.set(uri, materialization)
+            return materialization.engine
+
+        file_descriptor, path = tempfile.mkstemp(prefix="gaodcore_api_", suffix=".sqlite3", dir=config.directory)
+        os.close(file_descriptor)
+        try:
+            engine = _materialize_api_data(data, path)
+        except Exception:
+            os.remove(path)
+            raise
+        weakref.finalize(engine, _remove_api_file, path)
+        _API_CACHE.set(
+            uri,
+            _ApiMaterialization(
+                engine=engine,
+                path=path,
+                etag=response_headers.get("ETag"),
+                last_modified=response_headers.get("Last-Modified"),
+                fresh_until=monotonic() + config.ttl_seconds,
+            ),
+        )
+        return engine
+
+
+def purge_api_cache(uri: Optional[str] = None) -> int:
+    """Remove downloaded API resources of a URL, or all of them, in all workers. Return number of removed resources
+    of this worker."""
+    if uri is None:
+        return _API_CACHE.invalidate()
+    return _API_CACHE.invalidate(lambda key: key == uri)
+
+
+def get_api_cache_stats() -> Dict[str, int]:
+    """Hits, misses, entries and bytes of the API resource cache of this worker."""
+    return _API_CACHE.stats()
+
+
 # Global flag to track Oracle client initialization
 _oracle_client_initialized = False
 
+# Engines are expensive to build (TCP + auth handshake on every new connection), so each worker keeps one pooled
+# engine per normalized URI and timeout instead of creating and disposing one on every call.
+_ENGINE_REGISTRY: Dict[Tuple[str, Optional[int]], Engine] = {}
+_ENGINE_REGISTRY_LOCK = threading.Lock()
+# Epoch of the engines of each normalized URI in Django cache. dispose_engine changes it, so all workers dispose their
+# engines of a modified, disabled or deleted connector, not only the worker that saved it.
+_ENGINE_EPOCHS: Dict[str, SharedEpoch] = {}
 
-def _get_engine(uri: str, timeout: Optional[int] = None) -> Engine:
-    global _oracle_client_initialized
+
+def _normalize_uri(uri: str) -> str:
+    """Return the URI with the SQLAlchemy driver that must be used for its schema."""
     uri_parsed = urlparse(uri)
 
     # Handle Oracle URI conversion from oracle:// to oracle+oracledb://
     if uri_parsed.scheme == "oracle":
         # Convert oracle:// to oracle+oracledb:// for the new oracledb package
-        uri = uri.replace("oracle://", "oracle+oracledb://", 1)
-        uri_parsed = urlparse(uri)
+        return uri.replace("oracle://", "oracle+oracledb://", 1)
 
     # Handle MSSQL URI conversion from mssql:// to mssql+pyodbc://
     if uri_parsed.scheme == "mssql":
         # Convert mssql:// to mssql+pyodbc:// for pyodbc driver compatibility
-        uri = uri.replace("mssql://", "mssql+pyodbc://", 1)
-        uri_parsed = urlparse(uri)
+        return uri.replace("mssql://", "mssql+pyodbc://", 1)
+
+    return uri
+
+
+def _get_pool_options(uri: str, scheme: str) -> Dict[str, Any]:
+    """Get pool arguments of create_engine. Connectors without a specific configuration use the default one."""
+    pools_config = CONFIG.common_config.engine_pools
+    pool_config = pools_config.default
+    if pools_config.connectors:
+        connector_name = (
+            ConnectorConfig.objects.filter(uri=uri).values_list("name", flat=True).first()
+        )
+        pool_config = pools_config.connectors.get(connector_name, pool_config)
+
+    options = {
+        "pool_pre_ping": pool_config.pool_pre_ping,
+        "pool_recycle": pool_config.pool_recycle,
+    }
+    # SQLite does not use a QueuePool, so it does not accept size or overflow arguments.
+    if scheme != "sqlite":
+        options.update(
+            pool_size=pool_config.pool_size,
+            max_overflow=pool_config.max_overflow,
+            pool_timeout=pool_config.pool_timeout,
+        )
+    return options
+
+
+def _create_database_engine(uri: str, pool_options: Dict[str, Any], timeout: Optional[int] = None) -> Engine:
+    global _oracle_client_initialized
+    normalized_uri = _normalize_uri(uri)
+    scheme = urlparse(normalized_uri).scheme
+
+    # Special handling for Oracle to enable thick mode for older password verifiers
+    if scheme == "oracle+oracledb" and not _oracle_client_initialized:
+        try:
+            import oracledb
+
+            # Initialize thick mode for compatibility with older Oracle versions
+            oracledb.init_oracle_client()
+            _oracle_client_initialized = True
+            logger.info("Oracle thick mode initialized successfully")
+        except Exception as e:
+            logger.warning(f"Could not initialize Oracle thick mode: {e}")
+            # Fall back to thin mode (default behavior)
+
+    # Configure database-specific timeout parameters
+    connect_args = {}
+    if timeout is not None:
+        if scheme in ["postgresql", "mysql"]:
+            connect_args["connect_timeout"] = timeout
+        elif scheme == "oracle+oracledb":
+            # Oracle oracledb driver doesn't support timeout in connect_args
+            # Timeout is typically handled at the TNS level
+            pass
+        elif scheme in ["mssql+pyodbc", "mssql"]:
+            connect_args["timeout"] = timeout
+        # SQLite doesn't support timeout parameter - file operations are typically fast
+
+    return create_engine(
+        normalized_uri,
+        max_identifier_length=128,
+        connect_args=connect_args,
+        **pool_options,
+    )
+
+
+def _get_engine_epoch(normalized_uri: str) -> SharedEpoch:
+    # URIs include credentials, so they are hashed instead of being stored in Django cache.
+    with _ENGINE_REGISTRY_LOCK:
+        return _ENGINE_EPOCHS.setdefault(
+            normalized_uri,
+            SharedEpoch(f"gaodcore:engine_epoch:{hashlib.sha1(normalized_uri.encode()).hexdigest()}"),
+        )
+
+
+def _get_registered_engine(uri: str, timeout: Optional[int] = None) -> Engine:
+    """Get the pooled engine of a database URI. It is created the first time that is requested in this worker and
+    disposed when another worker has disposed the engines of the URI."""
+    key = (_normalize_uri(uri), timeout)
+    if _get_engine_epoch(key[0]).changed():
+        logger.info("Engines disposed by another worker. Url: %s", key[0])
+        _dispose_registered_engines(key[0])
+    engine = _ENGINE_REGISTRY.get(key)
+    if engine is not None:
+        return engine
+
+    # Pool options may query the configuration database, so they are resolved without holding the lock of all engines.
+    pool_options = _get_pool_options(uri, urlparse(key[0]).scheme)
+    with _ENGINE_REGISTRY_LOCK:
+        engine = _ENGINE_REGISTRY.get(key)
+        if engine is None:
+            engine = _create_database_engine(uri, pool_options, timeout=timeout)
+            _ENGINE_REGISTRY[key] = engine
+            logger.info("Engine registered. Url: %s, Timeout: %s", engine.url, timeout)
+    return engine
+
+
+def dispose_engine(uri: str) -> None:
+    """Close all pooled connections of a URI and remove its engines from the registry. Next use will create a new
+    engine with current configuration. Other workers dispose their engines of the URI the next time that they check
+    its epoch. Downloaded data of an API URI is removed too."""
+    normalized_uri = _normalize_uri(uri)
+    if urlparse(normalized_uri).scheme in _HTTP_SCHEMAS:
+        purge_api_cache(uri)
+        return
+    _get_engine_epoch(normalized_uri).change()
+    _dispose_registered_engines(normalized_uri)
+
+
+def _dispose_registered_engines(normalized_uri: str) -> None:
+    """Close pooled connections of the engines of a URI of this worker and remove them from the registry."""
+    with _ENGINE_REGISTRY_LOCK:
+        keys = [key for key in _ENGINE_REGISTRY if key[0] == normalized_uri]
+        engines = [_ENGINE_REGISTRY.pop(key) for key in keys]
+    for engine in engines:
+        engine.dispose()
+
+
+def dispose_all_engines() -> None:
+    """Close all pooled connections of this worker and remove its downloaded API resources."""
+    with _ENGINE_REGISTRY_LOCK:
+        engines = list(_ENGINE_REGISTRY.values())
+        _ENGINE_REGISTRY.clear()
+    for engine in engines:
+        engine.dispose()
+    _API_CACHE.purge()
+
+
+def _get_engine(uri: str, timeout: Optional[int] = None) -> Engine:
+    uri_parsed = urlparse(_normalize_uri(uri))
 
     if uri_parsed.scheme in _DATABASE_SCHEMAS:
-        # Special handling for Oracle to enable thick mode for older password verifiers
-        if uri_parsed.scheme == "oracle+oracledb" and not _oracle_client_initialized:
-            try:
-                import oracledb
-
-                # Initialize thick mode for compatibility with older Oracle versions
-                oracledb.init_oracle_client()
-                _oracle_client_initialized = True
-                logger.info("Oracle thick mode initialized successfully")
-            except Exception as e:
-                logger.warning(f"Could not initialize Oracle thick mode: {e}")
-                # Fall back to thin mode (default behavior)
-
-        # Configure database-specific timeout parameters
-        connect_args = {}
-        if timeout is not None:
-            if uri_parsed.scheme in ["postgresql", "mysql"]:
-                connect_args["connect_timeout"] = timeout
-            elif uri_parsed.scheme == "oracle+oracledb":
-                # Oracle oracledb driver doesn't support timeout in connect_args
-                # Timeout is typically handled at the TNS level
-                pass
-            elif uri_parsed.scheme in ["mssql+pyodbc", "mssql"]:
-                connect_args["timeout"] = timeout
-            # SQLite doesn't support timeout parameter - file operations are typically fast
-
-        return create_engine(uri, max_identifier_length=128, connect_args=connect_args)
+        return _get_registered_engine(uri, timeout=timeout)
     if uri_parsed.scheme in _HTTP_SCHEMAS:
         return _get_engine_from_api(uri, timeout=timeout)
     raise NotImplementedSchemaError(
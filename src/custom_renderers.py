@@ -1,7 +1,24 @@
 """
-Custom renderers for backward compatibility.
+Custom renderers for backward compatibility and newline delimited JSON.
 """
+import datetime
+import decimal
+import io
+import json
+import math
+import uuid
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.utils.duration import duration_iso_string
+from django.utils.timezone import is_aware
+import pyarrow as pa
 from drf_excel.renderers import XLSXRenderer
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+
+from columnar import ARROW_CONTENT_TYPE, PARQUET_CONTENT_TYPE, write_arrow, write_parquet
+from utils import serializerJsonEncoder
 
 
 class BackwardCompatibleXLSXRenderer(XLSXRenderer):
@@ -20,3 +37,170 @@ class BackwardCompatibleXLSXRenderer(XLSXRenderer):
         if accepted_media_type in ["application/xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"]:
             return super().render(data, accepted_media_type, renderer_context)
         return super().render(data, accepted_media_type, renderer_context)
+
+
+def json_dumps(data) -> str:
+    """Encode data like DRF JSONRenderer: compact, unicode and strict by default."""
+    return json.dumps(
+        data,
+        default=serializerJsonEncoder,
+        ensure_ascii=not api_settings.UNICODE_JSON,
+        allow_nan=not api_settings.STRICT_JSON,
+        separators=(",", ":") if api_settings.COMPACT_JSON else (", ", ": "),
+    ).replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+
+
+def _datetime_to_json(value: datetime.datetime) -> str:
+    # See "Date Time String Format" in the ECMA-262 specification.
+    r = value.isoformat()
+    if value.microsecond:
+        r = r[:23] + r[26:]
+    if r.endswith("+00:00"):
+        r = r[:-6] + "Z"
+    return r
+
+
+def _time_to_json(value: datetime.time) -> str:
+    if is_aware(value):
+        raise ValueError("JSON can't represent timezone-aware times.")
+    r = value.isoformat()
+    if value.microsecond:
+        r = r[:12]
+    return r
+
+
+def _float_to_json(value: float) -> Optional[float]:
+    # NaN and infinite values are not JSON compliant.
+    return None if math.isnan(value) or math.isinf(value) else value
+
+
+# Same conversions as serializerJsonEncoder, by exact type. None means that value is already a JSON type.
+_JSON_CONVERTERS: Dict[type, Optional[Callable[[Any], Any]]] = {
+    str: None,
+    int: None,
+    bool: None,
+    float: _float_to_json,
+    datetime.datetime: _datetime_to_json,
+    datetime.date: datetime.date.isoformat,
+    datetime.time: _time_to_json,
+    datetime.timedelta: duration_iso_string,
+    decimal.Decimal: str,
+    uuid.UUID: str,
+}
+
+
+def convert_json_value(value: Any) -> Any:
+    """Convert a value to a JSON type like JSONRowEncoder, e.g. dates as ISO 8601 text."""
+    converter = _JSON_CONVERTERS.get(type(value), serializerJsonEncoder)
+    return value if converter is None else converter(value)
+
+
+_JSON_BATCH_SIZE = 500
+
+
+class JSONRowEncoder:
+    """
+    Convert rows to JSON compatible dicts. The converter of each column is selected once from the type of its values
+    and reused for next rows, instead of dispatching every value through serializerJsonEncoder. Unknown types (e.g.
+    geometries) fall back to serializerJsonEncoder.
+    """
+
+    def __init__(self, header: List[str]):
+        self.header = header
+        self._types: List[Optional[type]] = [None] * len(header)
+        self._converters: List[Optional[Callable[[Any], Any]]] = [None] * len(header)
+
+    def convert(self, values: Iterable[Any]) -> Dict[str, Any]:
+        return dict(zip(self.header, self.convert_values(values)))
+
+    def convert_values(self, values: Iterable[Any]) -> List[Any]:
+        row = []
+        for i, value in enumerate(values):
+            if value is not None:
+                value_type = type(value)
+                if value_type is not self._types[i]:
+                    self._types[i] = value_type
+                    self._converters[i] = _JSON_CONVERTERS.get(value_type, serializerJsonEncoder)
+                converter = self._converters[i]
+                if converter is not None:
+                    value = converter(value)
+            row.append(value)
+        return row
+
+
+def iter_json_array(rows: Iterable[Dict[str, Any]], header: List[str]) -> Iterator[str]:
+    """Encode rows as a JSON array incrementally. Rows are encoded in batches, so output is produced while rows are
+    read and there is no intermediate representation of the whole array."""
+    encoder = JSONRowEncoder(header)
+    rows = iter(rows)
+    yield "["
+    separator = ""
+    while True:
+        batch = [encoder.convert(item.values()) for item in islice(rows, _JSON_BATCH_SIZE)]
+        if not batch:
+            break
+        yield separator + json_dumps(batch)[1:-1]
+        separator = ","
+    yield "]"
+
+
+def iter_ndjson(rows: Iterable[Dict[str, Any]], header: List[str]) -> Iterator[str]:
+    """Encode rows as newline delimited JSON, one line per row."""
+    encoder = JSONRowEncoder(header)
+    for item in rows:
+        yield json_dumps(encoder.convert(item.values())) + "\n"
+
+
+def iter_geojson(features: Iterable[Tuple[Dict[str, Any], Optional[str]]]) -> Iterator[str]:
+    """Encode features as a GeoJSON FeatureCollection incrementally. Each feature is its properties and its geometry
+    as GeoJSON text, that is written as is, without parsing and encoding it again."""
+    yield '{"type":"FeatureCollection","features":['
+    separator = ""
+    for properties, geometry in features:
+        yield f'{separator}{{"type":"Feature","geometry":{geometry or "null"},"properties":{json_dumps(properties)}}}'
+        separator = ","
+    yield "]}"
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline delimited JSON renderer: one JSON document per line. A list is rendered as one line per item.
+    """
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        items = data if isinstance(data, list) else [data]
+        return "".join(json_dumps(item) + "\n" for item in items).encode(self.charset)
+
+
+class _ColumnarRenderer(BaseRenderer):
+    """
+    Renderer of a list of dictionaries as a columnar file. Types of the columns are inferred from the values. Downloads
+    do not use it: they are written with the types of the reflected columns, see columnar.py.
+    """
+    charset = None
+    render_style = "binary"
+    write = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        table = pa.Table.from_pylist(rows)
+        output = io.BytesIO()
+        self.write(table.to_batches(), table.schema, output)
+        return output.getvalue()
+
+
+class ParquetRenderer(_ColumnarRenderer):
+    media_type = PARQUET_CONTENT_TYPE
+    format = "parquet"
+    write = staticmethod(write_parquet)
+
+
+class ArrowRenderer(_ColumnarRenderer):
+    media_type = ARROW_CONTENT_TYPE
+    format = "arrow"
+    write = staticmethod(write_arrow)
@@ -1,7 +1,7 @@
 from typing import List
 
 from rest_framework.exceptions import ValidationError
-from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.negotiation import BaseContentNegotiation, DefaultContentNegotiation
 from rest_framework.renderers import BaseRenderer
 from rest_framework.request import Request
 
@@ -22,3 +22,14 @@ class LegacyContentNegotiation(DefaultContentNegotiation):
             raise ValidationError(f'Formato: "{force_format}" is not allowed. Allowed values: {allowed_formats}', 400)
 
         return super().select_renderer(request, renderers, format_suffix=force_format or format_suffix)
+
+
+class FirstRendererContentNegotiation(BaseContentNegotiation):
+    """Select the first renderer regardless of the Accept header. Used by views whose data is not rendered by DRF,
+    e.g. binary tiles, so only their errors are rendered."""
+
+    def select_parser(self, request: Request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request: Request, renderers: List[BaseRenderer], format_suffix=None):
+        return renderers[0], renderers[0].media_type
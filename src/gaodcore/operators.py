@@ -1,8 +1,10 @@
-from datetime import date, datetime
-from typing import Callable, Any
+from datetime import datetime
+from typing import Callable, Any, Dict, Optional
 
 from rest_framework.exceptions import ValidationError
-from sqlalchemy import text, not_, and_, or_
+from sqlalchemy import Column, column as column_clause, not_, and_, or_
+from sqlalchemy.sql import sqltypes
+from sqlalchemy.sql.elements import ColumnElement
 import logging
 
 logger = logging.getLogger(__name__)
@@ -52,39 +54,52 @@ def is_datetime(value):
 #     return result
 
 
-def process_filters_args(filters: list[dict], scheme: str = "") -> list:
-    """Process filters and return a list of SQLAlchemy clauses."""
+def process_filters_args(
+    filters: list[dict], scheme: str = "", columns: Optional[Dict[str, Column]] = None
+) -> list:
+    """Process filters and return a list of SQLAlchemy clauses. Values are bound as parameters, so filters with the
+    same fields and operators compile to the same SQL and reuse the statement caches of SQLAlchemy and the database.
+
+    @param filters: Filters with operators. Format [{"field": {"$operator": value}}, {"$and": [...]}, ...].
+    @param scheme: Scheme of the URI of the resource.
+    @param columns: Reflected columns of the resource by key. If it is not provided, fields are not validated and
+                    values are bound without type.
+    @return: List of SQLAlchemy clauses.
+    """
     result = []
     logger.info("Processing filters: %s", filters)
     for filter in filters:
         for key, value in filter.items():
             if isinstance(value, dict):
-                result.extend(process_dict_filter(key, value, scheme))
+                result.extend(process_dict_filter(key, value, scheme, columns))
             elif isinstance(value, list):
-                result.append(process_list_filter(key, value))
+                result.append(process_list_filter(key, value, scheme, columns))
             else:
                 result.append(process_simple_filter(key, value))
     return result
 
 
-def process_dict_filter(key: str, value: dict, schema: str) -> list:
+def process_dict_filter(key: str, value: dict, schema: str, columns: Optional[Dict[str, Column]] = None) -> list:
     """Process dictionary filters."""
     result = []
     if key == "$not":
         not_function = get_function_for_operator(key)
-        result.append(not_function(value))
+        result.append(not_function(value, schema, columns))
     else:
+        column = get_filter_column(key, columns)
         for field, field_value in value.items():
             filter_function = get_function_for_operator(field)
-            result.append(filter_function(key, {field: field_value}, schema))
+            result.append(filter_function(column, {field: field_value}, schema))
     return result
 
 
-def process_list_filter(key: str, value: list) -> text:
+def process_list_filter(
+    key: str, value: list, schema: str = "", columns: Optional[Dict[str, Column]] = None
+) -> ColumnElement:
     """Process list filters."""
     clause_list = []
     for item in value:
-        clause_list.extend(process_filters_args([item]))
+        clause_list.extend(process_filters_args([item], schema, columns))
     if key == "$and":
         return and_(*clause_list)
     elif key == "$or":
@@ -94,12 +109,63 @@ def process_list_filter(key: str, value: list) -> text:
         raise ValidationError("Filter not valid: %s" % {key: value})
 
 
-def process_simple_filter(key: str, value: Any) -> text:
+def process_simple_filter(key: str, value: Any) -> ColumnElement:
     """Process simple filters."""
     logger.warning("Filter not valid: %s", {key: value})
     raise ValidationError("Filter not valid: %s" % {key: value})
 
 
+def process_like_args(like: Dict[str, Any], columns: Optional[Dict[str, Column]] = None) -> list:
+    """Process like filters and return a list of SQLAlchemy clauses.
+
+    @param like: Like filters. Format {"field": value, ...}. Each value can be:
+                 - "abc" or {"$contains": "abc"}: field contains abc, case insensitive. ILIKE '%abc%'.
+                 - {"$startswith": "abc"}: field starts with abc, case sensitive. LIKE 'abc%', that can use indexes.
+    @param columns: Reflected columns of the resource by key.
+    @return: List of SQLAlchemy clauses.
+    """
+    result = []
+    for field, value in like.items():
+        column = get_filter_column(field, columns)
+        operator = "$contains"
+        if isinstance(value, dict):
+            if len(value) != 1:
+                raise ValidationError(f"Like filter of {field} must have one operator.")
+            operator, value = next(iter(value.items()))
+        if isinstance(value, (dict, list)):
+            raise ValidationError(f"Value of like filter of {field} must be a string.")
+        if operator == "$contains":
+            result.append(column.ilike(f"%{value}%"))
+        elif operator == "$startswith":
+            result.append(column.like(f"{_escape_like(str(value))}%", escape=_LIKE_ESCAPE))
+        else:
+            logger.warning(f"Like operator {operator} not implemented")
+            raise ValidationError(f"Like operator {operator} not implemented")
+    return result
+
+
+# Backslash is not used because MySQL also interprets it inside the literal of the ESCAPE clause.
+_LIKE_ESCAPE = "/"
+
+
+def _escape_like(value: str) -> str:
+    """Escape wildcards of a value, so it is matched literally in a LIKE pattern."""
+    for character in (_LIKE_ESCAPE, "%", "_"):
+        value = value.replace(character, _LIKE_ESCAPE + character)
+    return value
+
+
+def get_filter_column(field: str, columns: Optional[Dict[str, Column]] = None) -> ColumnElement:
+    """Return the column of a field. Without reflected columns, a column clause that SQLAlchemy quotes if needed."""
+    if columns is None:
+        return column_clause(field)
+    try:
+        return columns[field]
+    except KeyError as err:
+        logger.warning("Filter field %s not exists.", field)
+        raise ValidationError(f"Filter field {field} not exists.") from err
+
+
 def get_function_for_operator(operator: str) -> Callable:
     """Return the operator function based on the filter type."""
     filter_operators = {
@@ -109,6 +175,11 @@ def get_function_for_operator(operator: str) -> Callable:
         "$ne": filter_ne,
         "$gte": filter_gte,
         "$lte": filter_lte,
+        "$in": filter_in,
+        "$nin": filter_nin,
+        "$between": filter_between,
+        "$like": filter_like,
+        "$isnull": filter_isnull,
         "$not": filter_not,
     }
     result = filter_operators.get(operator)
@@ -118,111 +189,152 @@ def get_function_for_operator(operator: str) -> Callable:
     return result
 
 
-def format_type(value, schema: str = "") -> str:
-    if isinstance(value, str):
-        if "oracle" in schema and is_datetime(value):
-            the_date = datetime.fromisoformat(value)
-            value = f"TO_DATE('{the_date.isoformat()}', 'YYYY-MM-DD\"T\"HH24:MI:SS')"
-        else:
-            value = f"'{value}'"
-    elif isinstance(value, date):
-        if "oracle" in schema:
-            value = f"TO_DATE('{value.isoformat()}', 'YYYY-MM-DD\"T\"HH24:MI:SS')"
-        else:
-            value = f"'{value.isoformat()}'"
+def bind_value(column: ColumnElement, value: Any, schema: str = "") -> Any:
+    """Convert a value of a filter to the Python type of the column. ISO dates are bound as date or datetime in date
+    columns and in Oracle, that does not compare them with text."""
+    if isinstance(value, str) and is_datetime(value):
+        column_type = column.type
+        if isinstance(column_type, sqltypes.DateTime) or "oracle" in schema:
+            return datetime.fromisoformat(value)
+        if isinstance(column_type, sqltypes.Date):
+            return datetime.fromisoformat(value).date()
     return value
 
 
-def filter_gt(field: str, filter: dict, schema: str) -> text:
+def filter_gt(column: ColumnElement, filter: dict, schema: str) -> ColumnElement:
     """Translate a filter string to a SQL clause.
-    @param field: Field name
+    @param column: Column of the field
     @param filter: Filter dictionary
     @return: SQL clause
     """
-    value = filter["$gt"]
+    return column > bind_value(column, filter["$gt"], schema)
 
-    value = format_type(value, schema)
 
-    return text(f"{field} > {value}")
+def filter_lt(column: ColumnElement, filter: dict, schema: str) -> ColumnElement:
+    """Translate a filter string to a SQL clause.
+    @param column: Column of the field
+    @param filter: Filter dictionary
+    @return: SQL clause
+    """
+    return column < bind_value(column, filter["$lt"], schema)
 
 
-def filter_lt(field: str, filter: dict, schema: str) -> text:
+def filter_eq(column: ColumnElement, filter: dict, schema: str) -> ColumnElement:
     """Translate a filter string to a SQL clause.
-    @param field: Field name
+    @param column: Column of the field
     @param filter: Filter dictionary
     @return: SQL clause
     """
-    value = filter["$lt"]
-    value = format_type(value, schema)
-
-    return text(f"{field} < {value}")
+    return column == bind_value(column, filter["$eq"], schema)
 
 
-def filter_eq(field: str, filter: dict, schema: str) -> text:
+def filter_ne(column: ColumnElement, filter: dict, schema: str) -> ColumnElement:
     """Translate a filter string to a SQL clause.
-    @param field: Field name
+    @param column: Column of the field
     @param filter: Filter dictionary
     @return: SQL clause
     """
-    value = filter["$eq"]
-    value = format_type(value, schema)
+    return column != bind_value(column, filter["$ne"], schema)
 
-    return text(f"{field} = {value}")
 
-
-def filter_ne(field: str, filter: dict, schema: str) -> text:
+def filter_gte(column: ColumnElement, filter: dict, schema: str) -> ColumnElement:
     """Translate a filter string to a SQL clause.
-    @param field: Field name
+    @param column: Column of the field
     @param filter: Filter dictionary
     @return: SQL clause
     """
-    value = filter["$ne"]
-    value = format_type(value, schema)
-
-    return text(f"{field} != {value}")
+    return column >= bind_value(column, filter["$gte"], schema)
 
 
-def filter_gte(field: str, filter: dict, schema: str) -> text:
+def filter_lte(column: ColumnElement, filter: dict, schema: str) -> ColumnElement:
     """Translate a filter string to a SQL clause.
-    @param field: Field name
+    @param column: Column of the field
     @param filter: Filter dictionary
     @return: SQL clause
     """
-    value = filter["$gte"]
-    value = format_type(value, schema)
+    return column <= bind_value(column, filter["$lte"], schema)
+
 
-    return text(f"{field} >= {value}")
+def _get_list(filter: dict, operator: str) -> list:
+    value = filter[operator]
+    if not isinstance(value, list) or any(isinstance(item, (dict, list)) for item in value):
+        raise ValidationError(f"Value of {operator} must be a list of values.")
+    return value
+
+
+# Oracle does not allow more than 1000 expressions in a list (ORA-01795).
+_ORACLE_MAX_IN_VALUES = 1000
+
+
+def _chunk_in_values(values: list, schema: str) -> list:
+    if "oracle" not in schema or len(values) <= _ORACLE_MAX_IN_VALUES:
+        return [values]
+    return [values[i:i + _ORACLE_MAX_IN_VALUES] for i in range(0, len(values), _ORACLE_MAX_IN_VALUES)]
+
+
+def filter_in(column: ColumnElement, filter: dict, schema: str) -> ColumnElement:
+    """Translate a filter string to a SQL clause. Values are bound as a single expanding parameter, so lists of any
+    length share the same statement in the cache of SQLAlchemy.
+    @param column: Column of the field
+    @param filter: Filter dictionary
+    @return: SQL clause
+    """
+    values = [bind_value(column, item, schema) for item in _get_list(filter, "$in")]
+    return or_(*[column.in_(chunk) for chunk in _chunk_in_values(values, schema)])
 
 
-def filter_lte(field: str, filter: dict, schema: str) -> text:
+def filter_nin(column: ColumnElement, filter: dict, schema: str) -> ColumnElement:
     """Translate a filter string to a SQL clause.
-    @param field: Field name
+    @param column: Column of the field
     @param filter: Filter dictionary
     @return: SQL clause
     """
-    value = filter["$lte"]
-    value = format_type(value, schema)
+    values = [bind_value(column, item, schema) for item in _get_list(filter, "$nin")]
+    return and_(*[column.not_in(chunk) for chunk in _chunk_in_values(values, schema)])
+
 
-    return text(f"{field} <= {value}")
+def filter_between(column: ColumnElement, filter: dict, schema: str) -> ColumnElement:
+    """Translate a filter string to a SQL clause. Both limits are included.
+    @param column: Column of the field
+    @param filter: Filter dictionary
+    @return: SQL clause
+    """
+    value = _get_list(filter, "$between")
+    if len(value) != 2:
+        raise ValidationError("Value of $between must be a list with two values.")
+    return column.between(bind_value(column, value[0], schema), bind_value(column, value[1], schema))
 
 
-def filter_not(filter: dict) -> text:
+def filter_like(column: ColumnElement, filter: dict, schema: str) -> ColumnElement:
+    """Translate a filter string to a SQL clause. Value is a LIKE pattern, e.g. "abc%". Patterns without a leading
+    wildcard can use the indexes of the column.
+    @param column: Column of the field
+    @param filter: Filter dictionary
+    @return: SQL clause
+    """
+    value = filter["$like"]
+    if not isinstance(value, str):
+        raise ValidationError("Value of $like must be a string.")
+    return column.like(value)
+
+
+def filter_isnull(column: ColumnElement, filter: dict, schema: str) -> ColumnElement:
     """Translate a filter string to a SQL clause.
-    @param field: Field name
+    @param column: Column of the field
     @param filter: Filter dictionary
     @return: SQL clause
     """
+    value = filter["$isnull"]
+    if not isinstance(value, bool):
+        raise ValidationError("Value of $isnull must be true or false.")
+    return column.is_(None) if value else column.is_not(None)
 
-    clauses = process_filters_args([filter])
-    # In SQLAlchemy 2.0, we need to wrap TextClause objects properly for NOT operations
-    if len(clauses) == 1:
-        clause = clauses[0]
-        # If it's a TextClause, wrap it in NOT() manually
-        if hasattr(clause, 'text'):
-            return text(f"NOT ({clause.text})")
-        else:
-            return not_(clause)
-    else:
-        # For multiple clauses, combine them with AND first, then negate
-        combined = and_(*clauses)
-        return not_(combined)
+
+def filter_not(filter: dict, schema: str = "", columns: Optional[Dict[str, Column]] = None) -> ColumnElement:
+    """Translate a filter string to a SQL clause.
+    @param filter: Filter dictionary
+    @param schema: Scheme of the URI of the resource
+    @param columns: Reflected columns of the resource by key
+    @return: SQL clause
+    """
+    return not_(and_(*process_filters_args([filter], schema, columns)))
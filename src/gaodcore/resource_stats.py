@@ -0,0 +1,109 @@
+"""Size statistics of resources.
+
+Each download reports the rows and bytes it has sent. Writing them to the database in the request would add a query
+and a transaction to every download, so reports are aggregated in memory by each worker, where the last download of a
+resource replaces the previous one, and a background thread writes them every resource_stats.flush_interval_seconds with
+a single upsert. Pending statistics are also written when the worker exits.
+"""
+
+import atexit
+import logging
+import threading
+from typing import Dict, Tuple
+
+from django.db import DatabaseError, connections
+from django.http import HttpResponse
+
+from gaodcore_manager.models import ResourceConfig, ResourceSizeConfig
+from gaodcore_project.settings import CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Rows and bytes of the last download of each resource that have not been written yet.
+_PENDING: Dict[int, Tuple[int, int]] = {}
+_PENDING_LOCK = threading.Lock()
+_FLUSH_LOCK = threading.Lock()
+_FLUSHER_LOCK = threading.Lock()
+_STOP = threading.Event()
+_flusher = None
+
+
+def _flush_periodically() -> None:
+    interval = CONFIG.common_config.resource_stats.flush_interval_seconds
+    while not _STOP.wait(interval):
+        flush_resource_sizes()
+        # Connections are opened by the thread that uses them; close it instead of keeping one per worker.
+        connections.close_all()
+
+
+def _start_flusher() -> None:
+    global _flusher
+    with _FLUSHER_LOCK:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_flush_periodically, name="resource-stats-flusher", daemon=True)
+            _flusher.start()
+
+
+def record_resource_size(resource_id: int, registries: int, size: int) -> None:
+    """Keep rows and bytes sent by a download of a resource. They are written later by flush_resource_sizes."""
+    with _PENDING_LOCK:
+        _PENDING[resource_id] = (registries, size)
+    _start_flusher()
+
+
+def track_response_size(response: HttpResponse, resource_id: int, registries: int) -> HttpResponse:
+    """Record the size of the body of response, once it is rendered."""
+    if hasattr(response, "add_post_render_callback") and not response.is_rendered:
+        response.add_post_render_callback(
+            lambda rendered: record_resource_size(resource_id, registries, len(rendered.content))
+        )
+    else:
+        record_resource_size(resource_id, registries, len(response.content))
+    return response
+
+
+def flush_resource_sizes() -> int:
+    """Write pending statistics with a single upsert and return the number of resources written. Statistics of removed
+    resources are discarded. If the database is not available, they are kept until the next flush unless a newer
+    download of the resource has replaced them."""
+    with _FLUSH_LOCK:
+        with _PENDING_LOCK:
+            pending = dict(_PENDING)
+            _PENDING.clear()
+        if not pending:
+            return 0
+
+        try:
+            existing = set(ResourceConfig.objects.filter(id__in=pending).values_list("id", flat=True))
+            ResourceSizeConfig.objects.bulk_create(
+                [
+                    ResourceSizeConfig(resource_id_id=resource_id, registries=registries, size=size)
+                    for resource_id, (registries, size) in pending.items()
+                    if resource_id in existing
+                ],
+                update_conflicts=True,
+                unique_fields=["resource_id"],
+                update_fields=["registries", "size", "updated_at"],
+            )
+        except DatabaseError as err:
+            logger.warning("Size statistics of %d resources cannot be written: %s", len(pending), err)
+            with _PENDING_LOCK:
+                for resource_id, stats in pending.items():
+                    _PENDING.setdefault(resource_id, stats)
+            return 0
+        return len(existing)
+
+
+def discard_resource_sizes() -> None:
+    """Remove pending statistics without writing them."""
+    with _PENDING_LOCK:
+        _PENDING.clear()
+
+
+@atexit.register
+def _flush_at_exit() -> None:
+    _STOP.set()
+    try:
+        flush_resource_sizes()
+    except Exception as err:  # The worker is exiting, the database or Django may not be usable anymore.
+        logger.warning("Size statistics cannot be written at exit: %s", err)
@@ -0,0 +1,281 @@
+"""Cache of rendered downloads and of total counts of results.
+
+Popular resources are requested with the same parameters many times, so the rendered body of a download is kept by
+each worker and served again without querying the connector. Entries are keyed by the normalized parameters of the
+request, expire after the TTL of their ResourceConfig and are evicted in LRU order when the byte budget is exceeded.
+
+Compressible downloads are stored compressed with gzip, so the cache holds more downloads and clients that accept
+gzip receive the stored body without compressing it again.
+
+Each download carries an ETag, the hash of its body, and a Last-Modified, the first time that body was rendered. Both
+validators are also kept in Django cache, shared by all workers, for the longer of the TTL of the resource and
+result_cache.validator_ttl_seconds. Conditional requests are checked against them before the connector is queried, so
+clients that already have a download receive a 304 from any worker, even if the body is not cached. Validators are
+keyed by versions that purge_result_cache changes, so saving a resource or its connector invalidates them.
+
+Total counts only depend on the resource, filters, like filters and bounding box, so they are cached separately with a
+short TTL and shared by all pages and formats of a result.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+from django.core.cache import cache as django_cache
+from django.db import DatabaseError
+from django.http import HttpRequest, HttpResponse
+from django.template.response import SimpleTemplateResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from caches import TTLCache
+from compression import is_compressible, select_encoding, set_content_encoding
+from connectors import OrderBy
+from gaodcore_manager.models import ResourceConfig
+from gaodcore_project.settings import CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Formats whose body does not depend on the user. Browsable API pages include user and CSRF data.
+_CACHEABLE_FORMATS = {"json", "csv", "xlsx", "xml", "yaml", "parquet", "arrow"}
+
+
+# Headers of a download that are kept with its body.
+_CACHED_HEADERS = ("Link",)
+
+
+class CachedDownload(NamedTuple):
+    body: bytes
+    content_type: str
+    etag: str
+    last_modified: int
+    headers: Dict[str, str]
+    # Content-Encoding of body: gzip or None if it is not compressed.
+    encoding: Optional[str] = None
+
+
+_RESULT_CACHE = TTLCache(
+    max_size=CONFIG.common_config.result_cache.max_size,
+    ttl=CONFIG.common_config.result_cache.ttl_seconds,
+    shared_key="gaodcore:result_cache_epoch",
+    max_bytes=CONFIG.common_config.result_cache.max_bytes,
+    sizeof=lambda value: len(value.body),
+)
+
+# Version of the validators of all downloads and, followed by a resource id, of the downloads of a resource.
+_VALIDATORS_VERSION_KEY = "gaodcore:validators_version"
+
+_COUNT_CACHE = TTLCache(
+    max_size=CONFIG.common_config.count_cache.max_size,
+    ttl=CONFIG.common_config.count_cache.ttl_seconds,
+    shared_key="gaodcore:count_cache_epoch",
+)
+
+
+def get_result_cache_key(
+    *,
+    resource_id: int,
+    format: str,
+    filters: Dict[str, Any],
+    like: Any,
+    fields: List[str],
+    columns: List[str],
+    sort: List[OrderBy],
+    limit: Optional[int],
+    offset: int,
+    cursor: Optional[str] = None,
+    geometry: Optional[Dict[str, Any]] = None,
+) -> Optional[Hashable]:
+    """Normalized key of a download, or None if the format is not cacheable."""
+    if format not in _CACHEABLE_FORMATS:
+        return None
+    return (
+        resource_id,
+        format,
+        json.dumps(filters, sort_keys=True, default=str),
+        json.dumps(like, sort_keys=True, default=str),
+        tuple(fields),
+        tuple(columns),
+        tuple((item.field, item.ascending) for item in sort),
+        limit,
+        offset,
+        cursor,
+        json.dumps(geometry, sort_keys=True),
+    )
+
+
+def get_resource_cache_ttl(resource_config: ResourceConfig) -> int:
+    if resource_config.cache_ttl is None:
+        return CONFIG.common_config.result_cache.ttl_seconds
+    return resource_config.cache_ttl
+
+
+def _set_validators(response: HttpResponse, etag: str, last_modified: int) -> None:
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+
+
+def _get_validators_key(key: Hashable) -> str:
+    """Key in Django cache of the validators of a download, with the current versions of all downloads and of its
+    resource."""
+    resource_version_key = f"{_VALIDATORS_VERSION_KEY}:{key[0]}"
+    versions = django_cache.get_many([_VALIDATORS_VERSION_KEY, resource_version_key])
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()
+    return f"gaodcore:validators:{versions.get(_VALIDATORS_VERSION_KEY)}:{versions.get(resource_version_key)}:{digest}"
+
+
+def _get_shared_validators(key: Hashable) -> Optional[Tuple[str, int]]:
+    """ETag and Last-Modified of a download kept by any worker, or None if they are not known."""
+    try:
+        return django_cache.get(_get_validators_key(key))
+    except DatabaseError as err:
+        logger.warning("Validators of a download could not be read: %s", err)
+        return None
+
+
+def _set_shared_validators(key: Hashable, etag: str, ttl: int) -> int:
+    """Keep the ETag of a rendered download for ttl seconds and return its Last-Modified: the time it was first kept
+    with that ETag, i.e. the time its data changed, as seen by this service."""
+    last_modified = int(time.time())
+    try:
+        validators_key = _get_validators_key(key)
+        previous = django_cache.get(validators_key)
+        if previous is not None and previous[0] == etag:
+            last_modified = previous[1]
+        if ttl > 0:
+            django_cache.set(validators_key, (etag, last_modified), ttl)
+    except DatabaseError as err:
+        logger.warning("Validators of a download could not be written: %s", err)
+    return last_modified
+
+
+def _change_validators_version(resource_ids: Optional[List[int]] = None) -> None:
+    if resource_ids is None:
+        keys = [_VALIDATORS_VERSION_KEY]
+    else:
+        keys = [f"{_VALIDATORS_VERSION_KEY}:{resource_id}" for resource_id in resource_ids]
+    try:
+        django_cache.set_many(dict.fromkeys(keys, time.time()), None)
+    except DatabaseError as err:
+        logger.warning("Validators of downloads could not be invalidated: %s", err)
+
+
+def _has_validators(request: HttpRequest) -> bool:
+    return "If-None-Match" in request.headers or "If-Modified-Since" in request.headers
+
+
+def get_cached_response(key: Optional[Hashable], request: HttpRequest) -> Optional[HttpResponse]:
+    """Response of a cached download, or None if it is not cached. If the client already has the download, the response
+    is a 304, also if only its validators are known."""
+    if key is None:
+        return None
+    cached = _RESULT_CACHE.get(key)
+    if cached is None:
+        validators = _get_shared_validators(key) if _has_validators(request) else None
+        if validators is None:
+            return None
+        etag, last_modified = validators
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            _set_validators(response, etag, last_modified)
+        return response
+    response = get_conditional_response(request, etag=cached.etag, last_modified=cached.last_modified)
+    if response is not None:
+        _set_validators(response, cached.etag, cached.last_modified)
+        return response
+
+    body, encoding = cached.body, cached.encoding
+    if encoding is not None and select_encoding(request, [encoding]) is None:
+        body, encoding = gzip.decompress(body), None
+    response = HttpResponse(body, content_type=cached.content_type, headers=cached.headers)
+    _set_validators(response, cached.etag, cached.last_modified)
+    if encoding is not None:
+        set_content_encoding(response, encoding)
+    if is_compressible(cached.content_type):
+        patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+
+def _compress_body(body: bytes, content_type: str) -> Tuple[bytes, Optional[str]]:
+    """Body to be cached and its encoding."""
+    config = CONFIG.common_config.compression
+    if config.enabled and len(body) >= config.min_size and is_compressible(content_type):
+        compressed = gzip.compress(body, compresslevel=config.gzip_level)
+        if len(compressed) < len(body):
+            return compressed, "gzip"
+    return body, None
+
+
+def cache_response(key: Optional[Hashable], response: HttpResponse, ttl: int, request: HttpRequest) -> HttpResponse:
+    """Add validators to response and keep its body and validators when it is rendered. Return a 304 instead if the
+    client already has the same body. Streaming and error responses are not modified."""
+    if key is None or response.streaming or response.status_code != 200:
+        return response
+
+    def finalize(rendered: HttpResponse) -> HttpResponse:
+        body = rendered.content
+        etag = quote_etag(hashlib.sha1(body).hexdigest())
+        last_modified = _set_shared_validators(
+            key, etag, max(ttl, CONFIG.common_config.result_cache.validator_ttl_seconds)
+        )
+        if ttl > 0:
+            content_type = rendered["Content-Type"]
+            cached_body, encoding = _compress_body(body, content_type)
+            if len(cached_body) <= CONFIG.common_config.result_cache.max_entry_bytes:
+                headers = {name: rendered[name] for name in _CACHED_HEADERS if rendered.has_header(name)}
+                _RESULT_CACHE.set(
+                    key, CachedDownload(cached_body, content_type, etag, last_modified, headers, encoding), ttl=ttl
+                )
+        _set_validators(rendered, etag, last_modified)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            _set_validators(not_modified, etag, last_modified)
+            return not_modified
+        return rendered
+
+    if isinstance(response, SimpleTemplateResponse) and not response.is_rendered:
+        # DRF responses are rendered after the view returns; the value returned by the callback replaces the response.
+        response.add_post_render_callback(finalize)
+        return response
+    return finalize(response)
+
+
+def get_count_cache_key(
+    *, resource_id: int, filters: Dict[str, Any], like: Any, bbox: Optional[Dict[str, Any]] = None
+) -> Hashable:
+    """Normalized key of the total count of a result."""
+    return (
+        resource_id,
+        json.dumps(filters, sort_keys=True, default=str),
+        json.dumps(like, sort_keys=True, default=str),
+        json.dumps(bbox, sort_keys=True),
+    )
+
+
+def get_cached_count(key: Hashable) -> Optional[Tuple[int, bool]]:
+    """Number of rows and if it is an estimation, or None if the count is not cached."""
+    return _COUNT_CACHE.get(key)
+
+
+def cache_count(key: Hashable, count: Tuple[int, bool]) -> None:
+    _COUNT_CACHE.set(key, count)
+
+
+def purge_result_cache(resource_ids: Optional[List[int]] = None) -> int:
+    """Remove cached downloads, validators and counts of resources, or all of them, in all workers. Return number of
+    removed downloads of this worker."""
+    _change_validators_version(resource_ids)
+    if resource_ids is None:
+        _COUNT_CACHE.invalidate()
+        return _RESULT_CACHE.invalidate()
+    resource_ids = set(resource_ids)
+    _COUNT_CACHE.invalidate(lambda key: key[0] in resource_ids)
+    return _RESULT_CACHE.invalidate(lambda key: key[0] in resource_ids)
+
+
+def get_result_cache_stats() -> Dict[str, int]:
+    """Hits, misses, entries and bytes of the result cache of this worker."""
+    return _RESULT_CACHE.stats()
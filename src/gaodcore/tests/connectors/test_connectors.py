@@ -249,7 +249,7 @@ def test_get_filter_operators2(filters, filters_args, expected):
 )
 def test_process_filters_args(filters_args, expected):
     result = process_filters_args(filters_args)
-    result = [str(r) for r in result]
+    result = [str(r.compile(compile_kwargs={"literal_binds": True})) for r in result]
     assert result == expected
 
 
@@ -0,0 +1,75 @@
+import csv
+import io
+
+import pytest
+from django.test.client import Client
+from sqlalchemy import create_engine, text
+
+
+def _get(client: Client, sqlite_resource, **params):
+    return client.get("/GA_OD_Core/aggregate", {"resource_id": sqlite_resource.id, **params})
+
+
+@pytest.fixture
+def more_cars(sqlite_resource):
+    engine = create_engine(sqlite_resource.connector_config.uri)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO cars VALUES (4, 'Fiat', 40, '2022-01-01'), (5, 'Ford', 30, NULL)"))
+    engine.dispose()
+    return sqlite_resource
+
+
+def test_aggregate_group_by(client: Client, more_cars):
+    response = _get(
+        client, more_cars, formato="json", group_by="name", aggregates="count,sum(weight),max(weight)", sort="name"
+    )
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {"name": "Fiat", "count": 2, "sum_weight": 100, "max_weight": 60},
+        {"name": "Ford", "count": 2, "sum_weight": 100, "max_weight": 70},
+        {"name": 'Seat, "Ibiza"', "count": 1, "sum_weight": 45.5, "max_weight": 45.5},
+    ]
+
+
+def test_aggregate_without_groups(client: Client, more_cars):
+    response = _get(client, more_cars, formato="json", aggregates="count(*),count(purchase),min(id)")
+
+    assert response.json() == [{"count": 5, "count_purchase": 3, "min_id": 1}]
+
+
+def test_aggregate_filters_sort_limit(client: Client, more_cars):
+    response = _get(
+        client,
+        more_cars,
+        formato="csv",
+        group_by="name",
+        aggregates="avg(weight)",
+        filters='{"id": {"$gt": 1}}',
+        sort="avg_weight desc",
+        limit=2,
+    )
+
+    assert list(csv.DictReader(io.StringIO(response.content.decode()))) == [
+        {"name": "Ford", "avg_weight": "50"},
+        {"name": 'Seat, "Ibiza"', "avg_weight": "45.5"},
+    ]
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {},
+        {"aggregates": "median(weight)"},
+        {"aggregates": "sum"},
+        {"aggregates": "sum(unknown)"},
+        {"aggregates": "sum(name)"},
+        {"aggregates": "avg(purchase)"},
+        {"aggregates": "sum(weight"},
+        {"group_by": "unknown"},
+        {"group_by": "name", "sort": "weight"},
+        {"group_by": "id", "aggregates": "count,count(*)"},
+    ],
+)
+def test_aggregate_invalid(client: Client, sqlite_resource, params):
+    assert _get(client, sqlite_resource, formato="json", **params).status_code == 400
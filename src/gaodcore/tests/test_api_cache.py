@@ -0,0 +1,117 @@
+import gc
+import os
+
+import pytest
+from pytest_httpserver import HTTPServer
+from sqlalchemy import text
+from werkzeug import Request, Response
+
+import connectors
+from connectors import _get_engine, dispose_engine, get_plan_resource_data, get_resource_query_plan, purge_api_cache
+
+CSV = "id,name\n1,Fiat\n2,Seat\n"
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def api_uri(httpserver: HTTPServer):
+    uri = httpserver.url_for("/cars.csv")
+    yield uri
+    dispose_engine(uri)
+
+
+def _etag_handler(requests: list, etag: str, body: str):
+    def handler(request: Request):
+        requests.append(request)
+        if request.headers.get("If-None-Match") == etag:
+            return Response(status=304, headers={"ETag": etag})
+        return Response(body, content_type="text/csv", headers={"ETag": etag})
+
+    return handler
+
+
+def _count(engine) -> int:
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT COUNT(*) FROM temporal_table")).scalar()
+
+
+def test_api_resource_is_cached(httpserver: HTTPServer, api_uri: str):
+    requests = []
+    httpserver.expect_request("/cars.csv").respond_with_handler(_etag_handler(requests, '"v1"', CSV))
+
+    engine = _get_engine(api_uri)
+
+    assert _get_engine(api_uri) is engine
+    assert _count(engine) == 2
+    assert len(requests) == 1
+
+
+def test_api_resource_not_modified(httpserver: HTTPServer, api_uri: str, monkeypatch):
+    requests = []
+    httpserver.expect_request("/cars.csv").respond_with_handler(_etag_handler(requests, '"v1"', CSV))
+    engine = _get_engine(api_uri)
+    now = connectors.monotonic()
+    monkeypatch.setattr(connectors, "monotonic", lambda: now + 301)
+
+    assert _get_engine(api_uri) is engine
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+    assert _get_engine(api_uri) is engine
+    assert len(requests) == 2
+
+
+def test_api_resource_modified(httpserver: HTTPServer, api_uri: str, monkeypatch):
+    requests = []
+    httpserver.expect_ordered_request("/cars.csv").respond_with_handler(_etag_handler(requests, '"v1"', CSV))
+    httpserver.expect_ordered_request("/cars.csv").respond_with_handler(
+        _etag_handler(requests, '"v2"', CSV + "3,Ford\n")
+    )
+    engine = _get_engine(api_uri)
+    path = connectors._API_CACHE.get(api_uri).path
+    now = connectors.monotonic()
+    monkeypatch.setattr(connectors, "monotonic", lambda: now + 301)
+
+    new_engine = _get_engine(api_uri)
+
+    assert new_engine is not engine
+    assert _count(new_engine) == 3
+    # Requests that are still using the old engine can read it until they finish.
+    assert _count(engine) == 2
+    del engine
+    gc.collect()
+    assert not os.path.exists(path)
+
+
+def test_evicted_api_resource_is_kept_while_used(httpserver: HTTPServer, api_uri: str):
+    httpserver.expect_request("/cars.csv").respond_with_data(CSV, content_type="text/csv")
+    plan = get_resource_query_plan(
+        uri=api_uri, object_location=None, object_location_schema=None, filters={}, like="", fields=[], sort=[]
+    )
+    path = connectors._API_CACHE.get(api_uri).path
+
+    purge_api_cache(api_uri)
+
+    assert [row["name"] for row in get_plan_resource_data(plan)] == ["Fiat", "Seat"]
+    del plan
+    gc.collect()
+    assert not os.path.exists(path)
+
+
+def test_dispose_api_resource(httpserver: HTTPServer, api_uri: str):
+    httpserver.expect_request("/cars.csv").respond_with_data(CSV, content_type="text/csv")
+    _get_engine(api_uri)
+    path = connectors._API_CACHE.get(api_uri).path
+
+    dispose_engine(api_uri)
+    gc.collect()
+
+    assert connectors._API_CACHE.get(api_uri) is None
+    assert not os.path.exists(path)
+
+
+def test_api_cache_disabled(httpserver: HTTPServer, api_uri: str, monkeypatch):
+    monkeypatch.setattr(connectors.CONFIG.common_config.api_cache, "max_size", 0)
+    httpserver.expect_request("/cars.csv").respond_with_data(CSV, content_type="text/csv")
+
+    assert _get_engine(api_uri) is not _get_engine(api_uri)
+    assert len(connectors._API_CACHE) == 0
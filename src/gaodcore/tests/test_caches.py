@@ -0,0 +1,119 @@
+import pytest
+from django.core.management import call_command
+from sqlalchemy import create_engine, text
+
+import caches
+import connectors
+from caches import TTLCache
+from connectors import _get_cached_model, _get_engine, dispose_engine, purge_model_cache
+
+
+class TestTTLCache:
+    def test_get_set(self):
+        cache = TTLCache(max_size=2, ttl=60)
+        cache.set("key", "value")
+
+        assert cache.get("key") == "value"
+        assert cache.get("other") is None
+
+    def test_expired(self, monkeypatch):
+        cache = TTLCache(max_size=2, ttl=60)
+        cache.set("key", "value")
+        now = caches.time.monotonic()
+        monkeypatch.setattr(caches.time, "monotonic", lambda: now + 61)
+
+        assert cache.get("key") is None
+        assert len(cache) == 0
+
+    def test_lru_eviction(self):
+        cache = TTLCache(max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_purge(self):
+        cache = TTLCache(max_size=3, ttl=60)
+        cache.set(("uri", "a"), 1)
+        cache.set(("uri", "b"), 2)
+        cache.set(("other", "a"), 3)
+
+        assert cache.purge(lambda key: key[0] == "uri") == 2
+        assert cache.get(("other", "a")) == 3
+        assert cache.purge() == 1
+
+    def test_on_evict(self):
+        evicted = []
+        cache = TTLCache(max_size=2, ttl=60, on_evict=lambda key, value: evicted.append((key, value)))
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("a", 1)
+        cache.set("a", 3)
+        cache.set("c", 4)
+        cache.purge()
+
+        assert evicted == [("a", 1), ("b", 2), ("a", 3), ("c", 4)]
+
+    @pytest.mark.django_db
+    def test_shared_invalidation(self, monkeypatch):
+        monkeypatch.setattr(caches, "_EPOCH_CHECK_INTERVAL", 0)
+        worker_1 = TTLCache(max_size=2, ttl=60, shared_key="test_shared_invalidation")
+        worker_2 = TTLCache(max_size=2, ttl=60, shared_key="test_shared_invalidation")
+        worker_1.set("key", 1)
+        worker_2.set("key", 2)
+        worker_2.get("key")
+
+        worker_1.invalidate()
+
+        assert worker_1.get("key") is None
+        assert worker_2.get("key") is None
+
+
+@pytest.fixture
+def sqlite_table_uri(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'model_cache.sqlite3'}"
+    engine = create_engine(uri)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE cars (id INTEGER PRIMARY KEY, name TEXT)"))
+    engine.dispose()
+    yield uri
+    purge_model_cache(uri)
+    dispose_engine(uri)
+
+
+@pytest.mark.django_db
+def test_model_is_cached(sqlite_table_uri: str, mocker):
+    reflect = mocker.spy(connectors, "_get_model")
+    engine = _get_engine(sqlite_table_uri)
+
+    model = _get_cached_model(uri=sqlite_table_uri, engine=engine, object_location="cars", object_location_schema=None)
+
+    assert _get_cached_model(
+        uri=sqlite_table_uri, engine=engine, object_location="cars", object_location_schema=None
+    ) is model
+    assert reflect.call_count == 1
+
+
+@pytest.mark.django_db
+def test_purge_model_cache(sqlite_table_uri: str):
+    engine = _get_engine(sqlite_table_uri)
+    model = _get_cached_model(uri=sqlite_table_uri, engine=engine, object_location="cars", object_location_schema=None)
+
+    assert purge_model_cache(sqlite_table_uri, object_location="cars") == 1
+    assert _get_cached_model(
+        uri=sqlite_table_uri, engine=engine, object_location="cars", object_location_schema=None
+    ) is not model
+
+
+@pytest.mark.django_db
+def test_purge_model_cache_command(sqlite_table_uri: str):
+    engine = _get_engine(sqlite_table_uri)
+    _get_cached_model(uri=sqlite_table_uri, engine=engine, object_location="cars", object_location_schema=None)
+
+    call_command("purge_model_cache")
+
+    assert len(connectors._MODEL_CACHE) == 0
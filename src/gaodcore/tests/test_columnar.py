@@ -0,0 +1,120 @@
+import datetime
+import decimal
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from django.test.client import Client
+from sqlalchemy import Column, Date, DateTime, Integer, Numeric, Text
+
+from columnar import get_arrow_schema, iter_record_batches
+from gaodcore.resource_stats import flush_resource_sizes
+from gaodcore_manager.models import ResourceSizeConfig
+from gaodcore_project.settings import CONFIG
+
+
+def _get(client: Client, sqlite_resource, url: str = "/GA_OD_Core/download", **params):
+    return client.get(url, {"resource_id": sqlite_resource.id, "sort": "id", **params})
+
+
+def test_arrow_schema():
+    columns = [
+        Column("id", Integer),
+        Column("price", Numeric(10, 2)),
+        Column("weight", Numeric),
+        Column("name", Text),
+        Column("updated", DateTime(timezone=True)),
+        Column("day", Date),
+    ]
+
+    schema = get_arrow_schema(columns, [column.name for column in columns])
+
+    assert schema.types == [
+        pa.int64(),
+        pa.decimal128(10, 2),
+        pa.float64(),
+        pa.string(),
+        pa.timestamp("us", tz="UTC"),
+        pa.date32(),
+    ]
+
+
+def test_record_batches():
+    columns = [Column("id", Integer), Column("price", Numeric(10, 2)), Column("name", Text)]
+    rows = [(1, decimal.Decimal("1.50"), " a\x00"), (2, None, "b"), (3, 4, None)]
+
+    batches = list(iter_record_batches(rows, columns, ["id", "price", "name"], batch_rows=2))
+
+    assert [batch.num_rows for batch in batches] == [2, 1]
+    assert pa.Table.from_batches(batches).to_pylist() == [
+        {"id": 1, "price": decimal.Decimal("1.50"), "name": "a"},
+        {"id": 2, "price": None, "name": "b"},
+        {"id": 3, "price": decimal.Decimal("4.00"), "name": None},
+    ]
+
+
+def test_download_parquet(client: Client, sqlite_resource, monkeypatch):
+    monkeypatch.setattr(CONFIG.common_config.streaming, "row_group_size", 2)
+
+    response = _get(client, sqlite_resource, formato="parquet")
+    parquet = pq.ParquetFile(io.BytesIO(response.content))
+
+    assert response["content-type"] == "application/vnd.apache.parquet"
+    assert 'filename="cars.parquet"' in response["content-disposition"]
+    assert parquet.metadata.num_row_groups == 2
+    assert parquet.schema_arrow.types == [pa.int64(), pa.string(), pa.float64(), pa.date32()]
+    assert parquet.read().to_pylist() == [
+        {"id": 1, "name": "Fiat", "weight": 60.0, "purchase": datetime.date(2020, 1, 1)},
+        {"id": 2, "name": 'Seat, "Ibiza"', "weight": 45.5, "purchase": None},
+        {"id": 3, "name": "Ford", "weight": 70.0, "purchase": datetime.date(2021, 5, 3)},
+    ]
+    flush_resource_sizes()
+    size = ResourceSizeConfig.objects.get(resource_id=sqlite_resource)
+    assert size.registries == 3
+    assert size.size == len(response.content)
+
+
+def test_download_arrow(client: Client, sqlite_resource):
+    response = _get(
+        client, sqlite_resource, url="/GA_OD_Core/download.arrow", fields="id,name", columns="key,car", stream="true"
+    )
+    table = pa.ipc.open_file(io.BytesIO(b"".join(response.streaming_content))).read_all()
+
+    assert response["content-type"] == "application/vnd.apache.arrow.file"
+    assert table.to_pylist() == [
+        {"key": 1, "car": "Fiat"},
+        {"key": 2, "car": 'Seat, "Ibiza"'},
+        {"key": 3, "car": "Ford"},
+    ]
+
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_download_larger_than_cache_entry_is_streamed(client: Client, sqlite_resource, monkeypatch, format: str):
+    monkeypatch.setattr(CONFIG.common_config.result_cache, "max_entry_bytes", 16)
+
+    response = _get(client, sqlite_resource, formato=format)
+
+    assert response.streaming
+    buffer = pa.BufferReader(b"".join(response.streaming_content))
+    table = pq.read_table(buffer) if format == "parquet" else pa.ipc.open_file(buffer).read_all()
+    assert table.num_rows == 3
+
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_empty_download(client: Client, sqlite_resource, format: str):
+    response = _get(client, sqlite_resource, formato=format, filters='{"id": 4}')
+
+    buffer = pa.BufferReader(response.content)
+    table = pq.read_table(buffer) if format == "parquet" else pa.ipc.open_file(buffer).read_all()
+    assert table.num_rows == 0
+    assert table.column_names == ["id", "name", "weight", "purchase"]
+
+
+def test_aggregate_parquet(client: Client, sqlite_resource):
+    response = client.get(
+        "/GA_OD_Core/aggregate.parquet", {"resource_id": sqlite_resource.id, "aggregates": "count"}
+    )
+
+    assert response["content-type"] == "application/vnd.apache.parquet"
+    assert pq.read_table(io.BytesIO(response.content)).to_pylist() == [{"count": 3}]
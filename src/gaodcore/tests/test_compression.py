@@ -0,0 +1,113 @@
+import csv
+import gzip
+import io
+import json
+import zlib
+
+import pytest
+from django.test import RequestFactory
+from django.test.client import Client
+
+import compression
+from compression import compress_stream, select_encoding
+from gaodcore.result_cache import purge_result_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_result_cache(db):
+    purge_result_cache()
+    yield
+    purge_result_cache()
+
+
+@pytest.fixture(autouse=True)
+def compress_small_responses(monkeypatch):
+    monkeypatch.setattr(compression.CONFIG.common_config.compression, "min_size", 0)
+
+
+def _get(client: Client, sqlite_resource, accept_encoding: str = "gzip", headers=None, **params):
+    return client.get(
+        "/GA_OD_Core/download",
+        {"resource_id": sqlite_resource.id, "sort": "id", **params},
+        HTTP_ACCEPT_ENCODING=accept_encoding,
+        **(headers or {}),
+    )
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, encoding",
+    [
+        ("gzip, deflate", "gzip"),
+        ("deflate;q=1, gzip;q=0.5", "gzip"),
+        ("gzip;q=0", None),
+        ("identity", None),
+        ("*", "gzip"),
+        ("", None),
+    ],
+)
+def test_select_encoding(accept_encoding: str, encoding: str):
+    request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+
+    assert select_encoding(request) == encoding
+
+
+def test_compress_stream_is_incremental():
+    decompressor = zlib.decompressobj(31)
+    chunks = compress_stream(iter([b"a" * 1000, b"b" * 1000]), "gzip")
+
+    assert decompressor.decompress(next(chunks)) == b"a" * 1000
+    assert decompressor.decompress(b"".join(chunks)) == b"b" * 1000
+
+
+@pytest.mark.parametrize("encoding, module", [("br", "brotli"), ("zstd", "zstandard")])
+def test_optional_encodings(encoding: str, module: str):
+    pytest.importorskip(module)
+    request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=f"gzip, {encoding}")
+
+    assert select_encoding(request) == encoding
+    assert b"".join(compress_stream(iter([b"a" * 1000]), encoding))
+
+
+def test_compress_download(client: Client, sqlite_resource):
+    plain = _get(client, sqlite_resource, accept_encoding="", formato="json")
+    compressed = _get(client, sqlite_resource, formato="json")
+
+    assert "Content-Encoding" not in plain
+    assert compressed["Content-Encoding"] == "gzip"
+    assert compressed["ETag"].startswith('W/"')
+    assert "Accept-Encoding" in compressed["Vary"]
+    assert json.loads(gzip.decompress(compressed.content)) == plain.json()
+
+
+def test_compress_streaming_download(client: Client, sqlite_resource):
+    response = _get(client, sqlite_resource, formato="csv", stream="true")
+
+    assert response["Content-Encoding"] == "gzip"
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(b"".join(response.streaming_content)).decode())))
+    assert [row["name"] for row in rows] == ["Fiat", 'Seat, "Ibiza"', "Ford"]
+
+
+def test_compressed_formats_are_not_compressed(client: Client, sqlite_resource):
+    assert "Content-Encoding" not in _get(client, sqlite_resource, formato="xlsx")
+
+
+@pytest.mark.parametrize("url", ["/GA_OD_Core_admin/admin/login/", "/GA_OD_Core/download?resource_id=1"])
+def test_html_is_not_compressed(client: Client, url: str):
+    response = client.get(url, HTTP_ACCEPT="text/html", HTTP_ACCEPT_ENCODING="gzip")
+
+    assert response["Content-Type"].startswith("text/html")
+    assert "Content-Encoding" not in response
+
+
+def test_cached_download_is_stored_compressed(client: Client, sqlite_resource, monkeypatch):
+    first = _get(client, sqlite_resource, accept_encoding="", formato="json")
+    monkeypatch.setattr(compression, "compress", None)
+
+    compressed = _get(client, sqlite_resource, formato="json")
+    plain = _get(client, sqlite_resource, accept_encoding="", formato="json")
+    not_modified = _get(client, sqlite_resource, formato="json", headers={"HTTP_IF_NONE_MATCH": compressed["ETag"]})
+
+    assert compressed["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.content) == first.content
+    assert plain.content == first.content
+    assert not_modified.status_code == 304
@@ -0,0 +1,108 @@
+import pytest
+from django.test.client import Client
+from geoalchemy2 import Geography, Geometry
+from sqlalchemy import Column, Integer, MetaData, Table
+from sqlalchemy.dialects import postgresql
+
+from connectors import ResourceQueryPlan, _get_bbox_clause, _get_geojson_geometry
+
+_BBOX = (-1.95, 41.55, -0.55, 41.75)
+
+
+def _compile(clause) -> str:
+    return str(clause.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def _get_table(geometry_type) -> Table:
+    return Table("places", MetaData(), Column("id", Integer, primary_key=True), Column("geom", geometry_type))
+
+
+def _get_plan(table: Table, **kwargs) -> ResourceQueryPlan:
+    return ResourceQueryPlan(
+        uri="postgresql://localhost/test",
+        scheme="postgresql",
+        engine=None,
+        model=table,
+        columns=list(table.columns),
+        geometry_column=table.c.geom,
+        filters={},
+        filter_clauses=[],
+        sort_clauses=[],
+        **kwargs,
+    )
+
+
+class TestBbox:
+    def test_same_srid(self):
+        table = _get_table(Geometry(srid=4326))
+
+        assert _compile(_get_bbox_clause(table.c.geom, _BBOX, 4326)) == (
+            "ST_Intersects(places.geom, ST_MakeEnvelope(-1.95, 41.55, -0.55, 41.75, 4326))"
+        )
+
+    def test_transform_envelope(self):
+        table = _get_table(Geometry(srid=25830))
+
+        assert _compile(_get_bbox_clause(table.c.geom, _BBOX, 4326)) == (
+            "ST_Intersects(places.geom, ST_Transform(ST_MakeEnvelope(-1.95, 41.55, -0.55, 41.75, 4326), 25830))"
+        )
+
+    def test_unknown_srid(self):
+        table = _get_table(Geometry())
+
+        assert "ST_Transform" not in _compile(_get_bbox_clause(table.c.geom, _BBOX, 25830))
+
+    def test_geography(self):
+        table = _get_table(Geography())
+
+        assert _compile(_get_bbox_clause(table.c.geom, _BBOX, 4326)) == (
+            "ST_Intersects(places.geom, CAST(ST_MakeEnvelope(-1.95, 41.55, -0.55, 41.75, 4326) AS geography))"
+        )
+
+
+class TestGeoJSONGeometry:
+    def test_default(self):
+        plan = _get_plan(_get_table(Geometry(srid=4326)))
+
+        assert _compile(_get_geojson_geometry(plan)) == "ST_AsGeoJSON(places.geom)"
+
+    def test_precision_simplify(self):
+        plan = _get_plan(_get_table(Geometry(srid=4326)), geometry_precision=5, geometry_simplify=0.001)
+
+        assert _compile(_get_geojson_geometry(plan)) == (
+            "ST_AsGeoJSON(ST_SimplifyPreserveTopology(places.geom, 0.001), 5)"
+        )
+
+    def test_simplify_geography(self):
+        plan = _get_plan(_get_table(Geography()), geometry_simplify=0.001)
+
+        assert _compile(_get_geojson_geometry(plan)) == (
+            "ST_AsGeoJSON(ST_SimplifyPreserveTopology(CAST(places.geom AS geometry), 0.001))"
+        )
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"bbox": "1,2,3"},
+        {"bbox": "a,b,c,d"},
+        {"bbox": "3,2,1,4"},
+        {"bbox": "1,2,3,inf"},
+        {"precision": "16"},
+        {"precision": "a"},
+        {"simplify": "-1"},
+    ],
+)
+def test_invalid_geometry_params(client: Client, sqlite_resource, params):
+    response = client.get("/GA_OD_Core/download", {"resource_id": sqlite_resource.id, "formato": "json", **params})
+
+    assert response.status_code == 400
+
+
+def test_geometry_params_without_geometry(client: Client, sqlite_resource):
+    response = client.get(
+        "/GA_OD_Core/download", {"resource_id": sqlite_resource.id, "formato": "json", "bbox": "-1,41,0,42"}
+    )
+
+    assert response.status_code == 400
+    assert "geometry" in str(response.content)
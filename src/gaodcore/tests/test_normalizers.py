@@ -0,0 +1,70 @@
+import datetime
+import decimal
+import uuid
+
+import pytest
+from sqlalchemy import Boolean, Column, Date, DateTime, Float, Integer, Numeric, String, Text, Uuid
+from sqlalchemy.types import NullType
+
+from normalizers import (
+    get_feature_normalizer,
+    get_row_normalizer,
+    normalize_feature_value,
+    normalize_value,
+    sanitize_control_charcters,
+    sanitize_text,
+)
+
+COLUMNS = [
+    Column("text", Text),
+    Column("string", String(10)),
+    Column("integer", Integer),
+    Column("numeric", Numeric),
+    Column("float", Float),
+    Column("uuid", Uuid),
+    Column("boolean", Boolean),
+    Column("date", Date),
+    Column("datetime", DateTime),
+    Column("unknown", NullType),
+]
+
+ROWS = [
+    (
+        " a\x00b\nc\x7f ",
+        "\tclean\r",
+        1,
+        decimal.Decimal("60.000"),
+        45.5,
+        uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        True,
+        datetime.date(2020, 1, 2),
+        datetime.datetime(2020, 1, 2, 3, 4, 5, 123456),
+        b" bytes ",
+    ),
+    (None, "ñandú ", None, decimal.Decimal("1.5"), 3.0, None, None, None, None, 7.0),
+    # Values whose type does not match the reflected type.
+    (decimal.Decimal("2.0"), 5, "  3 ", "x\n", "y", "12345678-1234-5678-1234-567812345678", 1, "2020", "d ", None),
+]
+
+
+@pytest.mark.parametrize("text", ["", " a ", "a\x00\x08\x0b\x0c\x0e\x1f\x7f\nb", "\t\r keep é​", "🚀\x01"])
+def test_sanitize_text(text: str):
+    assert sanitize_text(text) == sanitize_control_charcters(text)
+
+
+@pytest.mark.parametrize("row", ROWS)
+def test_row_normalizer(row: tuple):
+    assert get_row_normalizer(COLUMNS)(row) == tuple(normalize_value(value) for value in row)
+
+
+@pytest.mark.parametrize("row", ROWS)
+def test_feature_normalizer(row: tuple):
+    assert get_feature_normalizer(COLUMNS)(row) == tuple(normalize_feature_value(value) for value in row)
+
+
+def test_normalize_value():
+    assert normalize_value(decimal.Decimal("60.0")) == 60
+    assert normalize_value(decimal.Decimal("45.5")) == decimal.Decimal("45.5")
+    assert normalize_value(float("inf")) == float("inf")
+    assert normalize_feature_value(45.5) == "45.5"
+    assert normalize_feature_value(uuid.UUID(int=1)) == "00000000-0000-0000-0000-000000000001"
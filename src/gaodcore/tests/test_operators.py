@@ -1,11 +1,14 @@
+import datetime
+
 import pytest
 from django.test import RequestFactory
 from django.test.client import Client
 from rest_framework.request import Request
-from sqlalchemy.sql.elements import TextClause
+from sqlalchemy import column
+from sqlalchemy.sql.elements import BinaryExpression
 
 from connectors import _get_filter_operators
-from gaodcore.operators import get_function_for_operator
+from gaodcore.operators import get_function_for_operator, process_filters_args, process_like_args
 from gaodcore.views import DownloadView
 
 
@@ -25,23 +28,26 @@ class TestTranslateFilter:
     def test_translate_filter_gt(self):
         filter_field = {"key1": {"$gt": 10}}
         filter = filter_field["key1"]
-        result = get_function_for_operator("$gt")("key1", filter, "mysql")
-        assert isinstance(result, TextClause)
-        assert result.text == "key1 > 10"
+        result = get_function_for_operator("$gt")(column("key1"), filter, "mysql")
+        assert isinstance(result, BinaryExpression)
+        assert str(result) == "key1 > :key1_1"
+        assert result.right.value == 10
 
     def test_translate_filter_lt(self):
         filter_field = {"key1": {"$lt": 10}}
         filter = filter_field["key1"]
-        result = get_function_for_operator("$lt")("key1", filter, "mysql")
-        assert isinstance(result, TextClause)
-        assert result.text == "key1 < 10"
+        result = get_function_for_operator("$lt")(column("key1"), filter, "mysql")
+        assert isinstance(result, BinaryExpression)
+        assert str(result) == "key1 < :key1_1"
+        assert result.right.value == 10
 
     def test_translate_filter_eq(self):
         filter_field = {"key1": {"$eq": 10}}
         filter = filter_field["key1"]
-        result = get_function_for_operator("$eq")("key1", filter, "mysql")
-        assert isinstance(result, TextClause)
-        assert result.text == "key1 = 10"
+        result = get_function_for_operator("$eq")(column("key1"), filter, "mysql")
+        assert isinstance(result, BinaryExpression)
+        assert str(result) == "key1 = :key1_1"
+        assert result.right.value == 10
 
 
 class TestGetFilterOperators:
@@ -157,3 +163,128 @@ class TestDownloadViewWithOperators:
         )
         response = download_response.json()
         assert len(response) == 0
+
+
+class TestBindParameters:
+    def _get_ids(self, client: Client, sqlite_resource, filters: str):
+        response = client.get(
+            "/GA_OD_Core/download",
+            {"resource_id": sqlite_resource.id, "fields": "id", "sort": "id", "filters": filters},
+        )
+        return [row["id"] for row in response.json()]
+
+    def test_date_filter(self, client: Client, sqlite_resource):
+        assert self._get_ids(client, sqlite_resource, '{"purchase": {"$gt": "2020-06-01"}}') == [3]
+        assert self._get_ids(client, sqlite_resource, '{"purchase": {"$lte": "2020-01-01T00:00:00"}}') == [1]
+
+    def test_quoted_value(self, client: Client, sqlite_resource):
+        assert self._get_ids(client, sqlite_resource, '{"name": {"$eq": "Seat, \\"Ibiza\\""}}') == [2]
+        assert self._get_ids(client, sqlite_resource, '{"name": {"$eq": "x\' OR \'1\'=\'1"}}') == []
+
+    def test_not_filter(self, client: Client, sqlite_resource):
+        assert self._get_ids(client, sqlite_resource, '{"$not": {"id": {"$gt": 1}}}') == [1]
+
+    def test_unknown_field(self, client: Client, sqlite_resource):
+        response = client.get(
+            "/GA_OD_Core/download",
+            {"resource_id": sqlite_resource.id, "filters": '{"1=1 OR id": {"$gt": 1}}'},
+        )
+
+        assert response.status_code == 400
+
+    def test_same_statement(self):
+        first = process_filters_args([{"id": {"$gt": 1}}], "oracle+oracledb")[0]
+        second = process_filters_args([{"id": {"$gt": 2}}], "oracle+oracledb")[0]
+
+        assert str(first) == str(second)
+
+    def test_oracle_date_bind(self):
+        clause = process_filters_args([{"purchase": {"$gt": "2020-06-01T10:00:00"}}], "oracle+oracledb")[0]
+
+        assert clause.right.value == datetime.datetime(2020, 6, 1, 10)
+
+
+class TestSetOperators:
+    def _get_ids(self, client: Client, sqlite_resource, filters: str):
+        response = client.get(
+            "/GA_OD_Core/download",
+            {"resource_id": sqlite_resource.id, "fields": "id", "sort": "id", "filters": filters},
+        )
+        assert response.status_code == 200
+        return [row["id"] for row in response.json()]
+
+    def test_in(self, client: Client, sqlite_resource):
+        assert self._get_ids(client, sqlite_resource, '{"name": {"$in": ["Fiat", "Ford"]}}') == [1, 3]
+        assert self._get_ids(client, sqlite_resource, '{"name": {"$in": []}}') == []
+
+    def test_nin(self, client: Client, sqlite_resource):
+        assert self._get_ids(client, sqlite_resource, '{"name": {"$nin": ["Fiat", "Ford"]}}') == [2]
+
+    def test_between(self, client: Client, sqlite_resource):
+        assert self._get_ids(client, sqlite_resource, '{"weight": {"$between": [45.5, 60]}}') == [1, 2]
+        assert self._get_ids(
+            client, sqlite_resource, '{"purchase": {"$between": ["2020-01-01", "2020-12-31"]}}'
+        ) == [1]
+
+    def test_like(self, client: Client, sqlite_resource):
+        assert self._get_ids(client, sqlite_resource, '{"name": {"$like": "F%"}}') == [1, 3]
+
+    def test_isnull(self, client: Client, sqlite_resource):
+        assert self._get_ids(client, sqlite_resource, '{"purchase": {"$isnull": true}}') == [2]
+        assert self._get_ids(client, sqlite_resource, '{"purchase": {"$isnull": false}}') == [1, 3]
+
+    @pytest.mark.parametrize(
+        "filters",
+        [
+            '{"id": {"$in": 1}}',
+            '{"id": {"$between": [1]}}',
+            '{"id": {"$like": 1}}',
+            '{"id": {"$isnull": "yes"}}',
+        ],
+    )
+    def test_invalid_values(self, client: Client, sqlite_resource, filters: str):
+        response = client.get("/GA_OD_Core/download", {"resource_id": sqlite_resource.id, "filters": filters})
+
+        assert response.status_code == 400
+
+    def test_oracle_in_chunks(self):
+        clause = process_filters_args([{"id": {"$in": list(range(2500))}}], "oracle+oracledb")[0]
+
+        assert str(clause).count("IN") == 3
+
+
+class TestLike:
+    def _get_ids(self, client: Client, sqlite_resource, like: str):
+        response = client.get(
+            "/GA_OD_Core/download",
+            {"resource_id": sqlite_resource.id, "fields": "id", "sort": "id", "like": like},
+        )
+        assert response.status_code == 200
+        return [row["id"] for row in response.json()]
+
+    def test_contains(self, client: Client, sqlite_resource):
+        assert self._get_ids(client, sqlite_resource, '{"name": "IBIZA"}') == [2]
+        assert self._get_ids(client, sqlite_resource, '{"name": {"$contains": "f"}}') == [1, 3]
+
+    def test_value_with_comma_and_colon(self, client: Client, sqlite_resource):
+        assert self._get_ids(client, sqlite_resource, '{"name": "Seat, \\"Ibiza"}') == [2]
+        assert self._get_ids(client, sqlite_resource, '{"name": "a:b"}') == []
+
+    def test_several_fields(self, client: Client, sqlite_resource):
+        assert self._get_ids(client, sqlite_resource, '{"name": "a", "id": "2"}') == [2]
+
+    def test_startswith(self, client: Client, sqlite_resource):
+        assert self._get_ids(client, sqlite_resource, '{"name": {"$startswith": "F"}}') == [1, 3]
+        assert self._get_ids(client, sqlite_resource, '{"name": {"$startswith": "F_"}}') == []
+
+    def test_startswith_clause(self):
+        clause = process_like_args({"name": {"$startswith": "50%_/"}})[0]
+
+        assert str(clause) == "name LIKE :name_1 ESCAPE '/'"
+        assert clause.right.value == "50/%/_//%"
+
+    @pytest.mark.parametrize("like", ['{"unknown": "a"}', '{"name": {"$regex": "a"}}', '{"name": {"$startswith": []}}'])
+    def test_invalid(self, client: Client, sqlite_resource, like: str):
+        response = client.get("/GA_OD_Core/download", {"resource_id": sqlite_resource.id, "like": like})
+
+        assert response.status_code == 400
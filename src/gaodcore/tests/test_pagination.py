@@ -0,0 +1,135 @@
+import datetime
+import decimal
+import re
+
+import pytest
+from django.test.client import Client
+
+import connectors
+from connectors import CursorError, _decode_cursor, _encode_cursor
+from gaodcore import views
+from gaodcore.result_cache import purge_result_cache
+
+
+def _get(client: Client, url: str = "/GA_OD_Core/download", **params):
+    return client.get(url, params)
+
+
+def _next_url(response):
+    match = re.match(r'<(.*)>; rel="next"', response.get("Link", ""))
+    return match and match.group(1)
+
+
+def _get_pages(client: Client, sqlite_resource, **params):
+    response = _get(client, resource_id=sqlite_resource.id, formato="json", cursor="", **params)
+    pages = [response.json()]
+    while _next_url(response):
+        response = client.get(_next_url(response))
+        pages.append(response.json())
+    return pages
+
+
+def test_cursor_primary_key(client: Client, sqlite_resource):
+    pages = _get_pages(client, sqlite_resource, limit=2, fields="id")
+
+    assert pages == [[{"id": 1}, {"id": 2}], [{"id": 3}]]
+
+
+def test_cursor_sort_desc(client: Client, sqlite_resource):
+    pages = _get_pages(client, sqlite_resource, limit=1, sort="weight desc", fields="name")
+
+    assert pages == [[{"name": "Ford"}], [{"name": "Fiat"}], [{"name": 'Seat, "Ibiza"'}]]
+
+
+def test_cursor_filters(client: Client, sqlite_resource):
+    pages = _get_pages(client, sqlite_resource, limit=1, fields="id", filters='{"name": "Ford"}')
+
+    assert pages == [[{"id": 3}]]
+
+
+def test_cursor_exact_page(client: Client, sqlite_resource):
+    pages = _get_pages(client, sqlite_resource, limit=3, fields="id")
+
+    assert pages == [[{"id": 1}, {"id": 2}, {"id": 3}]]
+
+
+def test_cursor_with_offset(client: Client, sqlite_resource):
+    response = _get(client, resource_id=sqlite_resource.id, cursor="", offset=1)
+
+    assert response.status_code == 400
+
+
+def test_invalid_cursor(client: Client, sqlite_resource):
+    response = _get(client, resource_id=sqlite_resource.id, formato="json", cursor="not a cursor")
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("sort", ["purchase", "purchase desc"])
+def test_cursor_null_values(client: Client, sqlite_resource, sort: str):
+    pages = _get_pages(client, sqlite_resource, limit=1, sort=f"{sort},name", fields="id")
+
+    ids = [3, 1] if sort.endswith("desc") else [1, 3]
+    assert pages == [[{"id": ids[0]}], [{"id": ids[1]}], [{"id": 2}]]
+
+
+def test_cursor_single_query(client: Client, sqlite_resource, mocker):
+    query = mocker.spy(connectors, "_get_plan_query")
+    response = _get(client, resource_id=sqlite_resource.id, formato="csv", cursor="", limit=1, sort="weight")
+
+    assert response.status_code == 200
+    assert _next_url(response)
+    assert query.call_count == 1
+
+
+def test_cursor_codec():
+    values = [1, "a,b", decimal.Decimal("45.5"), datetime.date(2020, 1, 1), datetime.datetime(2020, 1, 1, 12, 30), None]
+
+    assert _decode_cursor(_encode_cursor(values)) == values
+    with pytest.raises(CursorError):
+        _encode_cursor([b"bytes"])
+
+
+@pytest.fixture
+def empty_count_cache(db):
+    purge_result_cache()
+    yield
+    purge_result_cache()
+
+
+def test_total_count(client: Client, sqlite_resource, empty_count_cache):
+    response = _get(client, resource_id=sqlite_resource.id, formato="json", count="true", limit=1)
+
+    assert response["X-Total-Count"] == "3"
+    assert not response.has_header("X-Total-Count-Estimated")
+    assert len(response.json()) == 1
+
+
+def test_total_count_filters(client: Client, sqlite_resource, empty_count_cache):
+    response = _get(
+        client,
+        resource_id=sqlite_resource.id,
+        formato="csv",
+        count="exact",
+        cursor="",
+        limit=1,
+        filters='{"name": "Ford"}',
+    )
+
+    assert response["X-Total-Count"] == "1"
+
+
+def test_total_count_is_cached(client: Client, sqlite_resource, empty_count_cache, mocker):
+    count = mocker.spy(views, "count_plan_total_rows")
+    _get(client, resource_id=sqlite_resource.id, formato="json", count="true", limit=1)
+    response = _get(client, resource_id=sqlite_resource.id, formato="csv", count="true", limit=2)
+
+    assert response["X-Total-Count"] == "3"
+    assert count.call_count == 1
+
+
+def test_total_count_not_requested(client: Client, sqlite_resource, empty_count_cache):
+    response = _get(client, resource_id=sqlite_resource.id, formato="json")
+
+    assert not response.has_header("X-Total-Count")
+    assert _get(client, resource_id=sqlite_resource.id, formato="json", count="maybe").status_code == 400
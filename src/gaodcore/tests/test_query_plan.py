@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+import pytest
+from rest_framework.exceptions import ValidationError
+from sqlalchemy import create_engine, text
+
+import connectors
+from connectors import (
+    OrderBy,
+    dispose_engine,
+    get_plan_resource_data,
+    get_resource_query_plan,
+    purge_model_cache,
+)
+
+
+@pytest.fixture
+def sqlite_table_uri(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'query_plan.sqlite3'}"
+    engine = create_engine(uri)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE cars (id INTEGER PRIMARY KEY, name TEXT, weight NUMERIC)"))
+        conn.execute(text("INSERT INTO cars VALUES (1, 'Fiat', 60.0), (2, 'Seat', 45.5), (3, 'Ford', 70)"))
+    engine.dispose()
+    yield uri
+    purge_model_cache(uri)
+    dispose_engine(uri)
+
+
+def _get_plan(uri: str, **kwargs):
+    params = dict(
+        uri=uri,
+        object_location="cars",
+        object_location_schema=None,
+        filters={},
+        like="",
+        fields=[],
+        sort=[],
+    )
+    params.update(kwargs)
+    return get_resource_query_plan(**params)
+
+
+@pytest.mark.django_db
+def test_plan_reflects_once(sqlite_table_uri: str, mocker):
+    reflect = mocker.spy(connectors, "_get_model")
+
+    plan = _get_plan(sqlite_table_uri, filters={"name": {"$ne": "Ford"}}, sort=[OrderBy(field="id", ascending=False)])
+    data = list(get_plan_resource_data(plan))
+
+    assert data == [{"id": 2, "name": "Seat", "weight": Decimal("45.5")}, {"id": 1, "name": "Fiat", "weight": 60}]
+    assert not plan.is_geojson
+    assert reflect.call_count == 1
+
+
+@pytest.mark.django_db
+def test_plan_fields_limit_offset(sqlite_table_uri: str):
+    plan = _get_plan(sqlite_table_uri, fields=["name"], sort=[OrderBy(field="id", ascending=True)], limit=1, offset=1)
+
+    assert list(get_plan_resource_data(plan)) == [{"name": "Seat"}]
+
+
+@pytest.mark.django_db
+def test_plan_sort_field_not_exists(sqlite_table_uri: str):
+    with pytest.raises(ValidationError):
+        _get_plan(sqlite_table_uri, sort=[OrderBy(field="color", ascending=True)])
+
+
+@pytest.mark.django_db
+def test_count_plan_rows(sqlite_table_uri: str):
+    plan = _get_plan(sqlite_table_uri, filters={"name": {"$ne": "Ford"}})
+
+    assert connectors.count_plan_rows(plan) == 2
+    assert connectors.count_plan_rows(_get_plan(sqlite_table_uri, offset=1)) == 2
+
+
+@pytest.mark.django_db
+def test_count_plan_rows_bounded(sqlite_table_uri: str):
+    plan = _get_plan(sqlite_table_uri)
+
+    assert connectors.count_plan_rows(plan, max_rows=1) == 2
+    assert connectors.count_plan_rows(_get_plan(sqlite_table_uri, limit=1), max_rows=1) == 1
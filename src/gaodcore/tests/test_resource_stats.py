@@ -0,0 +1,44 @@
+from django.test.client import Client
+
+from gaodcore.resource_stats import flush_resource_sizes, record_resource_size
+from gaodcore_manager.models import ResourceSizeConfig
+
+
+def test_download_does_not_write(client: Client, sqlite_resource, django_assert_num_queries):
+    response = client.get("/GA_OD_Core/download.xml", {"resource_id": sqlite_resource.id})
+
+    assert not ResourceSizeConfig.objects.exists()
+    with django_assert_num_queries(2):
+        assert flush_resource_sizes() == 1
+    size = ResourceSizeConfig.objects.get(resource_id=sqlite_resource)
+    assert size.registries == 3
+    assert size.size == len(response.content)
+
+
+def test_csv_size(client: Client, sqlite_resource):
+    response = client.get("/GA_OD_Core/download.csv", {"resource_id": sqlite_resource.id, "limit": 2})
+    flush_resource_sizes()
+
+    size = ResourceSizeConfig.objects.get(resource_id=sqlite_resource)
+    assert size.registries == 2
+    assert size.size == len(response.content)
+
+
+def test_flush_upsert(sqlite_resource):
+    record_resource_size(sqlite_resource.id, 3, 100)
+    record_resource_size(sqlite_resource.id, 2, 50)
+    flush_resource_sizes()
+    record_resource_size(sqlite_resource.id, 1, 10)
+    flush_resource_sizes()
+
+    size = ResourceSizeConfig.objects.get(resource_id=sqlite_resource)
+    assert (size.registries, size.size) == (1, 10)
+    assert flush_resource_sizes() == 0
+
+
+def test_flush_removed_resource(sqlite_resource):
+    record_resource_size(sqlite_resource.id + 1, 3, 100)
+    record_resource_size(sqlite_resource.id, 3, 100)
+
+    assert flush_resource_sizes() == 1
+    assert list(ResourceSizeConfig.objects.values_list("resource_id", flat=True)) == [sqlite_resource.id]
@@ -0,0 +1,167 @@
+import time
+
+import pytest
+from django.contrib.auth.models import User
+from django.test.client import Client
+from sqlalchemy import create_engine, text
+
+from gaodcore import result_cache, views
+from gaodcore.result_cache import get_result_cache_stats, purge_result_cache
+from gaodcore_project.settings import CONFIG
+
+
+@pytest.fixture(autouse=True)
+def empty_result_cache(db):
+    purge_result_cache()
+    yield
+    purge_result_cache()
+
+
+def _get(client: Client, sqlite_resource, headers=None, **params):
+    return client.get(
+        "/GA_OD_Core/download", {"resource_id": sqlite_resource.id, "sort": "id", **params}, **(headers or {})
+    )
+
+
+def _insert_car(sqlite_resource):
+    engine = create_engine(sqlite_resource.connector_config.uri)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO cars VALUES (4, 'Renault', 50, NULL)"))
+    engine.dispose()
+
+
+def test_download_is_cached(client: Client, sqlite_resource):
+    first = _get(client, sqlite_resource, formato="json")
+    _insert_car(sqlite_resource)
+    second = _get(client, sqlite_resource, formato="json")
+
+    assert second.content == first.content
+    assert len(second.json()) == 3
+    assert second["content-type"] == first["content-type"]
+
+
+def test_cache_key_parameters(client: Client, sqlite_resource):
+    _get(client, sqlite_resource, formato="json")
+    _insert_car(sqlite_resource)
+
+    assert len(_get(client, sqlite_resource, formato="csv").content.decode().splitlines()) == 5
+    assert len(_get(client, sqlite_resource, formato="json", limit=10).json()) == 4
+
+
+def test_cache_stats(client: Client, sqlite_resource):
+    _get(client, sqlite_resource, formato="json")
+    _get(client, sqlite_resource, formato="json")
+
+    stats = get_result_cache_stats()
+    assert stats["hits"] >= 1
+    assert stats["misses"] >= 1
+    assert stats["entries"] == 1
+    assert stats["bytes"] > 0
+
+
+def test_cache_ttl_zero(client: Client, sqlite_resource):
+    sqlite_resource.cache_ttl = 0
+    sqlite_resource.save()
+    _get(client, sqlite_resource, formato="json")
+    _insert_car(sqlite_resource)
+
+    assert len(_get(client, sqlite_resource, formato="json").json()) == 4
+
+
+def test_purge_on_resource_save(client: Client, sqlite_resource):
+    _get(client, sqlite_resource, formato="json")
+    _insert_car(sqlite_resource)
+    sqlite_resource.save()
+
+    assert len(_get(client, sqlite_resource, formato="json").json()) == 4
+
+
+def test_streaming_is_not_cached(client: Client, sqlite_resource):
+    b"".join(_get(client, sqlite_resource, formato="json", stream="true").streaming_content)
+
+    assert get_result_cache_stats()["entries"] == 0
+
+
+def test_cache_stats_view(client: Client, sqlite_resource):
+    user = User.objects.create_user(username="cache", password="cache")
+    client.force_login(user)
+    _get(client, sqlite_resource, formato="json")
+
+    response = client.get("/GA_OD_Core_admin/health/api/cache/")
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"result_cache", "model_cache", "api_cache"}
+    assert response.json()["result_cache"]["entries"] == 1
+
+
+def test_etag_not_modified(client: Client, sqlite_resource):
+    first = _get(client, sqlite_resource, formato="json")
+    not_modified = _get(client, sqlite_resource, formato="json", headers={"HTTP_IF_NONE_MATCH": first["ETag"]})
+
+    assert first["ETag"]
+    assert first["Last-Modified"]
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified["ETag"] == first["ETag"]
+
+
+def test_etag_not_modified_without_cache(client: Client, sqlite_resource, mocker):
+    sqlite_resource.cache_ttl = 0
+    sqlite_resource.save()
+    first = _get(client, sqlite_resource, formato="csv")
+    query_plan = mocker.spy(views, "get_resource_query_plan")
+
+    not_modified = _get(client, sqlite_resource, formato="csv", headers={"HTTP_IF_NONE_MATCH": first["ETag"]})
+
+    assert not_modified.status_code == 304
+    assert not_modified["Last-Modified"] == first["Last-Modified"]
+    assert query_plan.call_count == 0
+
+
+def test_etag_modified_after_validator_ttl(client: Client, sqlite_resource, monkeypatch):
+    monkeypatch.setattr(CONFIG.common_config.result_cache, "validator_ttl_seconds", 0)
+    sqlite_resource.cache_ttl = 0
+    sqlite_resource.save()
+    first = _get(client, sqlite_resource, formato="csv")
+    _insert_car(sqlite_resource)
+
+    modified = _get(client, sqlite_resource, formato="csv", headers={"HTTP_IF_NONE_MATCH": first["ETag"]})
+
+    assert modified.status_code == 200
+    assert modified["ETag"] != first["ETag"]
+
+
+def test_last_modified_is_time_of_data_change(client: Client, sqlite_resource, monkeypatch):
+    sqlite_resource.cache_ttl = 0
+    sqlite_resource.save()
+    first = _get(client, sqlite_resource, formato="json")
+    now = time.time()
+    monkeypatch.setattr(result_cache.time, "time", lambda: now + 3600)
+
+    same_data = _get(client, sqlite_resource, formato="json")
+    _insert_car(sqlite_resource)
+    sqlite_resource.save()
+    new_data = _get(client, sqlite_resource, formato="json")
+
+    assert same_data["Last-Modified"] == first["Last-Modified"]
+    assert new_data["Last-Modified"] != first["Last-Modified"]
+
+
+def test_purge_invalidates_validators(client: Client, sqlite_resource, mocker):
+    first = _get(client, sqlite_resource, formato="json")
+    _insert_car(sqlite_resource)
+    sqlite_resource.save()
+    query_plan = mocker.spy(views, "get_resource_query_plan")
+
+    response = _get(client, sqlite_resource, formato="json", headers={"HTTP_IF_NONE_MATCH": first["ETag"]})
+
+    assert response.status_code == 200
+    assert query_plan.call_count == 1
+    assert len(response.json()) == 4
+
+
+def test_last_modified_not_modified(client: Client, sqlite_resource):
+    first = _get(client, sqlite_resource, formato="json")
+
+    response = _get(client, sqlite_resource, formato="json", headers={"HTTP_IF_MODIFIED_SINCE": first["Last-Modified"]})
+    assert response.status_code == 304
@@ -0,0 +1,179 @@
+import csv
+import datetime
+import decimal
+import io
+import json
+import uuid
+
+import openpyxl
+import pandas
+import pytest
+from django.test.client import Client
+
+from custom_renderers import JSONRowEncoder, iter_geojson, iter_json_array
+from gaodcore.resource_stats import flush_resource_sizes
+from gaodcore_manager.models import ResourceSizeConfig
+from gaodcore_project.settings import CONFIG
+from utils import get_return_list
+
+
+def _get(client: Client, sqlite_resource, **params):
+    return client.get("/GA_OD_Core/download", {"resource_id": sqlite_resource.id, "sort": "id", **params})
+
+
+def test_stream_json(client: Client, sqlite_resource):
+    streamed = _get(client, sqlite_resource, stream="true", formato="json")
+    buffered = _get(client, sqlite_resource, formato="json")
+
+    assert streamed.streaming
+    assert json.loads(b"".join(streamed.streaming_content)) == json.loads(buffered.content)
+
+
+def test_stream_csv(client: Client, sqlite_resource):
+    streamed = _get(client, sqlite_resource, stream="true", formato="csv")
+    buffered = _get(client, sqlite_resource, formato="csv")
+
+    streamed_rows = list(csv.DictReader(io.StringIO(b"".join(streamed.streaming_content).decode())))
+    assert streamed_rows == list(csv.DictReader(io.StringIO(buffered.content.decode())))
+    assert streamed_rows[1]["name"] == 'Seat, "Ibiza"'
+    assert "attachment" in streamed["content-disposition"]
+
+
+def test_stream_ndjson(client: Client, sqlite_resource):
+    response = _get(client, sqlite_resource, formato="ndjson", fields=["id", "name"], columns=["key", "car"])
+
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    assert response["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in lines] == [
+        {"key": 1, "car": "Fiat"},
+        {"key": 2, "car": 'Seat, "Ibiza"'},
+        {"key": 3, "car": "Ford"},
+    ]
+
+
+def test_preview_ndjson(client: Client, sqlite_resource):
+    response = client.get("/GA_OD_Core/preview.ndjson", {"resource_id": sqlite_resource.id, "sort": "id desc"})
+
+    lines = b"".join(response.streaming_content).splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [3, 2, 1]
+
+
+def test_stream_resource_size(client: Client, sqlite_resource):
+    response = _get(client, sqlite_resource, formato="csv", stream="true", limit=2)
+    content = b"".join(response.streaming_content)
+
+    flush_resource_sizes()
+    resource_size = ResourceSizeConfig.objects.get(resource_id=sqlite_resource)
+    assert resource_size.registries == 2
+    assert resource_size.size == len(content)
+
+
+@pytest.mark.parametrize("stream", ["yes", "2"])
+def test_stream_invalid(client: Client, sqlite_resource, stream: str):
+    response = _get(client, sqlite_resource, stream=stream, formato="json")
+
+    assert response.status_code == 400
+
+
+def test_json_row_encoder():
+    rows = [
+        {
+            "datetime": datetime.datetime(2020, 1, 2, 3, 4, 5, 123456, tzinfo=datetime.timezone.utc),
+            "date": datetime.date(2020, 1, 2),
+            "time": datetime.time(3, 4, 5, 123456),
+            "timedelta": datetime.timedelta(days=1, seconds=5),
+            "decimal": decimal.Decimal("45.5"),
+            "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "float": float("nan"),
+            "bool": True,
+            "none": None,
+        },
+        {
+            "datetime": None,
+            "date": datetime.date(2021, 1, 2),
+            "time": None,
+            "timedelta": None,
+            "decimal": "text",
+            "uuid": None,
+            "float": 1.5,
+            "bool": False,
+            "none": 1,
+        },
+    ]
+
+    encoded = json.loads("".join(iter_json_array(rows, list(rows[0].keys()))))
+
+    assert encoded == list(get_return_list(rows))
+    assert JSONRowEncoder(["a"]).convert([decimal.Decimal("1.10")]) == {"a": "1.10"}
+
+
+def test_json_array_empty():
+    assert "".join(iter_json_array([], ["id"])) == "[]"
+
+
+@pytest.mark.parametrize("stream", ["false", "true"])
+def test_xlsx(client: Client, sqlite_resource, stream: str):
+    response = _get(client, sqlite_resource, formato="xlsx", stream=stream, columns=["key", "car", "kg", "date"])
+    content = b"".join(response.streaming_content) if response.streaming else response.content
+
+    data = pandas.read_excel(io.BytesIO(content), engine="openpyxl")
+    assert response.streaming == (stream == "true")
+    assert data.where(pandas.notnull(data), None).to_dict(orient="records") == [
+        {"key": 1, "car": "Fiat", "kg": 60, "date": "2020-01-01"},
+        {"key": 2, "car": 'Seat, "Ibiza"', "kg": 45.5, "date": None},
+        {"key": 3, "car": "Ford", "kg": 70, "date": "2021-05-03"},
+    ]
+    flush_resource_sizes()
+    assert ResourceSizeConfig.objects.get(resource_id=sqlite_resource).registries == 3
+
+
+def test_xlsx_cell_types(client: Client, sqlite_resource):
+    response = _get(client, sqlite_resource, formato="xlsx")
+
+    worksheet = openpyxl.load_workbook(io.BytesIO(response.content)).active
+    assert [(cell.value, cell.data_type) for cell in worksheet[3]] == [
+        (2, "n"),
+        ('Seat, "Ibiza"', "s"),
+        (45.5, "n"),
+        (None, "n"),
+    ]
+    assert worksheet["D2"].value == "2020-01-01"
+
+
+def test_xlsx_not_cached_is_streamed(client: Client, sqlite_resource):
+    sqlite_resource.cache_ttl = 0
+    sqlite_resource.save()
+
+    response = _get(client, sqlite_resource, formato="xlsx")
+
+    assert response.streaming
+    assert openpyxl.load_workbook(io.BytesIO(b"".join(response.streaming_content))).active.max_row == 4
+
+
+def test_xlsx_larger_than_cache_entry_is_streamed(client: Client, sqlite_resource, monkeypatch):
+    monkeypatch.setattr(CONFIG.common_config.result_cache, "max_entry_bytes", 1024)
+
+    response = _get(client, sqlite_resource, formato="xlsx")
+
+    assert response.streaming
+    assert openpyxl.load_workbook(io.BytesIO(b"".join(response.streaming_content))).active.max_row == 4
+
+
+def test_iter_geojson():
+    features = [
+        ({"id": 1, "name": 'Seat, "Ibiza"\u2028'}, '{"type":"Point","coordinates":[-0.88,41.65]}'),
+        ({"id": 2, "name": None}, None),
+    ]
+
+    assert json.loads("".join(iter_geojson(features))) == {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [-0.88, 41.65]},
+                "properties": {"id": 1, "name": 'Seat, "Ibiza"\u2028'},
+            },
+            {"type": "Feature", "geometry": None, "properties": {"id": 2, "name": None}},
+        ],
+    }
+    assert json.loads("".join(iter_geojson([]))) == {"type": "FeatureCollection", "features": []}
@@ -0,0 +1,118 @@
+import gzip
+import os
+
+import pytest
+from django.test.client import Client
+from geoalchemy2 import Geometry
+from sqlalchemy import Column, Integer, MetaData, Table, Text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from connectors import ResourceQueryPlan, _get_tile_query, get_tile_bounds
+from gaodcore import tile_cache
+from gaodcore.tile_cache import cache_tile, compress_tile, get_cached_tile, get_tile_path, purge_tile_cache
+from gaodcore_project.settings import CONFIG
+
+_HALF_SIZE = 20037508.342789244
+
+
+@pytest.fixture(autouse=True)
+def tile_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(CONFIG.common_config.tile_cache, "directory", str(tmp_path))
+    return tmp_path
+
+
+def test_tile_bounds():
+    assert get_tile_bounds(0, 0, 0) == pytest.approx((-_HALF_SIZE, -_HALF_SIZE, _HALF_SIZE, _HALF_SIZE))
+    assert get_tile_bounds(1, 1, 0) == pytest.approx((0, 0, _HALF_SIZE, _HALF_SIZE))
+
+
+def test_tile_query():
+    table = Table(
+        "places",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("name", Text),
+        Column("geom", Geometry(srid=25830)),
+    )
+    plan = ResourceQueryPlan(
+        uri="postgresql://localhost/test",
+        scheme="postgresql",
+        engine=None,
+        model=table,
+        columns=[table.c.name, table.c.geom],
+        geometry_column=table.c.geom,
+        filters={},
+        filter_clauses=[table.c.name == "Zaragoza"],
+        sort_clauses=[],
+    )
+
+    query = _get_tile_query(plan, Session(), 0, 0, 0, "places", 4096, 256)
+    sql = str(query.statement.compile(dialect=postgresql.dialect()))
+
+    assert "ST_AsMVT(tile, " in sql
+    assert "ST_AsMVTGeom(ST_Transform(places.geom, " in sql
+    assert "places.name AS name" in sql
+    assert "places.id" not in sql
+    assert "ST_Intersects(places.geom, ST_Transform(ST_MakeEnvelope(" in sql
+
+
+class TestTileCache:
+    def test_cache_tile(self):
+        path = get_tile_path(1, {"filters": {}}, 2, 1, 3)
+        cache_tile(path, b"tile")
+
+        assert get_cached_tile(path) == b"tile"
+        assert get_cached_tile(get_tile_path(1, {"filters": {"id": 1}}, 2, 1, 3)) is None
+
+    def test_expired(self, monkeypatch):
+        path = get_tile_path(1, {}, 0, 0, 0)
+        cache_tile(path, b"tile")
+        now = tile_cache.time.time()
+        monkeypatch.setattr(tile_cache.time, "time", lambda: now + CONFIG.common_config.tile_cache.ttl_seconds + 1)
+
+        assert get_cached_tile(path) is None
+
+    def test_purge(self):
+        path_1 = get_tile_path(1, {}, 0, 0, 0)
+        path_2 = get_tile_path(2, {}, 0, 0, 0)
+        cache_tile(path_1, b"tile")
+        cache_tile(path_2, b"tile")
+
+        purge_tile_cache([1])
+
+        assert not os.path.exists(path_1)
+        assert get_cached_tile(path_2) == b"tile"
+
+
+def test_cached_tile_response(client: Client, sqlite_resource):
+    path = get_tile_path(sqlite_resource.id, {"filters": {}, "like": {}, "fields": []}, 1, 0, 1)
+    cache_tile(path, compress_tile(b"tile"))
+    url = f"/GA_OD_Core/tiles/{sqlite_resource.id}/1/0/1.mvt"
+
+    response = client.get(url, HTTP_ACCEPT="application/x-protobuf")
+    compressed = client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/vnd.mapbox-vector-tile"
+    assert response.content == b"tile"
+    assert compressed["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.content) == b"tile"
+
+
+def test_cached_empty_tile_response(client: Client, sqlite_resource):
+    cache_tile(get_tile_path(sqlite_resource.id, {"filters": {}, "like": {}, "fields": []}, 0, 0, 0), b"")
+
+    assert client.get(f"/GA_OD_Core/tiles/{sqlite_resource.id}/0/0/0.mvt").status_code == 204
+
+
+@pytest.mark.parametrize("tile", ["1/2/0", "1/0/2", "25/0/0"])
+def test_tile_not_exists(client: Client, sqlite_resource, tile: str):
+    assert client.get(f"/GA_OD_Core/tiles/{sqlite_resource.id}/{tile}.mvt").status_code == 400
+
+
+def test_tile_without_geometry(client: Client, sqlite_resource):
+    response = client.get(f"/GA_OD_Core/tiles/{sqlite_resource.id}/0/0/0.mvt")
+
+    assert response.status_code == 400
+    assert "geometry" in str(response.content)
@@ -0,0 +1,100 @@
+import time
+
+import pytest
+from django.contrib.auth.models import User
+from django.test.client import Client
+
+import timing
+from gaodcore.result_cache import purge_result_cache
+from gaodcore_project.settings import CONFIG
+from timing import Timings, get_server_timing, get_timing_histograms, reset_timing_histograms, timed
+
+
+@pytest.fixture(autouse=True)
+def empty_histograms(db):
+    purge_result_cache()
+    reset_timing_histograms()
+    yield
+    purge_result_cache()
+    reset_timing_histograms()
+
+
+def _get(client: Client, sqlite_resource, **params):
+    return client.get("/GA_OD_Core/download", {"resource_id": sqlite_resource.id, "sort": "id", **params})
+
+
+def _get_stages(response) -> dict:
+    stages = {}
+    for item in response["Server-Timing"].split(", "):
+        stage, duration = item.split(";dur=")
+        stages[stage] = float(duration)
+    return stages
+
+
+def test_timed_excludes_nested_stages():
+    timings = Timings()
+    token = timing._TIMINGS.set(timings)
+    try:
+        with timed("render"):
+            with timed("query"):
+                time.sleep(0.02)
+            with timed("query"):
+                pass
+    finally:
+        timing._TIMINGS.reset(token)
+
+    assert timings.durations["query"] >= 20
+    assert timings.durations["render"] < timings.durations["query"]
+
+
+def test_timed_without_request():
+    with timed("query"):
+        pass
+
+
+def test_server_timing():
+    assert get_server_timing({"query": 1.234, "total": 10}) == "query;dur=1.2, total;dur=10.0"
+
+
+@pytest.mark.parametrize("format", ["csv", "xml"])
+def test_download_stages(client: Client, sqlite_resource, format: str):
+    response = _get(client, sqlite_resource, formato=format)
+
+    stages = _get_stages(response)
+    assert {"plan", "reflection", "query", "normalization", "return_list", "render", "total"} <= set(stages)
+    assert sum(duration for stage, duration in stages.items() if stage != "total") <= stages["total"] + 1
+
+
+def test_cached_download_stages(client: Client, sqlite_resource):
+    _get(client, sqlite_resource, formato="json")
+
+    assert set(_get_stages(_get(client, sqlite_resource, formato="json"))) == {"cache", "total"}
+
+
+def test_streaming_histograms(client: Client, sqlite_resource):
+    response = _get(client, sqlite_resource, formato="csv", stream="true")
+
+    assert "stream" not in _get_stages(response)
+    assert "stream" not in get_timing_histograms().get(str(sqlite_resource.id), {})
+    b"".join(response.streaming_content)
+    assert get_timing_histograms()[str(sqlite_resource.id)]["stream"]["count"] == 1
+
+
+def test_timing_disabled(client: Client, sqlite_resource, monkeypatch):
+    monkeypatch.setattr(CONFIG.common_config.timing, "enabled", False)
+
+    assert "Server-Timing" not in _get(client, sqlite_resource, formato="csv")
+    assert get_timing_histograms() == {}
+
+
+def test_timing_stats_view(client: Client, sqlite_resource):
+    client.force_login(User.objects.create_user(username="timing", password="timing"))
+    _get(client, sqlite_resource, formato="csv")
+    _get(client, sqlite_resource, formato="csv", limit=1)
+
+    response = client.get("/GA_OD_Core_admin/health/api/timings/")
+
+    query = response.json()[str(sqlite_resource.id)]["query"]
+    assert query["count"] == 2
+    assert query["buckets"]["+Inf"] == 2
+    assert list(query["buckets"].values()) == sorted(query["buckets"].values())
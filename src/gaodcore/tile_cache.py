@@ -0,0 +1,78 @@
+"""Cache of vector tiles on local disk.
+
+Map viewers request the same tiles of a layer again and again, so each rendered tile is kept in a file named by its
+resource, parameters and coordinates: {directory}/{resource_id}/{parameters}/{z}/{x}/{y}.mvt. Files are shared by all
+workers of the host, expire after tile_cache.ttl_seconds and are removed with the directory of their resource when the
+resource is modified. Tiles are stored compressed with gzip, like they are sent to map viewers; empty tiles are empty
+files.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from gaodcore_project.settings import CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def _get_directory() -> str:
+    return CONFIG.common_config.tile_cache.directory or os.path.join(tempfile.gettempdir(), "gaodcore_tiles")
+
+
+def get_tile_path(resource_id: int, params: Dict[str, Any], z: int, x: int, y: int) -> str:
+    """Path of the cached tile of a resource rendered with params."""
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+    return os.path.join(_get_directory(), str(resource_id), digest, str(z), str(x), f"{y}.mvt")
+
+
+def get_cached_tile(path: str) -> Optional[bytes]:
+    """Cached tile compressed with gzip, or None if it is not cached or it has expired."""
+    ttl = CONFIG.common_config.tile_cache.ttl_seconds
+    try:
+        if ttl <= 0 or os.path.getmtime(path) + ttl < time.time():
+            return None
+        with open(path, "rb") as file:
+            return file.read()
+    except OSError:
+        return None
+
+
+def compress_tile(tile: bytes) -> bytes:
+    """Tile compressed with gzip. Empty tiles are not compressed."""
+    return gzip.compress(tile) if tile else tile
+
+
+def cache_tile(path: str, tile: bytes) -> None:
+    """Keep a tile compressed with compress_tile. The file is replaced atomically, so other workers never read a
+    partial tile. Errors are logged and ignored: the tile has been rendered anyway."""
+    if CONFIG.common_config.tile_cache.ttl_seconds <= 0:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                file.write(tile)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+    except OSError as err:
+        logger.warning("Tile cannot be cached in %s: %s", path, err)
+
+
+def purge_tile_cache(resource_ids: Optional[List[int]] = None) -> None:
+    """Remove cached tiles of resources, or all of them."""
+    directory = _get_directory()
+    if resource_ids is None:
+        shutil.rmtree(directory, ignore_errors=True)
+        return
+    for resource_id in resource_ids:
+        shutil.rmtree(os.path.join(directory, str(resource_id)), ignore_errors=True)
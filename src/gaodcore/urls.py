@@ -1,12 +1,15 @@
 from django.urls import path
 from rest_framework.urlpatterns import format_suffix_patterns
 
-from gaodcore.views import DownloadView, ShowColumnsView, ResourcesView
+from gaodcore.views import AggregateView, DownloadView, ShowColumnsView, ResourcesView, TileView
 
 urlpatterns = format_suffix_patterns([
     path('views', ResourcesView.as_view()),
     path('download', DownloadView.as_view()),
     path('preview', DownloadView.as_view()),
+    path('aggregate', AggregateView.as_view()),
     path('show_columns', ShowColumnsView.as_view()),
 ],
-                                     allowed=['json', 'xml', 'csv', 'yaml', 'xlsx'])
+                                     allowed=['json', 'xml', 'csv', 'yaml', 'xlsx', 'ndjson', 'parquet', 'arrow']) + [
+    path('tiles/<int:resource_id>/<int:z>/<int:x>/<int:y>.mvt', TileView.as_view()),
+]
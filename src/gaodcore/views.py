@@ -1,25 +1,35 @@
 import csv
-import io
+import decimal
+import gzip
 import json
 import logging
-import sys
+import math
+import re
+import tempfile
+from datetime import date, datetime, time, timedelta
 from json.decoder import JSONDecodeError
-from typing import Optional, Dict, Any, List, Callable
+from typing import Optional, Dict, Any, List, Callable, IO, Iterable, Iterator, Tuple
 
 import xlsxwriter
-from django.http import HttpResponse
+from xlsxwriter.worksheet import Worksheet
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
 from drf_excel.mixins import XLSXFileMixin
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
 
 from exceptions import ServiceUnavailable, ErrorCodes
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.utils.serializer_helpers import ReturnList
+from rest_framework.utils.urls import replace_query_param
+from sqlalchemy import Column
+from sqlalchemy.sql import sqltypes
 
 from connectors import (
-    get_resource_data,
     get_resource_columns,
     NoObjectError,
     DriverConnectionError,
@@ -27,27 +37,63 @@ from connectors import (
     OrderBy,
     FieldNoExistsError,
     SortFieldNoExistsError,
+    CursorError,
+    AggregateError,
+    GeometryError,
+    Aggregate,
     MimeTypeError,
-    validator_max_excel_allowed,
     TooManyRowsErrorExcel,
-    get_resource_data_feature,
-    get_GeoJson_resource,
-    update_resource_size,
+    get_resource_query_plan,
+    count_plan_rows,
+    count_plan_total_rows,
+    get_plan_aggregate_data,
+    get_plan_resource_tile,
+    get_plan_resource_data,
+    iter_plan_session_data,
+    stream_plan_resource_data_feature,
+    stream_plan_resource_data,
+    ResourceQueryPlan,
 )
-from gaodcore.negotations import LegacyContentNegotiation
+from columnar import COLUMNAR_WRITERS, get_arrow_schema, iter_record_batches
+from compression import select_encoding, set_content_encoding
+from custom_renderers import (
+    ArrowRenderer,
+    NDJSONRenderer,
+    JSONRowEncoder,
+    ParquetRenderer,
+    convert_json_value,
+    iter_geojson,
+    iter_json_array,
+    iter_ndjson,
+)
+from gaodcore.negotations import FirstRendererContentNegotiation, LegacyContentNegotiation
+from gaodcore.resource_stats import record_resource_size, track_response_size
+from gaodcore.result_cache import (
+    get_result_cache_key,
+    get_cached_response,
+    cache_response,
+    get_resource_cache_ttl,
+    get_count_cache_key,
+    get_cached_count,
+    cache_count,
+)
+from gaodcore.tile_cache import cache_tile, compress_tile, get_cached_tile, get_tile_path
 from gaodcore_manager.models import ResourceConfig
+from gaodcore_project.settings import CONFIG
+from timing import set_timing_resource, timed
 from utils import get_return_list, modify_header
 from views import APIViewMixin
 
 logger = logging.getLogger(__name__)
 
 _RESOURCE_MAX_ROWS_EXCEL = 1048576
+_XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
 
 def _get_data_public_error(func: Callable, *args, **kwargs) -> List[Dict[str, Any]]:
     try:
         return func(*args, **kwargs)
-    except (FieldNoExistsError, SortFieldNoExistsError) as err:
+    except (FieldNoExistsError, SortFieldNoExistsError, CursorError, AggregateError, GeometryError) as err:
         raise ValidationError(err, 400) from err
     except NoObjectError as err:
         raise ServiceUnavailable(
@@ -70,6 +116,7 @@ def _get_data_public_error(func: Callable, *args, **kwargs) -> List[Dict[str, An
 
 
 def _get_resource(resource_id: int):
+    set_timing_resource(resource_id)
     try:
         return ResourceConfig.objects.select_related().get(
             id=resource_id, enabled=True, connector_config__enabled=True
@@ -81,36 +128,137 @@ def _get_resource(resource_id: int):
         raise ValidationError("Resource not exists or is not available", 400) from err
 
 
-def get_response_xlsx(data: ReturnList) -> HttpResponse:
-    """Get resource XLSX with order column names."""
-    """output XLSX (Comma Separated Values) dynamically using Django views"""
-    """columns_order XlsxWriter can be used to write text, numbers, formulas and hyperlinks to multiple"""
-    """worksheets and it supports features such as formatting and many more, includin """
+def _write_bool(worksheet: Worksheet, row: int, col: int, value: bool):
+    # Backward compatibility: booleans have always been written as numbers.
+    worksheet.write_number(row, col, float(value))
 
-    output = io.BytesIO()
-    workbook = xlsxwriter.Workbook(output)
-    worksheet = workbook.add_worksheet()
 
-    # column header names, you can use your own headers here
+def _write_number(worksheet: Worksheet, row: int, col: int, value: Any):
+    # NaN and infinite values are blank cells, like they are null in JSON.
+    if math.isfinite(value):
+        worksheet.write_number(row, col, float(value))
+
+
+def _write_text(worksheet: Worksheet, row: int, col: int, value: Any):
+    worksheet.write_string(row, col, convert_json_value(value))
+
+
+_XLSX_WRITERS = {
+    str: Worksheet.write_string,
+    int: Worksheet.write_number,
+    float: _write_number,
+    bool: _write_bool,
+}
 
-    for row, item in enumerate(data):
-        for col, (key, value) in enumerate(item.items()):
-            # Write None values as blank cells, not NaN
-            if value is None:
-                worksheet.write_blank(row + 1, col, None)
-            else:
-                worksheet.write(row + 1, col, value)
-            if row == 0:
-                worksheet.write(row, col, key)
 
-    # Close the workbook before sending the data.
-    workbook.close()
-    output.seek(0)
+def _write_value(worksheet: Worksheet, row: int, col: int, value: Any):
+    """Write a value of a column whose type is not known, with the write method of the type of its JSON value."""
+    value = convert_json_value(value)
+    if value is not None:
+        _XLSX_WRITERS.get(type(value), Worksheet.write)(worksheet, row, col, value)
 
-    return HttpResponse(
-        output,
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+
+def _typed_writer(value_types: Tuple[type, ...], write: Callable) -> Callable:
+    """Writer that writes values of value_types with write and other values with _write_value."""
+
+    def writer(worksheet: Worksheet, row: int, col: int, value: Any):
+        if type(value) in value_types:
+            write(worksheet, row, col, value)
+        else:
+            _write_value(worksheet, row, col, value)
+
+    return writer
+
+
+def _get_xlsx_writer(column: Column) -> Callable:
+    """Get the write method of the cells of a column, chosen once from its SQLAlchemy type."""
+    column_type = column.type
+    if isinstance(column_type, sqltypes.Boolean):
+        return _typed_writer((bool,), _write_bool)
+    if isinstance(column_type, (sqltypes.Integer, sqltypes.Numeric)):
+        return _typed_writer((int, float, decimal.Decimal), _write_number)
+    if isinstance(column_type, sqltypes.String):
+        return _typed_writer((str,), Worksheet.write_string)
+    if isinstance(column_type, (sqltypes.Date, sqltypes.DateTime, sqltypes.Time, sqltypes.Interval)):
+        # Dates are written as text, like in JSON.
+        return _typed_writer((date, datetime, time, timedelta), _write_text)
+    return _write_value
+
+
+def _get_file_response(output: IO[bytes], size: int, content_type: str, cached: bool) -> HttpResponse:
+    """Response of a finished temporary file. It is streamed from disk unless it is going to be kept in the result
+    cache and it is not larger than an entry of it; only then it is read into the response."""
+    if not cached or size > CONFIG.common_config.result_cache.max_entry_bytes:
+        return FileResponse(output, content_type=content_type)
+    with output:
+        return HttpResponse(output.read(), content_type=content_type)
+
+
+def get_response_xlsx(
+    plan: ResourceQueryPlan, columns: List[str], resource_id: int, cached: bool = False
+) -> HttpResponse:
+    """Get resource XLSX with order column names.
+
+    Workbook is written in xlsxwriter constant_memory mode: each row is flushed to a temporary file as soon as it is
+    written and the finished file is also a temporary file, so memory does not depend on the number of rows. Each
+    column is written with the write method of its SQLAlchemy type: numbers as numbers, dates as text like JSON. The
+    file is streamed from disk, unless it is small enough to be kept in the result cache; see _get_file_response.
+    """
+    header = _get_header(plan, columns)
+    rows = _get_data_public_error(stream_plan_resource_data, plan, CONFIG.common_config.streaming.batch_size)
+    writers = [_get_xlsx_writer(column) for column in plan.columns]
+
+    output = tempfile.TemporaryFile()
+    try:
+        workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+        worksheet = workbook.add_worksheet()
+        registries = 0
+        for registries, item in enumerate(rows, start=1):
+            if registries == 1:
+                for col, key in enumerate(header):
+                    worksheet.write_string(0, col, key)
+            for col, (write, value) in enumerate(zip(writers, item.values())):
+                # None values are blank cells
+                if value is not None:
+                    write(worksheet, registries, col, value)
+        workbook.close()
+        size = output.tell()
+        output.seek(0)
+    except BaseException:
+        output.close()
+        raise
+
+    record_resource_size(resource_id, registries, size)
+    return _get_file_response(output, size, _XLSX_CONTENT_TYPE, cached)
+
+
+def get_response_columnar(
+    plan: ResourceQueryPlan, format: str, columns: List[str], resource_id: int, cached: bool = False
+) -> HttpResponse:
+    """Get resource as a Parquet or Arrow IPC file with typed columns.
+
+    Rows are read with a server side cursor and converted to record batches of streaming.row_group_size rows, that are
+    written to a temporary file, so memory does not depend on the number of rows. The file is streamed from disk, unless
+    it is small enough to be kept in the result cache; see _get_file_response.
+    """
+    header = _get_header(plan, columns)
+    write, content_type = COLUMNAR_WRITERS[format]
+    rows = _RowCounter(
+        _get_data_public_error(iter_plan_session_data, plan, CONFIG.common_config.streaming.batch_size)
     )
+    batches = iter_record_batches(rows, plan.columns, header, CONFIG.common_config.streaming.row_group_size)
+
+    output = tempfile.TemporaryFile()
+    try:
+        write(batches, get_arrow_schema(plan.columns, header), output)
+        size = output.tell()
+        output.seek(0)
+    except BaseException:
+        output.close()
+        raise
+
+    record_resource_size(resource_id, rows.rows, size)
+    return _get_file_response(output, size, content_type, cached)
 
 
 def get_response_csv(data: ReturnList) -> HttpResponse:
@@ -133,14 +281,140 @@ def get_response_csv(data: ReturnList) -> HttpResponse:
     return response
 
 
+class _Echo:
+    """File-like object that returns the written value instead of storing it. Used to get lines of csv.writer."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _chunked(lines: Iterable[str], chunk_size: int) -> Iterator[bytes]:
+    """Join small strings into chunks of at least chunk_size bytes, so each write of the stream is not a single row."""
+    buffer = []
+    size = 0
+    for line in lines:
+        line = line.encode("utf-8")
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield b"".join(buffer)
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+class _RowCounter:
+    """Iterator wrapper that counts consumed rows."""
+
+    def __init__(self, rows: Iterable[Dict[str, Any]]):
+        self._rows = iter(rows)
+        self.rows = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Dict[str, Any]:
+        row = next(self._rows)
+        self.rows += 1
+        return row
+
+
+def _track_resource_size(resource_id: int, rows: _RowCounter, chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Yield chunks and, when the stream has been sent completely, update statistics of the resource."""
+    size = 0
+    for chunk in chunks:
+        size += len(chunk)
+        yield chunk
+    record_resource_size(resource_id, rows.rows, size)
+
+
+def _iter_csv_lines(rows: Iterable[Dict[str, Any]], header: List[str]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    encoder = JSONRowEncoder(header)
+    for row, item in enumerate(rows):
+        if row == 0:
+            yield writer.writerow(header)
+        yield writer.writerow(encoder.convert(item.values()).values())
+
+
+_STREAM_WRITERS = {
+    "csv": (_iter_csv_lines, "text/csv"),
+    "json": (iter_json_array, "application/json"),
+    "ndjson": (iter_ndjson, NDJSONRenderer.media_type),
+}
+
+
+def _get_header(plan: ResourceQueryPlan, columns: List[str]) -> List[str]:
+    """Get names of fields in the response: keys of the plan columns or, if provided, names in columns."""
+    header = [column.key for column in plan.columns]
+    if columns:
+        if len(columns) != len(header):
+            raise ValidationError(
+                "El número de columnas tiene que ser igual al numero de fields o al número total de columnas "
+                "por defecto",
+                400,
+            )
+        header = list(columns)
+    return header
+
+
+def _encode_resource(plan: ResourceQueryPlan, format: str, columns: List[str], resource_id: int) -> Iterator[bytes]:
+    """Encode rows of a resource in chunks while they are read from database with a server side cursor."""
+    header = _get_header(plan, columns)
+    write_lines, _ = _STREAM_WRITERS[format]
+    rows = _RowCounter(
+        _get_data_public_error(stream_plan_resource_data, plan, CONFIG.common_config.streaming.batch_size)
+    )
+    chunks = _chunked(write_lines(rows, header), CONFIG.common_config.streaming.chunk_size)
+    return _track_resource_size(resource_id, rows, chunks)
+
+
+def get_streaming_response(
+    plan: ResourceQueryPlan, format: str, columns: List[str], resource_id: int
+) -> StreamingHttpResponse:
+    """Get resource as a streaming response. Rows are read from database with a server side cursor and written to the
+    response while they are fetched, so memory of the worker does not depend on the number of rows."""
+    _, content_type = _STREAM_WRITERS[format]
+    return StreamingHttpResponse(_encode_resource(plan, format, columns, resource_id), content_type=content_type)
+
+
+def get_response_json(plan: ResourceQueryPlan, columns: List[str], resource_id: int) -> HttpResponse:
+    """Get resource JSON. Rows are encoded once, in chunks, straight to the response instead of being serialized,
+    parsed and rendered again by JSONRenderer."""
+    response = HttpResponse(content_type="application/json")
+    for chunk in _encode_resource(plan, "json", columns, resource_id):
+        response.write(chunk)
+    return response
+
+
+def get_response_geojson(plan: ResourceQueryPlan, resource_id: int, stream: bool = False) -> HttpResponse:
+    """Get features of a resource as a GeoJSON FeatureCollection. Features are written while they are read from
+    database and geometries are copied from the GeoJSON produced by the database without parsing them."""
+    features = _RowCounter(
+        _get_data_public_error(stream_plan_resource_data_feature, plan, CONFIG.common_config.streaming.batch_size)
+    )
+    chunks = _track_resource_size(
+        resource_id, features, _chunked(iter_geojson(features), CONFIG.common_config.streaming.chunk_size)
+    )
+    if stream:
+        return StreamingHttpResponse(chunks, content_type="application/json")
+    response = HttpResponse(content_type="application/json")
+    for chunk in chunks:
+        response.write(chunk)
+    return response
+
+
 class DownloadView(APIViewMixin):
     """This view allow get public serialized data from internal databases or APIs of Gobierno de Aragón. If JSON
     response type is selected and the view has a shape field the response will be in GEOJSON format"""
 
     _PREVIEW_LIMIT = 1000
+    _CURSOR_PAGE_SIZE = 1000
     _DOWNLOAD_ENDPOINT = ("/GA_OD_Core/download", "/GA_OD_Core/download")
 
     content_negotiation_class = LegacyContentNegotiation
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer, ParquetRenderer, ArrowRenderer]
 
     @extend_schema(
         tags=["default"],
@@ -157,7 +431,9 @@ class DownloadView(APIViewMixin):
             ),
             OpenApiParameter(
                 "filters",
-                description="Matching conditions to select, e.g {'key1': 'a', 'key2': 'b'}.",
+                description="Matching conditions to select, e.g {'key1': 'a', 'key2': 'b'}. Operators: $gt, $gte, $lt, "
+                "$lte, $eq, $ne, $in, $nin, $between, $like, $isnull, $not, $and and $or, e.g. "
+                "{'key1': {'$in': ['a', 'b']}, 'key2': {'$between': ['2020-01-01', '2020-12-31']}}.",
                 type={"type": "object"},
             ),
             OpenApiParameter(
@@ -177,7 +453,8 @@ class DownloadView(APIViewMixin):
             ),
             OpenApiParameter(
                 "like",
-                description="Matching conditions to select, e.g {'key1': 'a', 'key2': 'b'}.",
+                description="Fields that contain a text, case insensitive, e.g {'key1': 'a', 'key2': 'b'}. Use "
+                "{'key1': {'$startswith': 'a'}} for fields that start with a text, case sensitive.",
                 type={"type": "object"},
             ),
             OpenApiParameter(
@@ -205,6 +482,48 @@ class DownloadView(APIViewMixin):
                 description="Force name of file to download.",
                 type=OpenApiTypes.STR,
             ),
+            OpenApiParameter(
+                "stream",
+                description="Stream csv, json or GeoJSON response while rows are read from database. NDJSON is "
+                "always streamed. Default: false.",
+                type=OpenApiTypes.BOOL,
+            ),
+            OpenApiParameter(
+                "cursor",
+                description="Paginate by sort fields and primary key instead of offset. Empty for the first page; "
+                'next pages are in the "Link" header with rel="next". Default page size: 1000 rows.',
+                type=OpenApiTypes.STR,
+            ),
+            OpenApiParameter(
+                "count",
+                description='Add total number of rows of the result, regardless of limit, offset and cursor, in the '
+                '"X-Total-Count" header. "true": resources without filters are estimated from database statistics '
+                'when they are available, and then "X-Total-Count-Estimated" is true. "exact": rows are always '
+                "counted. Default: false.",
+                type=OpenApiTypes.STR,
+            ),
+            OpenApiParameter(
+                "bbox",
+                description="Rows whose geometry intersects a box: minx,miny,maxx,maxy, e.g. "
+                "'-1.95,41.55,-0.55,41.75'. Only for resources with geometry.",
+                type=OpenApiTypes.STR,
+            ),
+            OpenApiParameter(
+                "bbox_srid",
+                description="SRID of the coordinates of bbox. Default: 4326.",
+                type=OpenApiTypes.INT,
+            ),
+            OpenApiParameter(
+                "precision",
+                description="Maximum number of decimal digits of GeoJSON coordinates, from 0 to 15.",
+                type=OpenApiTypes.INT,
+            ),
+            OpenApiParameter(
+                "simplify",
+                description="Simplify GeoJSON geometries with this tolerance, in units of the geometry, preserving "
+                "their topology.",
+                type=OpenApiTypes.NUMBER,
+            ),
             OpenApiParameter(
                 "_page",
                 description="Deprecated. Number of the page.",
@@ -245,6 +564,8 @@ class DownloadView(APIViewMixin):
                     "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": {
                         "schema": {"type": "string", "format": "binary"}
                     },
+                    "application/vnd.apache.parquet": {"schema": {"type": "string", "format": "binary"}},
+                    "application/vnd.apache.arrow.file": {"schema": {"type": "string", "format": "binary"}},
                 },
             }
         },
@@ -268,144 +589,60 @@ class DownloadView(APIViewMixin):
         like = self._get_like(request)
         sort = self._get_sort(request)
         format = self._get_format(request)
+        stream = self._get_stream(request)
+        cursor = self._get_cursor(request, offset)
+        count = self._get_count(request)
+        geometry = self._get_geometry(request)
+        if cursor is not None and not limit:
+            limit = self._CURSOR_PAGE_SIZE
 
         resource_config = _get_resource(resource_id=resource_id)
         logger.info("Downloading resource: %s", resource_config)
 
-        if format == "xlsx":
-            logger.info("Downloading resource in xlsx format: %s", resource_config)
-            try:
-                if not validator_max_excel_allowed(
-                    uri=resource_config.connector_config.uri,
-                    object_location=resource_config.object_location,
-                    object_location_schema=resource_config.object_location_schema,
-                    filters=filters,
-                    like=like,
-                    limit=limit,
-                    offset=offset,
-                    fields=fields,
-                    sort=sort,
-                ):
-                    raise ValidationError(
-                        "An xlsx cannot be generated with so many lines, please request it in another format",
-                        407,
-                    ) from TooManyRowsErrorExcel
-            except DriverConnectionError as err:
-                logger.warning(
-                    "Connection is not available during Excel validation: %s", err
-                )
-                logger.warning(
-                    "Resource: %s - Location: %s - Schema: %s",
-                    resource_id,
-                    resource_config.object_location,
-                    resource_config.object_location_schema,
-                )
-                raise ServiceUnavailable(
-                    "Connection is not available.",
-                    code=ErrorCodes.CONNECTION_UNAVAILABLE,
-                ) from err
-            except NoObjectError as err:
-                logger.warning(
-                    "Object is not available during Excel validation: %s", err
-                )
-                logger.warning(
-                    "Resource: %s - Location: %s - Schema: %s",
-                    resource_id,
-                    resource_config.object_location,
-                    resource_config.object_location_schema,
-                )
-                raise ServiceUnavailable(
-                    "Object is not available.", code=ErrorCodes.OBJECT_UNAVAILABLE
-                ) from err
-        #    raise ValidationError({'error' : 'An xlsx cannot be generated with so many lines, please request
-        #    it in another format'})
-
-        try:
-            reourceGeojon = get_GeoJson_resource(
-                uri=resource_config.connector_config.uri,
-                object_location=resource_config.object_location,
-                object_location_schema=resource_config.object_location_schema,
-            )
-        except DriverConnectionError as err:
-            logger.warning("Connection is not available. : %s", err)
-            logger.warning(
-                "Resource: %s - Location: %s - Schema: %s",
-                resource_id,
-                resource_config.object_location,
-                resource_config.object_location_schema,
-            )
-            raise ServiceUnavailable(
-                "Connection is not available.", code=ErrorCodes.CONNECTION_UNAVAILABLE
-            ) from err
-        except NoObjectError as err:
-            logger.warning("Object is not available. : %s", err)
-            logger.warning(
-                "Resource: %s - Location: %s - Schema: %s",
-                resource_id,
-                resource_config.object_location,
-                resource_config.object_location_schema,
-            )
-            raise ServiceUnavailable(
-                "Object is not available.", code=ErrorCodes.OBJECT_UNAVAILABLE
-            ) from err
-        if reourceGeojon and format == "json":
-            featureCollection = True
-        else:
-            featureCollection = False
-
-        if featureCollection:
-            logger.info("Downloading resource in geojson format. FeatureCollection")
-            data = _get_data_public_error(
-                get_resource_data_feature,
-                uri=resource_config.connector_config.uri,
-                object_location=resource_config.object_location,
-                object_location_schema=resource_config.object_location_schema,
-                filters=filters,
-                like=like,
-                limit=limit,
-                offset=offset,
-                fields=fields,
-                sort=sort,
-            )
+        cache_key = get_result_cache_key(
+            resource_id=resource_id,
+            format=format,
+            filters=filters,
+            like=like,
+            fields=fields,
+            columns=columns,
+            sort=sort,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            geometry=geometry,
+        )
+        with timed("cache"):
+            response = get_cached_response(cache_key, request)
+        if response is not None:
+            logger.info("Downloading resource from cache: %s", resource_config)
         else:
-            logger.info("Downloading resource in json format.")
-            data = _get_data_public_error(
-                get_resource_data,
-                uri=resource_config.connector_config.uri,
-                object_location=resource_config.object_location,
-                object_location_schema=resource_config.object_location_schema,
+            ttl = get_resource_cache_ttl(resource_config)
+            response = self._get_data_response(
+                request,
+                resource_config,
+                format=format,
+                stream=stream,
+                cached=cache_key is not None and ttl > 0 and not stream,
                 filters=filters,
                 like=like,
                 limit=limit,
                 offset=offset,
                 fields=fields,
+                columns=columns,
                 sort=sort,
+                cursor=cursor,
+                geometry=geometry,
             )
+            response = cache_response(cache_key, response, ttl, request)
 
-        if format == "xlsx":
-            data = get_return_list(data, format_is_xlsx=True)
-            update_resource_size(
-                resource_id=resource_id, registries=len(data), size=sys.getsizeof(data)
-            )
-            response = get_response_xlsx(
-                modify_header(data, columns, format_is_xlsx=True)
-            )
-        elif format == "csv":
-            data = get_return_list(data, format_is_xlsx=False)
-            update_resource_size(
-                resource_id=resource_id, registries=len(data), size=sys.getsizeof(data)
-            )
-
-            response = get_response_csv(modify_header(data, columns))
-        elif featureCollection:
-            response = Response(data)
-        else:
-            data = get_return_list(data, format_is_xlsx=False)
-            update_resource_size(
-                resource_id=resource_id, registries=len(data), size=sys.getsizeof(data)
+        if count:
+            total, estimated = self._get_total_count(
+                resource_config, filters, like, geometry=geometry, exact=count == "exact"
             )
-
-            response = Response(modify_header(data, columns))
+            response["X-Total-Count"] = total
+            if estimated:
+                response["X-Total-Count-Estimated"] = "true"
 
         if self.is_download_endpoint(request) or format == "xlsx":
             filename = (
@@ -420,6 +657,118 @@ class DownloadView(APIViewMixin):
 
         return response
 
+    @staticmethod
+    def _get_data_response(
+        request: Request,
+        resource_config: ResourceConfig,
+        *,
+        format: str,
+        stream: bool,
+        cached: bool,
+        filters: Dict[str, Any],
+        like: Dict[str, Any],
+        limit: Optional[int],
+        offset: int,
+        fields: List[str],
+        columns: List[str],
+        sort: List[OrderBy],
+        cursor: Optional[str],
+        geometry: Dict[str, Any],
+    ) -> HttpResponse:
+        """Query the resource and render it in the requested format. If cached is True, the body is going to be kept in
+        the result cache, so small xlsx, Parquet and Arrow files written to disk are read into the response instead of
+        being streamed."""
+        resource_id = resource_config.id
+        # Resource is reflected and the query is built once; every stage below reuses the same plan.
+        with timed("plan"):
+            plan = _get_data_public_error(
+                get_resource_query_plan,
+                uri=resource_config.connector_config.uri,
+                object_location=resource_config.object_location,
+                object_location_schema=resource_config.object_location_schema,
+                filters=filters,
+                like=like,
+                limit=limit,
+                offset=offset,
+                fields=fields,
+                sort=sort,
+                cursor=cursor,
+                **geometry,
+            )
+        featureCollection = plan.is_geojson and format == "json"
+
+        if format == "xlsx":
+            logger.info("Downloading resource in xlsx format: %s", resource_config)
+            with timed("count"):
+                rows = _get_data_public_error(count_plan_rows, plan, max_rows=_RESOURCE_MAX_ROWS_EXCEL)
+            if rows > _RESOURCE_MAX_ROWS_EXCEL:
+                raise ValidationError(
+                    "An xlsx cannot be generated with so many lines, please request it in another format",
+                    407,
+                ) from TooManyRowsErrorExcel
+
+        # Writers read, normalize and encode rows at once; stages measured inside them are not counted twice.
+        with timed("render"):
+            if featureCollection:
+                logger.info("Downloading resource in geojson format. FeatureCollection")
+                response = get_response_geojson(plan, resource_id, stream=stream)
+            elif format == "xlsx":
+                response = get_response_xlsx(plan, columns, resource_id, cached=cached)
+            elif format in COLUMNAR_WRITERS:
+                logger.info("Downloading resource in %s format.", format)
+                response = get_response_columnar(plan, format, columns, resource_id, cached=cached)
+            elif format in _STREAM_WRITERS and (stream or format == "ndjson"):
+                logger.info("Streaming resource in %s format.", format)
+                response = get_streaming_response(plan, format, columns, resource_id)
+            elif format == "json":
+                logger.info("Downloading resource in json format.")
+                response = get_response_json(plan, columns, resource_id)
+            else:
+                logger.info("Downloading resource in %s format.", format)
+                data = _get_data_public_error(get_plan_resource_data, plan)
+                with timed("return_list"):
+                    data = get_return_list(data, format_is_xlsx=False)
+                if format == "csv":
+                    response = get_response_csv(modify_header(data, columns))
+                else:
+                    response = Response(modify_header(data, columns))
+                track_response_size(response, resource_id, len(data))
+
+        # Writers query the rows of the page before returning, which sets the cursor of the next page.
+        if plan.next_cursor:
+            next_url = replace_query_param(request.build_absolute_uri(), "cursor", plan.next_cursor)
+            response["Link"] = f'<{next_url}>; rel="next"'
+        return response
+
+    @staticmethod
+    def _get_total_count(
+        resource_config: ResourceConfig,
+        filters: Dict[str, Any],
+        like: Dict[str, Any],
+        geometry: Dict[str, Any],
+        exact: bool,
+    ) -> Tuple[int, bool]:
+        """Get number of rows of the result and if it is an estimation. Counts are cached by resource and filters."""
+        bbox = {"bbox": geometry["bbox"], "bbox_srid": geometry["bbox_srid"]}
+        key = get_count_cache_key(resource_id=resource_config.id, filters=filters, like=like, bbox=bbox)
+        count = get_cached_count(key)
+        if count is None or (exact and count[1]):
+            plan = _get_data_public_error(
+                get_resource_query_plan,
+                uri=resource_config.connector_config.uri,
+                object_location=resource_config.object_location,
+                object_location_schema=resource_config.object_location_schema,
+                filters=filters,
+                like=like,
+                fields=[],
+                sort=[],
+                **bbox,
+            )
+            with timed("count"):
+                count = _get_data_public_error(count_plan_total_rows, plan, estimate=not exact)
+            cache_count(key, count)
+        return count
+
     def get_filename(self, request: Request, resource_config: ResourceConfig):
         """Note: this is import due that replace XLSX Render method that forcer his own filename"""
         return (
@@ -596,7 +945,7 @@ class DownloadView(APIViewMixin):
         """Get filters_like from query string.
 
         @param request: Django response instance.
-        @return: filters_like. SQL where parameters. Format {"column": value, ...}.
+        @return: filters_like. SQL where parameters. Format {"column": value, "column": {"$startswith": value}, ...}.
         """
         try:
             like = json.loads(request.query_params.get("like", "{}"))
@@ -607,12 +956,12 @@ class DownloadView(APIViewMixin):
         if not isinstance(like, dict):
             raise ValidationError("Invalid format: eg. {“key1”: “a”, “key2”: “b”}", 400)
         for _, value in like.items():
-            if type(value) not in (str, int, float, bool, None) and value is not None:
+            if type(value) not in (str, int, float, bool, dict, None) and value is not None:
                 raise ValidationError(
-                    f"Value {value} is not a String, Integer, Float, Bool, Null or None",
+                    f"Value {value} is not a String, Integer, Float, Bool, Dict, Null or None",
                     400,
                 )
-        return request.query_params.get("like")
+        return like
 
     @staticmethod
     def _get_sort(request: Request) -> List[OrderBy]:
@@ -645,6 +994,85 @@ class DownloadView(APIViewMixin):
 
         return sort
 
+    @staticmethod
+    def _get_cursor(request: Request, offset: Optional[int]) -> Optional[str]:
+        """Get cursor of keyset pagination from query string.
+
+        @param request: Django response instance.
+        @param offset: SQL offset value. It cannot be used with a cursor.
+        @return: None if pagination is by offset, empty string for the first page or cursor of a page.
+        """
+        cursor = request.query_params.get("cursor")
+        if cursor is not None and offset:
+            raise ValidationError("Cursor cannot be used with offset or _page.", 400)
+        return cursor
+
+    @staticmethod
+    def _get_count(request: Request) -> Optional[str]:
+        """Get count option from query string.
+
+        @param request: Django response instance.
+        @return: None if total count is not requested, "estimate" or "exact".
+        """
+        count = request.query_params.get("count", "false").lower()
+        if count not in ("true", "false", "1", "0", "exact"):
+            raise ValidationError('Value of count is not a boolean or "exact".', 400)
+        if count in ("false", "0"):
+            return None
+        return "exact" if count == "exact" else "estimate"
+
+    def _get_geometry(self, request: Request) -> Dict[str, Any]:
+        """Get geometry options from query string: bounding box filter, precision and simplification of GeoJSON.
+
+        @param request: Django response instance.
+        @return: bbox, bbox_srid, precision and simplify arguments of the query plan.
+        """
+        bbox = request.query_params.get("bbox")
+        if bbox:
+            try:
+                bbox = tuple(float(value) for value in bbox.split(","))
+            except ValueError as err:
+                raise ValidationError("Value of bbox is not a list of numbers.", 400) from err
+            if len(bbox) != 4 or not all(math.isfinite(value) for value in bbox):
+                raise ValidationError("Invalid format of bbox: eg. minx,miny,maxx,maxy", 400)
+            if bbox[0] > bbox[2] or bbox[1] > bbox[3]:
+                raise ValidationError("Minimum coordinates of bbox are greater than maximum coordinates.", 400)
+        else:
+            bbox = None
+
+        bbox_srid = self._get_int_field(request, "bbox_srid") or 4326
+        if bbox_srid < 0:
+            raise ValidationError("Value of bbox_srid is not valid.", 400)
+
+        precision = self._get_int_field(request, "precision")
+        if not isinstance(precision, int):
+            precision = None
+        elif not 0 <= precision <= 15:
+            raise ValidationError("Value of precision must be between 0 and 15.", 400)
+
+        simplify = request.query_params.get("simplify") or None
+        if simplify is not None:
+            try:
+                simplify = float(simplify)
+            except ValueError as err:
+                raise ValidationError("Value of simplify is not a number.", 400) from err
+            if not math.isfinite(simplify) or simplify < 0:
+                raise ValidationError("Value of simplify must be a positive number.", 400)
+
+        return {"bbox": bbox, "bbox_srid": bbox_srid, "precision": precision, "simplify": simplify}
+
+    @staticmethod
+    def _get_stream(request: Request) -> bool:
+        """Get stream flag from query string.
+
+        @param request: Django response instance.
+        @return: True if response must be streamed.
+        """
+        stream = request.query_params.get("stream", "false").lower()
+        if stream not in ("true", "false", "1", "0"):
+            raise ValidationError("Value of stream is not a boolean.", 400)
+        return stream in ("true", "1")
+
     @staticmethod
     def _get_format(request: Request) -> str:
         """Get Response_type from query string.
@@ -660,6 +1088,136 @@ class DownloadView(APIViewMixin):
         return format
 
 
+class AggregateView(DownloadView):
+    """This view allow get totals of public data from internal databases or APIs of Gobierno de Aragón. Rows are
+    grouped and aggregated by the database, so only the totals are transferred."""
+
+    _AGGREGATE_PATTERN = re.compile(r"^(\w+)(?:\(\s*(\*|[^()\s]+)\s*\))?$")
+
+    @extend_schema(
+        tags=["default"],
+        parameters=[
+            OpenApiParameter(
+                "resource_id",
+                description="Id of resource to be searched against.",
+                type=OpenApiTypes.NUMBER,
+            ),
+            OpenApiParameter(
+                "view_id",
+                description="Alias of resource_id. Backward compatibility.",
+                type=OpenApiTypes.NUMBER,
+            ),
+            OpenApiParameter(
+                "group_by",
+                description="Fields that define the groups. Default: all rows are a single group.",
+                type={"type": "array", "items": {"type": "string"}},
+            ),
+            OpenApiParameter(
+                "aggregates",
+                description="Comma separated aggregates of each group: count, count(field), sum(field), avg(field), "
+                "min(field) or max(field), e.g. 'count, sum(population)'. They are returned as count, count_field, "
+                "sum_field, etc.",
+                type={"type": "array", "items": {"type": "string"}},
+            ),
+            OpenApiParameter(
+                "filters",
+                description="Matching conditions to select rows before grouping. Same format as in download.",
+                type={"type": "object"},
+            ),
+            OpenApiParameter(
+                "like",
+                description="Like conditions to select rows before grouping. Same format as in download.",
+                type={"type": "object"},
+            ),
+            OpenApiParameter(
+                "sort",
+                description="Comma separated group fields or aggregates with ordering e.g: 'sum_population desc'.",
+                type={"type": "array", "items": {"type": "string"}},
+            ),
+            OpenApiParameter(
+                "offset",
+                description="Offset this number of groups.",
+                type=OpenApiTypes.INT,
+            ),
+            OpenApiParameter(
+                "limit",
+                description="Limit this number of groups.",
+                type=OpenApiTypes.INT,
+            ),
+            OpenApiParameter(
+                "formato",
+                description='Backward compatibility of "Accept" header or extension.',
+                type=OpenApiTypes.STR,
+            ),
+        ],
+    )
+    def get(self, request: Request, **_kwargs) -> Response:
+        """Este metodo permite obtener totales de los datos publicos de las bases de datos o APIs del Gobierno de
+        Aragón, agrupados y calculados en la base de datos.
+
+        This method allows get totals of public data from databases or APIs of Gobierno de Aragón. Rows are grouped
+        and aggregated in the database."""
+        resource_id = self._get_resource_id(request)
+        offset = self._get_offset(request)
+        limit = self._get_limit(request)
+        filters = self._get_filters(request)
+        like = self._get_like(request)
+        sort = self._get_sort(request)
+        format = self._get_format(request)
+        group_by = self._get_list_param(request, "group_by")
+        aggregates = self._get_aggregates(request)
+
+        resource_config = _get_resource(resource_id=resource_id)
+        logger.info("Aggregating resource: %s", resource_config)
+        plan = _get_data_public_error(
+            get_resource_query_plan,
+            uri=resource_config.connector_config.uri,
+            object_location=resource_config.object_location,
+            object_location_schema=resource_config.object_location_schema,
+            filters=filters,
+            like=like,
+            limit=limit,
+            offset=offset,
+            fields=[],
+            sort=[],
+        )
+        data = _get_data_public_error(get_plan_aggregate_data, plan, group_by, aggregates, sort)
+
+        if format == "csv":
+            response = get_response_csv(data)
+        else:
+            response = Response(data)
+        if format == "xlsx":
+            filename = self.get_filename(request, resource_config)
+            response["content-disposition"] = f'attachment; filename="{filename}.xlsx"'
+        return response
+
+    @staticmethod
+    def _get_list_param(request: Request, name: str) -> List[str]:
+        """Get a list from query string. Format: name=item1,item2 or name=item1&name=item2."""
+        return [
+            item.strip()
+            for value in request.query_params.getlist(name)
+            for item in value.split(",")
+            if item.strip()
+        ]
+
+    def _get_aggregates(self, request: Request) -> List[Aggregate]:
+        """Get aggregates from query string.
+
+        @param request: Django response instance.
+        @return: List of Aggregate. This are used in SQL sentences.
+        """
+        aggregates = []
+        for item in self._get_list_param(request, "aggregates"):
+            match = self._AGGREGATE_PATTERN.match(item)
+            if not match:
+                raise ValidationError(f"Aggregate {item} is not allowed. Ej: count, sum(fieldname).")
+            function, field = match.groups()
+            aggregates.append(Aggregate(function=function.lower(), field=None if field in (None, "*") else field))
+        return aggregates
+
+
 class ShowColumnsView(XLSXFileMixin, APIViewMixin):
     """This view allows to get datatype of each column from a resource. If the view has a shape file download and
     preview endpoints' response will be in geojson format if JSON response type is selected-"""
@@ -723,3 +1281,94 @@ class ResourcesView(XLSXFileMixin, APIViewMixin):  # pylint: disable=too-few-pub
             .all()
         )
         return Response(get_return_list(resources, format_is_xlsx=False))
+
+
+class TileView(DownloadView):
+    """This view allow get public data with geometry from PostGIS databases of Gobierno de Aragón as Mapbox Vector
+    Tiles, so map viewers only load the features of the visible area."""
+
+    _MAX_ZOOM = 24
+    _MVT_CONTENT_TYPE = "application/vnd.mapbox-vector-tile"
+
+    # Tiles are returned as HttpResponse; renderer is only used by errors.
+    content_negotiation_class = FirstRendererContentNegotiation
+    renderer_classes = [JSONRenderer]
+
+    @extend_schema(
+        tags=["default"],
+        parameters=[
+            OpenApiParameter(
+                "resource_id",
+                location=OpenApiParameter.PATH,
+                description="Id of resource.",
+                type=OpenApiTypes.INT,
+            ),
+            OpenApiParameter("z", location=OpenApiParameter.PATH, description="Zoom level.", type=OpenApiTypes.INT),
+            OpenApiParameter("x", location=OpenApiParameter.PATH, description="Tile column.", type=OpenApiTypes.INT),
+            OpenApiParameter(
+                "y", location=OpenApiParameter.PATH, description="Tile row, from the north.", type=OpenApiTypes.INT
+            ),
+            OpenApiParameter(
+                "filters",
+                description="Matching conditions to select features. Same format as in download.",
+                type={"type": "object"},
+            ),
+            OpenApiParameter(
+                "like",
+                description="Like conditions to select features. Same format as in download.",
+                type={"type": "object"},
+            ),
+            OpenApiParameter(
+                "fields",
+                description="Properties of the features. Default: all fields.",
+                type={"type": "array", "items": {"type": "string"}},
+            ),
+        ],
+        responses={
+            200: {
+                "description": "Mapbox Vector Tile with a layer named as the resource.",
+                "content": {_MVT_CONTENT_TYPE: {"schema": {"type": "string", "format": "binary"}}},
+            },
+            204: {"description": "Tile does not have features."},
+        },
+    )
+    def get(self, request: Request, resource_id: int, z: int, x: int, y: int, **_kwargs) -> HttpResponse:
+        """Este metodo permite obtener los datos publicos con geometria de las bases de datos PostGIS del Gobierno de
+        Aragón como teselas vectoriales (Mapbox Vector Tile) en el esquema XYZ.
+
+        This method allows get public data with geometry from PostGIS databases of Gobierno de Aragón as Mapbox Vector
+        Tiles of the XYZ scheme."""
+        if z > self._MAX_ZOOM or x >= 2 ** z or y >= 2 ** z:
+            raise ValidationError(f"Tile {z}/{x}/{y} does not exist. Maximum zoom level is {self._MAX_ZOOM}.", 400)
+        filters = self._get_filters(request)
+        like = self._get_like(request)
+        fields = self._get_fields(request)
+
+        resource_config = _get_resource(resource_id=resource_id)
+        path = get_tile_path(resource_id, {"filters": filters, "like": like, "fields": fields}, z, x, y)
+        compressed_tile = get_cached_tile(path)
+        if compressed_tile is None:
+            logger.info("Rendering tile %s/%s/%s of resource: %s", z, x, y, resource_config)
+            plan = _get_data_public_error(
+                get_resource_query_plan,
+                uri=resource_config.connector_config.uri,
+                object_location=resource_config.object_location,
+                object_location_schema=resource_config.object_location_schema,
+                filters=filters,
+                like=like,
+                fields=fields,
+                sort=[],
+            )
+            tile = _get_data_public_error(get_plan_resource_tile, plan, z, x, y, layer=resource_config.name)
+            compressed_tile = compress_tile(tile)
+            cache_tile(path, compressed_tile)
+
+        if not compressed_tile:
+            return HttpResponse(status=204, content_type=self._MVT_CONTENT_TYPE)
+        if select_encoding(request, ["gzip"]):
+            response = HttpResponse(compressed_tile, content_type=self._MVT_CONTENT_TYPE)
+            set_content_encoding(response, "gzip")
+        else:
+            response = HttpResponse(gzip.decompress(compressed_tile), content_type=self._MVT_CONTENT_TYPE)
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
@@ -34,6 +34,8 @@ urlpatterns = [
     path("api/summary/", views.HealthSummaryView.as_view(), name="api_summary"),
     path("api/check/", views.HealthCheckView.as_view(), name="api_check"),
     path("api/history/", views.HealthHistoryView.as_view(), name="api_history"),
+    path("api/cache/", views.CacheStatsView.as_view(), name="api_cache"),
+    path("api/timings/", views.TimingStatsView.as_view(), name="api_timings"),
     path(
         "api/connector/<int:connector_id>/detail/",
         views.ConnectorHealthDetailAPIView.as_view(),
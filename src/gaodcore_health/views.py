@@ -17,6 +17,9 @@ from rest_framework import status
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 
+from connectors import get_api_cache_stats, get_model_cache_stats
+from gaodcore.result_cache import get_result_cache_stats
+from timing import get_timing_histograms
 from gaodcore_manager.models import ConnectorConfig, ResourceConfig
 from .models import HealthCheckResult, ResourceHealthCheckResult
 from .mixins import ConnectorHealthMixin, ResourceHealthMixin, HealthContextMixin
@@ -1212,3 +1215,47 @@ class ResourceHealthDetailAPIView(APIView):
 
         serializer = ResourceHealthDetailSerializer(detail)
         return Response(serializer.data)
+
+
+class CacheStatsView(APIView):
+    """
+    Get hit and miss counters of the caches of the worker that serves the request.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        tags=["health"],
+        summary="Get cache counters",
+        description="Returns hits, misses, entries and bytes of the download, reflected model and API resource caches "
+        "of the worker that serves the request",
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def get(self, _request):
+        """Get cache counters of this worker."""
+        return Response(
+            {
+                "result_cache": get_result_cache_stats(),
+                "model_cache": get_model_cache_stats(),
+                "api_cache": get_api_cache_stats(),
+            }
+        )
+
+
+class TimingStatsView(APIView):
+    """
+    Get histograms of the stages of the downloads served by the worker that serves the request.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        tags=["health"],
+        summary="Get timing histograms",
+        description="Returns, by resource and stage (reflection, query, normalization, render...), the count, sum and "
+        "cumulative buckets in milliseconds of the downloads served by the worker that serves the request",
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def get(self, _request):
+        """Get timing histograms of this worker."""
+        return Response(get_timing_histograms())
@@ -1,21 +1,54 @@
 # Register your models here.
 from django.contrib import admin
 
+from connectors import purge_model_cache
+from gaodcore.result_cache import purge_result_cache
+from gaodcore.tile_cache import purge_tile_cache
 from .models import ConnectorConfig, ResourceConfig, ResourceSizeConfig
 
 
+@admin.action(description="Purge reflected metadata cache")
+def purge_connector_model_cache(modeladmin, request, queryset):
+    removed = sum(purge_model_cache(connector.uri) for connector in queryset)
+    modeladmin.message_user(request, f"{removed} cached models removed.")
+
+
+@admin.action(description="Purge reflected metadata cache")
+def purge_resource_model_cache(modeladmin, request, queryset):
+    removed = sum(
+        purge_model_cache(
+            resource.connector_config.uri,
+            object_location=resource.object_location,
+            object_location_schema=resource.object_location_schema,
+        )
+        for resource in queryset.select_related("connector_config")
+    )
+    modeladmin.message_user(request, f"{removed} cached models removed.")
+
+
+@admin.action(description="Purge cached downloads and tiles")
+def purge_resource_result_cache(modeladmin, request, queryset):
+    resource_ids = list(queryset.values_list("id", flat=True))
+    removed = purge_result_cache(resource_ids)
+    purge_tile_cache(resource_ids)
+    modeladmin.message_user(request, f"{removed} cached downloads removed.")
+
+
 class ConnectorConfigAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'uri', 'enabled')
     list_filter = ('enabled',)
     search_fields = ('id', 'name', 'uri')
+    actions = [purge_connector_model_cache]
 
 
 class ResourceConfigAdmin(admin.ModelAdmin):
     list_display = (
-        'id', 'name', 'connector_config', 'object_location', 'object_location_schema', 'enabled')
+        'id', 'name', 'connector_config', 'object_location', 'object_location_schema', 'cache_ttl',
+        'enabled')
     list_filter = ('enabled',)
     search_fields = (
         'id', 'name', 'connector_config__name', 'object_location', 'object_location_schema')
+    actions = [purge_resource_model_cache, purge_resource_result_cache]
 
 
 class ResourceSizeConfigAdmin(admin.ModelAdmin):
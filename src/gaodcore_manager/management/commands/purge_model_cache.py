@@ -0,0 +1,21 @@
+"""
+Django management command to purge the reflected metadata cache.
+
+Reflected models live in the memory of each worker, so this command asks all workers to drop them. Workers reflect
+the tables again on next request.
+"""
+
+from django.core.management.base import BaseCommand
+
+from connectors import purge_model_cache
+
+
+class Command(BaseCommand):
+    help = "Purge reflected table metadata cached by all workers"
+
+    def handle(self, *args, **options):
+        """Main command handler."""
+        purge_model_cache()
+        self.stdout.write(
+            self.style.SUCCESS("Reflected metadata cache purged. Workers will reflect tables again.")
+        )
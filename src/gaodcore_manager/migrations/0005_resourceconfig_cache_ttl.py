@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gaodcore_manager', '0004_alter_connectorconfig_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resourceconfig',
+            name='cache_ttl',
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text='Seconds a download of this resource is cached. Empty: default of the configuration. '
+                '0: not cached.',
+                null=True,
+                verbose_name='Cache TTL',
+            ),
+        ),
+    ]
@@ -64,6 +64,8 @@ class ResourceConfig(models.Model):
      resources must be null.
     @param object_location_schema: CharField - Only used in database resources. Not required if in the default schema.
      API resources must be null.
+    @param cache_ttl: PositiveIntegerField - Seconds a download of this resource is cached. Empty: default of the
+     configuration. 0: not cached.
     @param created_at: DateTimeField - Timestamp when the record was created.
     @param updated_at: DateTimeField - Timestamp when the record was last updated.
     """
@@ -101,6 +103,14 @@ class ResourceConfig(models.Model):
         verbose_name=_("Object Location Schema"),
         help_text=_("Only used in database resources. Is not required if are in default schema. APIs resources must be null."),
     )
+    cache_ttl = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name=_("Cache TTL"),
+        help_text=_(
+            "Seconds a download of this resource is cached. Empty: default of the configuration. 0: not cached."
+        ),
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name=_("Created At")
@@ -6,7 +6,7 @@ from typing import Optional, Dict, List, Union
 from urllib.parse import urljoin
 from sys import platform
 import yaml
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 try:
     _CONFIG_PATH = os.environ['CONFIG_PATH']
@@ -107,7 +107,97 @@ class HealthMonitoringConfig(BaseModel):
     alerts: HealthAlertsConfig = HealthAlertsConfig()
 
 
+class EnginePoolConfig(BaseModel):
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: int = 30
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+
+
+class EnginePoolsConfig(BaseModel):
+    default: EnginePoolConfig = EnginePoolConfig()
+    # Overrides by ConnectorConfig name.
+    connectors: Dict[str, EnginePoolConfig] = {}
+
+
+class ModelCacheConfig(BaseModel):
+    ttl_seconds: int = 3600
+    max_size: int = 512
+
+
+class ApiCacheConfig(BaseModel):
+    # Seconds a downloaded API resource is used without asking the server.
+    ttl_seconds: int = 300
+    # Seconds an unused downloaded API resource is kept to be revalidated with ETag / Last-Modified.
+    max_stale_seconds: int = 86400
+    # Maximum number of API resources kept by each worker. 0 disables the cache.
+    max_size: int = 32
+    # Directory of the SQLite files. Default: temporary directory of the system.
+    directory: Optional[str] = None
+
+
+class ResultCacheConfig(BaseModel):
+    # Default seconds a download is cached. It can be changed by each ResourceConfig. 0 disables the cache.
+    ttl_seconds: int = 300
+    # Memory used by cached downloads of each worker.
+    max_bytes: int = 268435456
+    # Bigger downloads are not cached.
+    max_entry_bytes: int = 16777216
+    max_size: int = 4096
+    # Seconds the ETag and Last-Modified of a download answer conditional requests without querying the connector,
+    # also if the download is not cached. Resources with a longer TTL keep them for their TTL.
+    validator_ttl_seconds: int = 60
+
+
+class CountCacheConfig(BaseModel):
+    # Seconds the total count of a filtered result is cached.
+    ttl_seconds: int = 60
+    max_size: int = 4096
+
+
+class TileCacheConfig(BaseModel):
+    # Seconds a vector tile is cached. 0 disables the cache.
+    ttl_seconds: int = 86400
+    # Directory of the tiles, shared by all workers. Default: gaodcore_tiles in the temporary directory of the system.
+    directory: Optional[str] = None
+
+
+class CompressionConfig(BaseModel):
+    # Compress responses with gzip, or brotli and zstd when their packages are installed.
+    enabled: bool = True
+    # Smaller responses are not compressed. Streaming responses are always compressed.
+    min_size: int = 200
+    gzip_level: int = 6
+    brotli_quality: int = 5
+    zstd_level: int = 3
+
+
+class ResourceStatsConfig(BaseModel):
+    # Seconds between writes of the size statistics of downloaded resources.
+    flush_interval_seconds: int = 30
+
+
+class TimingConfig(BaseModel):
+    # Measure the stages of downloads, log them and add them to histograms by resource.
+    enabled: bool = True
+    # Send the stages in the Server-Timing header.
+    server_timing: bool = True
+
+
+class StreamingConfig(BaseModel):
+    # Rows fetched from database in each round trip of a server side cursor.
+    batch_size: int = 1000
+    # Bytes buffered before sending a chunk of a streamed response.
+    chunk_size: int = 65536
+    # Rows of each row group of Parquet downloads and of each record batch of Arrow downloads.
+    row_group_size: int = 65536
+
+
 class CommonConfig(BaseModel):
+    # model_cache is a configuration field, not a pydantic method.
+    model_config = ConfigDict(protected_namespaces=())
+
     allowed_hosts: List[str]
     csrf_trusted_origins: Optional[List[str]] = []
     secret_key: str
@@ -115,6 +205,16 @@ class CommonConfig(BaseModel):
     databases: Dict[str, Database]
     cache_ttl: int
     health_monitoring: HealthMonitoringConfig = HealthMonitoringConfig()
+    engine_pools: EnginePoolsConfig = EnginePoolsConfig()
+    model_cache: ModelCacheConfig = ModelCacheConfig()
+    api_cache: ApiCacheConfig = ApiCacheConfig()
+    result_cache: ResultCacheConfig = ResultCacheConfig()
+    count_cache: CountCacheConfig = CountCacheConfig()
+    tile_cache: TileCacheConfig = TileCacheConfig()
+    streaming: StreamingConfig = StreamingConfig()
+    compression: CompressionConfig = CompressionConfig()
+    resource_stats: ResourceStatsConfig = ResourceStatsConfig()
+    timing: TimingConfig = TimingConfig()
 
 
 class Config(BaseModel):
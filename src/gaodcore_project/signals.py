@@ -1,8 +1,62 @@
 from axes.signals import user_locked_out
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from rest_framework.exceptions import PermissionDenied
 
+from connectors import dispose_engine, purge_model_cache
+from gaodcore.result_cache import purge_result_cache
+from gaodcore.tile_cache import purge_tile_cache
+from gaodcore_manager.models import ConnectorConfig, ResourceConfig
+
 
 @receiver(user_locked_out)
 def raise_permission_denied(*args, **kwargs):
     raise PermissionDenied("Too many failed login attempts")
+
+
+@receiver(pre_save, sender=ConnectorConfig)
+def remember_previous_connector_uri(sender, instance: ConnectorConfig, **kwargs):
+    """Keep URI before saving, so its engine can be disposed if URI changes."""
+    instance._previous_uri = (
+        sender.objects.filter(pk=instance.pk).values_list("uri", flat=True).first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=ConnectorConfig)
+def dispose_connector_engine_on_save(sender, instance: ConnectorConfig, **kwargs):
+    """Pooled connections of a modified or disabled connector must not be reused."""
+    previous_uri = getattr(instance, "_previous_uri", None)
+    if previous_uri and previous_uri != instance.uri:
+        dispose_engine(previous_uri)
+        purge_model_cache(previous_uri)
+    dispose_engine(instance.uri)
+    purge_model_cache(instance.uri)
+    resource_ids = list(instance.resourceconfig_set.values_list("id", flat=True))
+    purge_result_cache(resource_ids)
+    purge_tile_cache(resource_ids)
+
+
+@receiver(post_delete, sender=ConnectorConfig)
+def dispose_connector_engine_on_delete(sender, instance: ConnectorConfig, **kwargs):
+    dispose_engine(instance.uri)
+    purge_model_cache(instance.uri)
+
+
+@receiver(post_save, sender=ResourceConfig)
+def purge_resource_model_on_save(sender, instance: ResourceConfig, **kwargs):
+    """Object location may have changed, so its reflected model must be reflected again."""
+    purge_model_cache(
+        instance.connector_config.uri,
+        object_location=instance.object_location,
+        object_location_schema=instance.object_location_schema,
+    )
+    purge_result_cache([instance.id])
+    purge_tile_cache([instance.id])
+
+
+@receiver(post_delete, sender=ResourceConfig)
+def purge_resource_downloads_on_delete(sender, instance: ResourceConfig, **kwargs):
+    purge_result_cache([instance.id])
+    purge_tile_cache([instance.id])
@@ -0,0 +1,13 @@
+import pytest
+from django.test import Client
+
+
+@pytest.mark.django_db
+def test_transport_ndjson(client: Client, mocker):
+    mocker.patch("gaodcore_transports.views.zaragoza.get_lines", return_value=[{"id": "21"}, {"id": "Ci1"}])
+
+    response = client.get("/GA_OD_Core/gaodcore-transports/zaragoza/lines.ndjson")
+
+    assert response.status_code == 200
+    assert response["content-type"] == "application/x-ndjson; charset=utf-8"
+    assert response.content == b'{"id":"21"}\n{"id":"Ci1"}\n'
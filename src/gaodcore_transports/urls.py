@@ -30,4 +30,4 @@ urlpatterns = format_suffix_patterns([
     path('zaragoza/arrival_ori_des', ArrivalOriDesView.as_view()),
     path('zaragoza/sae', SAEView.as_view())
 ],
-                                     allowed=['json', 'xml', 'csv', 'yaml', 'xlsx'])
+                                     allowed=['json', 'xml', 'csv', 'yaml', 'xlsx', 'ndjson'])
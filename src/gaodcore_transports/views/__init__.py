@@ -0,0 +1,12 @@
+"""GAODCore transports views."""
+
+from rest_framework.settings import api_settings
+
+from custom_renderers import NDJSONRenderer
+from views import APIViewMixin
+
+
+class TransportViewMixin(APIViewMixin):
+    """Mixin of transports views. Rows can also be rendered as newline delimited JSON, one row per line."""
+
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer]
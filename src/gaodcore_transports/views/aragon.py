@@ -14,10 +14,10 @@ from rest_framework.response import Response
 
 from gaodcore_project.settings import CONFIG
 from utils import download, download_bulk, get_return_list, flatten_dict
-from views import APIViewMixin
+from gaodcore_transports.views import TransportViewMixin
 
 
-class APIViewGetDataMixin(APIViewMixin, metaclass=ABCMeta):  # pylint: disable=too-few-public-methods
+class APIViewGetDataMixin(TransportViewMixin, metaclass=ABCMeta):  # pylint: disable=too-few-public-methods
     """Mixin of helpers that helps the generations Aragon transports views."""
     _DATA_FIELD = 'items'
     _OPTIONS = {}
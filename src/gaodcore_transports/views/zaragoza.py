@@ -15,7 +15,7 @@ from rest_framework.response import Response
 
 from gaodcore_project.settings import CONFIG
 from utils import get_return_list, download, download_async, gather_limited
-from views import APIViewMixin
+from gaodcore_transports.views import TransportViewMixin
 import logging
 
 logger = logging.getLogger(__name__)
@@ -111,7 +111,7 @@ def get_lines():
     return download(CONFIG.projects.transport.zaragoza.get_url("lines"))["lines"]
 
 
-class ZaragozaTransportMixin(APIViewMixin):
+class ZaragozaTransportMixin(TransportViewMixin):
     """Mixin with field names."""
 
     _LINE_ID_FIELD = "line_id"
@@ -124,7 +124,7 @@ class ZaragozaTransportMixin(APIViewMixin):
 
 
 @method_decorator(name="get", decorator=extend_schema(tags=["transports"]))
-class LineView(APIViewMixin):  # pylint: disable=too-few-public-methods
+class LineView(TransportViewMixin):  # pylint: disable=too-few-public-methods
     """Returns the list of available bus lines, for the current date."""
 
     @staticmethod
@@ -135,7 +135,7 @@ class LineView(APIViewMixin):  # pylint: disable=too-few-public-methods
 
 
 @method_decorator(name="get", decorator=extend_schema(tags=["transports"]))
-class LineStopsView(APIViewMixin):  # pylint: disable=too-few-public-methods
+class LineStopsView(TransportViewMixin):  # pylint: disable=too-few-public-methods
     """Returns the list of available stop lines, for the current date."""
 
     @staticmethod
@@ -146,7 +146,7 @@ class LineStopsView(APIViewMixin):  # pylint: disable=too-few-public-methods
 
 
 @method_decorator(name="get", decorator=extend_schema(tags=["transports"]))
-class RoutesView(APIViewMixin):  # pylint: disable=too-few-public-methods
+class RoutesView(TransportViewMixin):  # pylint: disable=too-few-public-methods
     """Returns the routes that a line performs, for the current date."""
 
     @staticmethod
@@ -210,7 +210,7 @@ class ArrivalTimeView(ZaragozaTransportMixin):  # pylint: disable=too-few-public
 
 
 @method_decorator(name="get", decorator=extend_schema(tags=["transports"]))
-class NoticesView(APIViewMixin):  # pylint: disable=too-few-public-methods
+class NoticesView(TransportViewMixin):  # pylint: disable=too-few-public-methods
     """Returns the different warnings that may be produced or generated by the system, for the current date."""
 
     _ENDPOINT = "notices"
@@ -227,7 +227,7 @@ class NoticesView(APIViewMixin):  # pylint: disable=too-few-public-methods
 
 
 @method_decorator(name="get", decorator=extend_schema(tags=["transports"]))
-class OriginsView(APIViewMixin):  # pylint: disable=too-few-public-methods
+class OriginsView(TransportViewMixin):  # pylint: disable=too-few-public-methods
     """Returns the list of municipalities of origin for the current date."""
 
     @staticmethod
@@ -238,7 +238,7 @@ class OriginsView(APIViewMixin):  # pylint: disable=too-few-public-methods
 
 
 @method_decorator(name="get", decorator=extend_schema(tags=["transports"]))
-class DestinationsView(APIViewMixin):  # pylint: disable=too-few-public-methods
+class DestinationsView(TransportViewMixin):  # pylint: disable=too-few-public-methods
     """Returns the list of destination municipalities, depending on the origin, for the current date."""
 
     @staticmethod
@@ -386,7 +386,7 @@ class StopsOriDesView(ZaragozaTransportMixin):  # pylint: disable=too-few-public
 
 
 @method_decorator(name="get", decorator=extend_schema(tags=["transports"]))
-class ArrivalOriDesView(APIViewMixin):  # pylint: disable=too-few-public-methods
+class ArrivalOriDesView(TransportViewMixin):  # pylint: disable=too-few-public-methods
     """Returns the time of arrival at the origin and destination, for each of the expeditions that pass through the two
     locations, for the current date."""
 
@@ -419,7 +419,7 @@ class ArrivalOriDesView(APIViewMixin):  # pylint: disable=too-few-public-methods
 
 
 @method_decorator(name="get", decorator=extend_schema(tags=["transports"]))
-class SAEView(APIViewMixin):  # pylint: disable=too-few-public-methods
+class SAEView(TransportViewMixin):  # pylint: disable=too-few-public-methods
     _ENDPOINT = "sae"
     """Returns the geoposicions of the buses at the time of the query."""
 
@@ -0,0 +1,214 @@
+"""Normalization of values read from resources.
+
+Converters are selected once per query from the reflected column types, so each value is only processed by the
+converter of its column. Values whose type does not match the reflected type of their column are normalized by the
+generic per-value functions.
+"""
+
+import decimal
+import math
+import re
+import uuid
+from datetime import date, datetime, time, timedelta
+from typing import Any, Callable, Iterable, List
+
+from django.utils.duration import duration_iso_string
+from django.utils.functional import Promise
+from sqlalchemy import Column
+from sqlalchemy.sql import sqltypes
+from sqlalchemy.types import Numeric
+
+_CONTROL_CHARACTERS_PATTERN = r"[\x00-\x08\x0B\x0C\x0E-\x1F\x7F\n]"
+# Same characters as _CONTROL_CHARACTERS_PATTERN, as a str.translate table that removes them.
+_CONTROL_CHARACTERS = str.maketrans(
+    "", "", "".join(chr(code) for code in [*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20), 0x7F, 0x0A])
+)
+
+
+# Add feature to sanitize text include control characters
+def sanitize_control_charcters(text):
+    if re.search(_CONTROL_CHARACTERS_PATTERN, str(text)):
+        text = re.sub(_CONTROL_CHARACTERS_PATTERN, "", text)
+    try:
+        text = text.decode("utf-8")
+    except Exception:
+        pass
+    if isinstance(text, str):
+        text = text.strip()
+    return text
+
+
+def sanitize_text(text: str) -> str:
+    """Remove control characters and surrounding whitespaces. Same result as sanitize_control_charcters for str."""
+    # isprintable is a single C scan; most values do not have any control character.
+    if not text.isprintable():
+        text = text.translate(_CONTROL_CHARACTERS)
+    return text.strip()
+
+
+def normalize_value(value: Any) -> Any:
+    """Normalize a value: UUID as string, integral numbers as int and text without control characters."""
+    if isinstance(value, uuid.UUID):
+        # Handle UUID objects by converting to string
+        return str(value)
+    if isinstance(value, (decimal.Decimal, Promise, float, Numeric)):
+        parte_decimal, parte_entera = math.modf(value)
+        if parte_decimal == 0.0 and not math.isinf(parte_entera):
+            return int(value)
+    return sanitize_control_charcters(value)
+
+
+def normalize_feature_value(value: Any) -> Any:
+    """Normalize a value of the properties of a GeoJSON feature: numbers as int or str and dates as ISO strings."""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (decimal.Decimal, Promise, float, Numeric)):
+        parte_decimal, parte_entera = math.modf(value)
+        if parte_decimal == 0.0 and not math.isinf(parte_entera):
+            return int(value)
+        return str(value)
+    if isinstance(value, datetime):
+        return _datetime_to_iso(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, time):
+        return _time_to_iso(value)
+    if isinstance(value, timedelta):
+        return duration_iso_string(value)
+    return sanitize_control_charcters(value)
+
+
+def _datetime_to_iso(value: datetime) -> str:
+    r = value.isoformat()
+    if value.microsecond:
+        r = r[:23] + r[26:]
+    if r.endswith("+00:00"):
+        r = r[:-6] + "Z"
+    return r
+
+
+def _time_to_iso(value: time) -> str:
+    r = value.isoformat()
+    if value.microsecond:
+        r = r[:12]
+    return r
+
+
+def _normalize_text(value: Any) -> Any:
+    if type(value) is str:
+        return sanitize_text(value)
+    if value is None:
+        return None
+    return normalize_value(value)
+
+
+def _is_integral_decimal(value: decimal.Decimal) -> bool:
+    return value.is_finite() and value == value.to_integral_value()
+
+
+def _normalize_number(value: Any) -> Any:
+    value_type = type(value)
+    if value_type is float:
+        return int(value) if value.is_integer() else value
+    if value_type is decimal.Decimal:
+        return int(value) if _is_integral_decimal(value) else value
+    if value is None or value_type is int:
+        return value
+    return normalize_value(value)
+
+
+def _normalize_feature_number(value: Any) -> Any:
+    value_type = type(value)
+    if value_type is float:
+        return int(value) if value.is_integer() else str(value)
+    if value_type is decimal.Decimal:
+        return int(value) if _is_integral_decimal(value) else str(value)
+    if value is None or value_type is int:
+        return value
+    return normalize_feature_value(value)
+
+
+def _normalize_uuid(value: Any) -> Any:
+    if type(value) is uuid.UUID:
+        return str(value)
+    if value is None:
+        return None
+    return normalize_value(value)
+
+
+def _typed(value_type: type, convert: Callable[[Any], Any], fallback: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """Converter that applies convert to values of value_type and fallback to other values, except None."""
+
+    def converter(value: Any) -> Any:
+        if type(value) is value_type:
+            return convert(value)
+        if value is None:
+            return None
+        return fallback(value)
+
+    return converter
+
+
+def _skip(*value_types: type, fallback: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """Converter that does not modify values of value_types nor None."""
+
+    def converter(value: Any) -> Any:
+        if value is None or type(value) in value_types:
+            return value
+        return fallback(value)
+
+    return converter
+
+
+def _get_converter(column: Column) -> Callable[[Any], Any]:
+    column_type = column.type
+    if isinstance(column_type, sqltypes.String):
+        return _normalize_text
+    if isinstance(column_type, sqltypes.Numeric):
+        return _normalize_number
+    if isinstance(column_type, sqltypes.Uuid):
+        return _normalize_uuid
+    if isinstance(column_type, sqltypes.Boolean):
+        return _skip(bool, fallback=normalize_value)
+    if isinstance(column_type, sqltypes.Integer):
+        return _skip(int, fallback=normalize_value)
+    if isinstance(column_type, (sqltypes.Date, sqltypes.DateTime, sqltypes.Time, sqltypes.Interval)):
+        return _skip(date, datetime, time, timedelta, fallback=normalize_value)
+    return normalize_value
+
+
+def _get_feature_converter(column: Column) -> Callable[[Any], Any]:
+    column_type = column.type
+    if isinstance(column_type, sqltypes.String):
+        return _typed(str, sanitize_text, normalize_feature_value)
+    if isinstance(column_type, sqltypes.Numeric):
+        return _normalize_feature_number
+    if isinstance(column_type, sqltypes.Boolean):
+        return _skip(bool, fallback=normalize_feature_value)
+    if isinstance(column_type, sqltypes.Integer):
+        return _skip(int, fallback=normalize_feature_value)
+    if isinstance(column_type, sqltypes.DateTime):
+        return _typed(datetime, _datetime_to_iso, normalize_feature_value)
+    if isinstance(column_type, sqltypes.Date):
+        return _typed(date, date.isoformat, normalize_feature_value)
+    if isinstance(column_type, sqltypes.Time):
+        return _typed(time, _time_to_iso, normalize_feature_value)
+    return normalize_feature_value
+
+
+def _compile(converters: List[Callable[[Any], Any]]) -> Callable[[Iterable[Any]], tuple]:
+    def normalize(row: Iterable[Any]) -> tuple:
+        return tuple([convert(value) for convert, value in zip(converters, row)])
+
+    return normalize
+
+
+def get_row_normalizer(columns: Iterable[Column]) -> Callable[[Iterable[Any]], tuple]:
+    """Get a function that normalizes rows with values of columns. See normalize_value."""
+    return _compile([_get_converter(column) for column in columns])
+
+
+def get_feature_normalizer(columns: Iterable[Column]) -> Callable[[Iterable[Any]], tuple]:
+    """Get a function that normalizes properties of GeoJSON features with values of columns. See
+    normalize_feature_value."""
+    return _compile([_get_feature_converter(column) for column in columns])
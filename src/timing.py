@@ -0,0 +1,195 @@
+"""Timing of the stages of a request.
+
+Stages of the download pipeline (reflection, query, normalization, return list, render...) are wrapped with timed().
+The TimingMiddleware keeps the timings of the request being served in a context variable, so stages are measured
+without passing anything through the call chain, and timed() does nothing outside a request. Nested stages are not
+counted twice: the time of a stage excludes the time of the stages inside it.
+
+When the response is ready, timings are sent in the Server-Timing header, logged with structured fields and added to
+histograms of the resource of the request, available in /GA_OD_Core_admin/health/api/timings/. The body of a streaming
+response is sent after the middleware returns, so its time is the "stream" stage, which is only logged and added to the
+histograms.
+"""
+
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.http import HttpRequest, HttpResponse
+
+from gaodcore_project.settings import CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in milliseconds of the buckets of the histograms. The last bucket has no upper bound.
+HISTOGRAM_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class Timings:
+    """Milliseconds spent in each stage of a request."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+        self.resource_id: Optional[int] = None
+        # Time of the nested stages of each running stage.
+        self._children: List[float] = []
+
+    def add(self, stage: str, milliseconds: float) -> None:
+        self.durations[stage] = self.durations.get(stage, 0.0) + milliseconds
+
+    def elapsed(self) -> float:
+        return (time.perf_counter() - self.start) * 1000
+
+
+_TIMINGS: contextvars.ContextVar[Optional[Timings]] = contextvars.ContextVar("timings", default=None)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Add the time of the block, without the time of the stages inside it, to stage of the current request."""
+    timings = _TIMINGS.get()
+    if timings is None:
+        yield
+        return
+    timings._children.append(0.0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        children = timings._children.pop()
+        timings.add(stage, elapsed - children)
+        if timings._children:
+            timings._children[-1] += elapsed
+
+
+def set_timing_resource(resource_id: int) -> None:
+    """Resource whose histograms receive the timings of the current request."""
+    timings = _TIMINGS.get()
+    if timings is not None:
+        timings.resource_id = resource_id
+
+
+class _Histogram:
+    def __init__(self):
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, milliseconds: float) -> None:
+        self.buckets[bisect.bisect_left(HISTOGRAM_BUCKETS, milliseconds)] += 1
+        self.count += 1
+        self.sum += milliseconds
+
+
+_HISTOGRAMS: Dict[Tuple[int, str], _Histogram] = {}
+_HISTOGRAMS_LOCK = threading.Lock()
+
+
+def _observe(resource_id: int, durations: Dict[str, float]) -> None:
+    with _HISTOGRAMS_LOCK:
+        for stage, milliseconds in durations.items():
+            _HISTOGRAMS.setdefault((resource_id, stage), _Histogram()).observe(milliseconds)
+
+
+def get_timing_histograms() -> Dict[str, Dict[str, dict]]:
+    """Histograms of the milliseconds of each stage by resource of this worker. Buckets are cumulative, like
+    Prometheus histograms, and keyed by their upper bound."""
+    bounds = [str(bound) for bound in HISTOGRAM_BUCKETS] + ["+Inf"]
+    result: Dict[str, Dict[str, dict]] = {}
+    with _HISTOGRAMS_LOCK:
+        for (resource_id, stage), histogram in sorted(_HISTOGRAMS.items()):
+            cumulative, buckets = 0, {}
+            for bound, count in zip(bounds, histogram.buckets):
+                cumulative += count
+                buckets[bound] = cumulative
+            result.setdefault(str(resource_id), {})[stage] = {
+                "count": histogram.count,
+                "sum": round(histogram.sum, 3),
+                "buckets": buckets,
+            }
+    return result
+
+
+def reset_timing_histograms() -> None:
+    with _HISTOGRAMS_LOCK:
+        _HISTOGRAMS.clear()
+
+
+def get_server_timing(durations: Dict[str, float]) -> str:
+    """Value of a Server-Timing header with durations in milliseconds."""
+    return ", ".join(f"{stage};dur={milliseconds:.1f}" for stage, milliseconds in durations.items())
+
+
+def _report(request: HttpRequest, response: HttpResponse, timings: Timings, durations: Dict[str, float]) -> None:
+    if timings.resource_id is not None:
+        _observe(timings.resource_id, durations)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Timings of %s resource_id=%s status=%s %s",
+            request.path,
+            timings.resource_id,
+            response.status_code,
+            " ".join(f"{stage}={milliseconds:.1f}ms" for stage, milliseconds in durations.items()),
+            extra={
+                "path": request.path,
+                "resource_id": timings.resource_id,
+                "status": response.status_code,
+                "timings": {stage: round(milliseconds, 3) for stage, milliseconds in durations.items()},
+            },
+        )
+
+
+def _time_stream(
+    chunks: Iterable[bytes], request: HttpRequest, response: HttpResponse, timings: Timings
+) -> Iterator[bytes]:
+    start = time.perf_counter()
+    try:
+        yield from chunks
+    finally:
+        timings.add("stream", (time.perf_counter() - start) * 1000)
+        durations = {**timings.durations, "total": timings.elapsed()}
+        _report(request, response, timings, durations)
+
+
+class TimingMiddleware:
+    """Measure the stages of each request and report them. See the documentation of this module."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if not CONFIG.common_config.timing.enabled:
+            return self.get_response(request)
+        timings = Timings()
+        token = _TIMINGS.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _TIMINGS.reset(token)
+        if not timings.durations:
+            return response
+
+        durations = {**timings.durations, "total": timings.elapsed()}
+        if CONFIG.common_config.timing.server_timing:
+            response["Server-Timing"] = get_server_timing(durations)
+        if response.streaming and not response.is_async:
+            response.streaming_content = _time_stream(response.streaming_content, request, response, timings)
+        else:
+            _report(request, response, timings, durations)
+        return response
+
+    def process_template_response(self, _request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        """Time the rendering of responses that are rendered after the view returns, like responses of DRF."""
+        timings = _TIMINGS.get()
+        if timings is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda _rendered: timings.add("render", (time.perf_counter() - start) * 1000)
+            )
+        return response